@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 
 from apps.image_processing.models import (
+    DetectionObject,
+    DetectionResult,
     ImageTransformation,
     ProcessedImage,
     ProcessingImage,
@@ -70,3 +72,21 @@ class TransformationBatchAdmin(admin.ModelAdmin):
 @admin.register(ImageTransformation)
 class ImageTransformationAdmin(admin.ModelAdmin):
     pass
+
+
+class DetectionObjectInline(admin.TabularInline):
+    model = DetectionObject
+    fields = ("class_id", "class_name", "confidence", "x1", "y1", "x2", "y2")
+    readonly_fields = fields
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DetectionResult)
+class DetectionResultAdmin(admin.ModelAdmin):
+    list_display = ("content_hash", "model_version", "created_at")
+    list_filter = ("model_version",)
+    search_fields = ("content_hash", "detected_objects__class_name")
+    inlines = [DetectionObjectInline]
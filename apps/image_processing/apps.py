@@ -1,6 +1,25 @@
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ImagesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.image_processing"
+
+    def ready(self) -> None:
+        from apps.image_processing.core.transformers.cost_model import get_cost_model
+
+        # Workers load the calibrated cost model once, when they start
+        get_cost_model()
+
+        if settings.IMAGE_PROCESSING["DETECTOR_WARMUP"] and "db_worker" in sys.argv:
+            from apps.image_processing.core.detectors.export import (
+                get_detector_model_name,
+            )
+            from apps.image_processing.core.detectors.registry import (
+                get_detector_registry,
+            )
+
+            get_detector_registry().warm_up(get_detector_model_name())
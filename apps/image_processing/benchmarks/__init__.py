@@ -0,0 +1,25 @@
+from typing import Any, Callable
+
+from apps.image_processing.benchmarks.chain import benchmark_chain
+from apps.image_processing.benchmarks.decode import benchmark_decode
+from apps.image_processing.benchmarks.detectors import benchmark_detectors
+from apps.image_processing.benchmarks.encoders import benchmark_encoders
+from apps.image_processing.benchmarks.multiprocess_ipc import (
+    benchmark_multiprocess_ipc,
+)
+from apps.image_processing.benchmarks.point import benchmark_point
+from apps.image_processing.benchmarks.pyramid import benchmark_pyramid
+from apps.image_processing.benchmarks.tiled import benchmark_tiled
+from apps.image_processing.benchmarks.transformers import benchmark_transformers
+
+BENCHMARKS: dict[str, Callable[[], list[dict[str, Any]]]] = {
+    "chain": benchmark_chain,
+    "decode": benchmark_decode,
+    "detectors": benchmark_detectors,
+    "encoders": benchmark_encoders,
+    "multiprocess_ipc": benchmark_multiprocess_ipc,
+    "point": benchmark_point,
+    "pyramid": benchmark_pyramid,
+    "tiled": benchmark_tiled,
+    "transformers": benchmark_transformers,
+}
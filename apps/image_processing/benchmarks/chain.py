@@ -0,0 +1,65 @@
+import time
+from typing import Any
+
+from PIL import Image as PImage
+
+from apps.image_processing.constants import TRANSFORMATION_FILTER_BLUR_FILTER
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.chain import ImageChainTransformer
+
+
+def benchmark_chain(
+    lengths: tuple[int, ...] = (1, 2, 4, 8, 16),
+    image_size: tuple[int, int] = (512, 512),
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Measures the cost of the chain transformer for growing chain lengths.
+
+    The time per step must stay flat as the chain grows, since every step of the
+    execution plan runs exactly once.
+
+    Args:
+        lengths (tuple[int, ...]): The chain lengths to measure.
+        image_size (tuple[int, int]): The size of the generated input image.
+        repeat (int): How many times each chain is executed, the best run is kept.
+
+    Returns:
+        list[dict[str, Any]]: One row per chain length.
+    """
+    image = PImage.new("RGB", image_size, color="red")
+    rows = []
+    for length in lengths:
+        transformations = [
+            InternalImageTransformationDefinition(
+                identifier=str(index),
+                transformation=TransformationBlur,
+                filters=ExternalTransformationFiltersBlur(
+                    filter=TRANSFORMATION_FILTER_BLUR_FILTER.BOX_BLUR, radius=2
+                ),
+            )
+            for index in range(length)
+        ]
+        transformer = ImageChainTransformer(transformations=transformations)
+        plan = transformer.build_plan()
+        best = float("inf")
+        steps_executed = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            steps_executed = sum(1 for _ in transformer._execute_plan(image, plan))
+            best = min(best, time.perf_counter() - start)
+        rows.append(
+            {
+                "length": length,
+                "steps_executed": steps_executed,
+                "seconds": round(best, 4),
+                "seconds_per_step": round(best / length, 4),
+            }
+        )
+    return rows
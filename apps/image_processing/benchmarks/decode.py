@@ -0,0 +1,79 @@
+import time
+from io import BytesIO
+from typing import Any
+
+from PIL import Image as PImage
+
+from apps.image_processing.core.managers.base import image_reduce
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+
+
+def benchmark_decode(
+    image_size: tuple[int, int] = (6000, 4000),
+    thumbnail_sizes: tuple[int, ...] = (128, 512, 1024),
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Compares decoding a JPEG at full resolution with decoding it at the reduced
+    scale its thumbnails need, before generating them.
+
+    Args:
+        image_size (tuple[int, int]): The size of the generated JPEG.
+        thumbnail_sizes (tuple[int, ...]): The thumbnail box sizes to measure.
+        repeat (int): How many times each run is executed, the best run is kept.
+
+    Returns:
+        list[dict[str, Any]]: One row per thumbnail size and decode.
+    """
+    buffer = BytesIO()
+    PImage.linear_gradient("L").resize(image_size).convert("RGB").save(
+        buffer, format="jpeg", quality=90
+    )
+    content = buffer.getvalue()
+    rows = []
+    for thumbnail_size in thumbnail_sizes:
+        transformer = ImageSequentialTransformer(
+            transformations=[
+                InternalImageTransformationDefinition(
+                    identifier="THUMBNAIL",
+                    transformation=TransformationThumbnail,
+                    filters=ExternalTransformationFiltersThumbnail(
+                        size=(thumbnail_size, thumbnail_size)
+                    ),
+                )
+            ]
+        )
+        for reduced in (False, True):
+            best = float("inf")
+            decoded_size = image_size
+            for _ in range(repeat):
+                start = time.perf_counter()
+                image = PImage.open(BytesIO(content))
+                if reduced:
+                    required_size = transformer.required_input_size(image.size)
+                    if required_size is not None:
+                        image = image_reduce(image, required_size)
+                decoded_size = image.size
+                transformer._transform(image)
+                best = min(best, time.perf_counter() - start)
+            rows.append(
+                {
+                    "thumbnail": thumbnail_size,
+                    "decode": "reduced" if reduced else "full",
+                    "decoded_size": f"{decoded_size[0]}x{decoded_size[1]}",
+                    "decoded_mb": round(
+                        decoded_size[0] * decoded_size[1] * 4 / 1024**2, 1
+                    ),
+                    "seconds": round(best, 3),
+                }
+            )
+    return rows
@@ -0,0 +1,71 @@
+import time
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+from apps.image_processing.core.detectors.export import (
+    detect_tags,
+    sample_images,
+    tag_agreement,
+)
+
+
+def _exported_models() -> list[str]:
+    """
+    The models exported by the image_processing_export_detector command.
+    """
+    export_path = Path(settings.IMAGE_PROCESSING["DETECTOR_EXPORT_PATH"])
+    if not export_path.is_dir():
+        return []
+    return sorted(
+        str(path)
+        for path in export_path.iterdir()
+        if path.suffix == ".onnx" or path.name.endswith("_openvino_model")
+    )
+
+
+def benchmark_detectors(
+    models: list[str] | None = None,
+    images: list[str] | None = None,
+    batch_size: int = 8,
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Compares the throughput of detector models and how often they suggest the
+    same tags as the configured PyTorch weights.
+
+    Args:
+        models (list[str] | None): The weights or exported models to compare.
+            Defaults to the exported models.
+        images (list[str] | None): The images to detect, cycled to fill a batch.
+            Defaults to the ultralytics samples.
+        batch_size (int): The images per inference.
+        repeat (int): How many times each batch is detected, the best run is kept.
+
+    Returns:
+        list[dict[str, Any]]: One row per model, the reference model first.
+    """
+    reference = settings.IMAGE_PROCESSING["DETECTOR_MODEL"]
+    images = list(islice(cycle(images or sample_images()), batch_size))
+    rows = []
+    reference_tags: list[set[str]] = []
+    for model in [reference, *(models or _exported_models())]:
+        # The first inference initializes the runtime, it is not measured
+        tags = detect_tags(model, images)
+        if model == reference:
+            reference_tags = tags
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            detect_tags(model, images)
+            best = min(best, time.perf_counter() - start)
+        rows.append(
+            {
+                "model": Path(model).name,
+                "images_per_second": round(len(images) / best, 2),
+                "tag_agreement": round(tag_agreement(reference_tags, tags), 3),
+            }
+        )
+    return rows
@@ -0,0 +1,69 @@
+import time
+from typing import Any
+
+from PIL import Image as PImage
+from PIL import ImageFilter
+
+from apps.image_processing.constants import (
+    TRANSFORMATION_OUTPUT_FORMAT,
+    TRANSFORMATION_OUTPUT_PROFILE,
+)
+from apps.image_processing.core.transformers.encoders import ImageEncoder
+
+
+def _sample_image(image_size: tuple[int, int]) -> PImage.Image:
+    """
+    A generated image with smooth gradients and fine detail, so lossless formats
+    are not benchmarked on trivially compressible content.
+    """
+    detail = PImage.effect_noise(image_size, 48).filter(ImageFilter.GaussianBlur(2))
+    return PImage.merge(
+        "RGB",
+        (
+            PImage.linear_gradient("L").resize(image_size),
+            PImage.radial_gradient("L").resize(image_size),
+            detail,
+        ),
+    )
+
+
+def benchmark_encoders(
+    image_size: tuple[int, int] = (1024, 768),
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Compares the encode time and encoded size of every output format and profile.
+
+    Args:
+        image_size (tuple[int, int]): The size of the generated input image.
+        repeat (int): How many times each encoder runs, the best run is kept.
+
+    Returns:
+        list[dict[str, Any]]: One row per encoder, with its size relative to the
+        default PNG encoder.
+    """
+    image = _sample_image(image_size)
+    baseline = len(
+        ImageEncoder(
+            format=TRANSFORMATION_OUTPUT_FORMAT.PNG,
+            profile=TRANSFORMATION_OUTPUT_PROFILE.BALANCED,
+        ).encode(image)
+    )
+    rows = []
+    for format in TRANSFORMATION_OUTPUT_FORMAT:
+        for profile in TRANSFORMATION_OUTPUT_PROFILE:
+            encoder = ImageEncoder(format=format, profile=profile)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                encoded = encoder.encode(image)
+                best = min(best, time.perf_counter() - start)
+            rows.append(
+                {
+                    "encoder": encoder.name,
+                    "seconds": round(best, 3),
+                    "bytes": len(encoded),
+                    "size_over_png": round(len(encoded) / baseline, 3),
+                }
+            )
+    return rows
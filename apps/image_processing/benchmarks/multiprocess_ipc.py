@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import resource
+import time
+from dataclasses import dataclass
+from multiprocessing.queues import Queue
+from typing import Any
+
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformations.base import (
+    ExternalTransformationFilters,
+    InternalImageTransformation,
+    InternalImageTransformationFilters,
+)
+from apps.image_processing.core.transformations.black_and_white import (
+    ExternalTransformationFiltersBlackAndWhite,
+    TransformationBlackAndWhite,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.multiprocess import (
+    ImageMultiProcessTransformer,
+)
+from apps.image_processing.core.transformers.pool import (
+    get_process_pool,
+    shutdown_process_pool,
+)
+
+
+@dataclass
+class ExternalTransformationFiltersCopy(ExternalTransformationFilters):
+    def to_internal(self) -> InternalImageTransformationFilters:
+        return InternalImageTransformationFilters()
+
+
+class TransformationCopy(InternalImageTransformation):
+    """Copies the image, so the hand-off to the workers dominates the job."""
+
+    name = "copy"
+
+    def _image_transform(self, image: PImage.Image, filters: Any) -> PImage.Image:
+        return image.copy()
+
+
+def _worker_peak_rss() -> int:
+    """
+    Returns the peak RSS of the worker running it. It lasts long enough for the
+    jobs submitted together to be spread across the workers.
+    """
+    time.sleep(0.1)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _benchmark_variant(
+    transformations: list[InternalImageTransformationDefinition],
+    image_size: tuple[int, int],
+    use_shared_memory: bool,
+    queue: "Queue[dict[str, Any]]",
+) -> None:
+    """
+    Runs in a dedicated process so its peak RSS is not shared with other variants.
+    """
+    image = PImage.linear_gradient("L").resize(image_size).convert("RGB")
+    transformer = ImageMultiProcessTransformer(
+        transformations=transformations, use_shared_memory=use_shared_memory
+    )
+    # Start the workers before measuring, only the hand-off and the work count
+    get_process_pool().submit(abs, 0).result()
+    start = time.perf_counter()
+    transformer._transform(image)
+    seconds = time.perf_counter() - start
+    # The workers are not children of this process, they report their own peak
+    pool = get_process_pool()
+    workers = pool.max_workers or os.cpu_count() or 1
+    worker_peak_rss = max(
+        future.result()
+        for future in [pool.submit(_worker_peak_rss) for _ in range(workers)]
+    )
+    shutdown_process_pool()
+    queue.put(
+        {
+            "seconds": round(seconds, 3),
+            "parent_peak_rss_mb": round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+            ),
+            "worker_peak_rss_mb": round(worker_peak_rss / 1024, 1),
+        }
+    )
+
+
+def benchmark_multiprocess_ipc(
+    image_size: tuple[int, int] = (6000, 4000),
+    transformations_count: int = 6,
+) -> list[dict[str, Any]]:
+    """
+    Compares pickling the image to the workers of `ImageMultiProcessTransformer`
+    with handing it through shared memory.
+
+    Each variant runs in its own process. The copy transformation only copies the
+    image, so its time is mostly the hand-off to the workers and back.
+
+    Args:
+        image_size (tuple[int, int]): The size of the generated input image.
+        transformations_count (int): The number of transformations per run.
+
+    Returns:
+        list[dict[str, Any]]: One row per transformation kind and hand-off.
+    """
+    transformation_sets = {
+        "copy": [
+            InternalImageTransformationDefinition(
+                identifier=f"COPY/{index}",
+                transformation=TransformationCopy,
+                filters=ExternalTransformationFiltersCopy(),
+            )
+            for index in range(transformations_count)
+        ],
+        "mixed": [
+            InternalImageTransformationDefinition(
+                identifier=f"MIXED/{index}",
+                transformation=transformation,
+                filters=filters,
+            )
+            for index, (transformation, filters) in enumerate(
+                [
+                    (
+                        TransformationThumbnail,
+                        ExternalTransformationFiltersThumbnail(size=(256, 256)),
+                    ),
+                    (
+                        TransformationBlackAndWhite,
+                        ExternalTransformationFiltersBlackAndWhite(dither=None),
+                    ),
+                ]
+                * (transformations_count // 2)
+            )
+        ],
+    }
+    context = multiprocessing.get_context("fork")
+    rows = []
+    for transformations_name, transformations in transformation_sets.items():
+        for use_shared_memory in (False, True):
+            queue: "Queue[dict[str, Any]]" = context.Queue()
+            process = context.Process(
+                target=_benchmark_variant,
+                args=(transformations, image_size, use_shared_memory, queue),
+            )
+            process.start()
+            result = queue.get()
+            process.join()
+            rows.append(
+                {
+                    "transformations": transformations_name,
+                    "hand_off": "shared_memory" if use_shared_memory else "pickle",
+                    **result,
+                }
+            )
+    return rows
@@ -0,0 +1,91 @@
+import time
+from typing import Any
+
+from PIL import Image as PImage
+
+from apps.image_processing.constants import TRANSFORMATION_BACKEND
+from apps.image_processing.core.transformations.black_and_white import (
+    ExternalTransformationFiltersBlackAndWhite,
+    TransformationBlackAndWhite,
+)
+from apps.image_processing.core.transformations.brightness import (
+    ExternalTransformationFiltersBrightness,
+    TransformationBrightness,
+)
+from apps.image_processing.core.transformations.threshold import (
+    ExternalTransformationFiltersThreshold,
+    TransformationThreshold,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.chain import ImageChainTransformer
+
+
+def _chains(
+    backend: TRANSFORMATION_BACKEND,
+) -> dict[str, list[InternalImageTransformationDefinition]]:
+    black_and_white = InternalImageTransformationDefinition(
+        identifier="BLACK_AND_WHITE",
+        transformation=TransformationBlackAndWhite,
+        filters=ExternalTransformationFiltersBlackAndWhite(backend=backend),
+    )
+    brightness = InternalImageTransformationDefinition(
+        identifier="BRIGHTNESS",
+        transformation=TransformationBrightness,
+        filters=ExternalTransformationFiltersBrightness(factor=1.2, backend=backend),
+    )
+    threshold = InternalImageTransformationDefinition(
+        identifier="THRESHOLD",
+        transformation=TransformationThreshold,
+        filters=ExternalTransformationFiltersThreshold(threshold=128, backend=backend),
+    )
+    return {
+        "black_and_white": [black_and_white],
+        "brightness-threshold": [brightness, threshold],
+        "black_and_white-brightness-threshold": [
+            black_and_white,
+            brightness,
+            threshold,
+        ],
+        "brightness-black_and_white-threshold": [
+            brightness,
+            black_and_white,
+            threshold,
+        ],
+    }
+
+
+def benchmark_point(
+    image_size: tuple[int, int] = (4000, 3000),
+    repeat: int = 5,
+) -> list[dict[str, Any]]:
+    """
+    Compares chains of point transformations applied by Pillow, one image per
+    step, with the array backend, fused in a single pass.
+
+    Args:
+        image_size (tuple[int, int]): The size of the generated input image.
+        repeat (int): How many times each run is executed, the best run is kept.
+
+    Returns:
+        list[dict[str, Any]]: One row per chain and backend.
+    """
+    image = PImage.effect_noise(image_size, 60).convert("RGB")
+    rows = []
+    for backend in TRANSFORMATION_BACKEND:
+        for chain_name, transformations in _chains(backend).items():
+            transformer = ImageChainTransformer(transformations, optimize=False)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                transformer._transform(image)
+                best = min(best, time.perf_counter() - start)
+            rows.append(
+                {
+                    "chain": chain_name,
+                    "backend": backend.value,
+                    "seconds": round(best, 3),
+                }
+            )
+    return rows
@@ -0,0 +1,70 @@
+import time
+from typing import Any
+
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+
+
+def _best_time(function: Any, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_pyramid(
+    image_size: tuple[int, int] = (6000, 4000),
+    thumbnail_sizes: tuple[int, ...] = (1024, 512, 256, 128, 64),
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Compares rendering thumbnails one by one from the full resolution image with
+    rendering them from a shared resolution pyramid.
+
+    Args:
+        image_size (tuple[int, int]): The size of the generated input image.
+        thumbnail_sizes (tuple[int, ...]): The thumbnail box sizes, added one
+            more per row.
+        repeat (int): How many times each run is executed, the best run is kept.
+
+    Returns:
+        list[dict[str, Any]]: One row per number of thumbnails, with the time
+        saved by each thumbnail after the first one.
+    """
+    image = PImage.linear_gradient("L").resize(image_size).convert("RGB")
+    image.load()
+    rows = []
+    for count in range(1, len(thumbnail_sizes) + 1):
+        filters = [
+            ExternalTransformationFiltersThumbnail(size=(size, size))
+            for size in thumbnail_sizes[:count]
+        ]
+        single_seconds = _best_time(
+            lambda: [
+                TransformationThumbnail(image, output_filters)
+                for output_filters in filters
+            ],
+            repeat,
+        )
+        pyramid_seconds = _best_time(
+            lambda: TransformationThumbnail.transform_many(image, filters), repeat
+        )
+        rows.append(
+            {
+                "thumbnails": count,
+                "single_seconds": round(single_seconds, 3),
+                "pyramid_seconds": round(pyramid_seconds, 3),
+                "saved_per_extra_size": (
+                    round((single_seconds - pyramid_seconds) / (count - 1), 3)
+                    if count > 1
+                    else None
+                ),
+            }
+        )
+    return rows
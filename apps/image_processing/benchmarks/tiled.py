@@ -0,0 +1,103 @@
+import multiprocessing
+import resource
+import time
+from multiprocessing.queues import Queue
+from typing import Any, Type
+
+from PIL import Image as PImage
+
+from apps.image_processing.benchmarks.transformers import transform_and_encode
+from apps.image_processing.constants import TRANSFORMATION_FILTER_BLUR_FILTER
+from apps.image_processing.core.transformations.black_and_white import (
+    ExternalTransformationFiltersBlackAndWhite,
+    TransformationBlackAndWhite,
+)
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformers.base import (
+    BaseImageTransformer,
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+from apps.image_processing.core.transformers.tiled import ImageTiledTransformer
+
+
+def _benchmark_variant(
+    transformer_class: Type[BaseImageTransformer],
+    transformations: list[InternalImageTransformationDefinition],
+    image_size: tuple[int, int],
+    queue: "Queue[dict[str, Any]]",
+) -> None:
+    """
+    Runs in a dedicated process so its peak RSS is not shared with other variants.
+    """
+    image = PImage.linear_gradient("L").resize(image_size).convert("RGB")
+    source_peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    transformer = transformer_class(transformations=transformations)
+    start = time.perf_counter()
+    transform_and_encode(transformer, image)
+    seconds = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put(
+        {
+            "seconds": round(seconds, 3),
+            "peak_rss_mb": round(peak_rss / 1024, 1),
+            "peak_rss_over_source_mb": round((peak_rss - source_peak_rss) / 1024, 1),
+        }
+    )
+
+
+def benchmark_tiled(
+    image_size: tuple[int, int] = (10000, 8000),
+) -> list[dict[str, Any]]:
+    """
+    Compares the peak memory of transforming and encoding a large image as a whole
+    with transforming it by strips.
+
+    Each variant runs in its own process, the strips fit the default
+    `IMAGE_PROCESSING["TILED_MEMORY_LIMIT"]`.
+
+    Args:
+        image_size (tuple[int, int]): The size of the generated input image.
+
+    Returns:
+        list[dict[str, Any]]: One row per transformer.
+    """
+    transformations = [
+        InternalImageTransformationDefinition(
+            identifier="BLUR",
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(
+                filter=TRANSFORMATION_FILTER_BLUR_FILTER.GAUSSIAN_BLUR, radius=4
+            ),
+        ),
+        InternalImageTransformationDefinition(
+            identifier="BOX_BLUR",
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(
+                filter=TRANSFORMATION_FILTER_BLUR_FILTER.BOX_BLUR, radius=8
+            ),
+        ),
+        InternalImageTransformationDefinition(
+            identifier="BLACK_AND_WHITE",
+            transformation=TransformationBlackAndWhite,
+            filters=ExternalTransformationFiltersBlackAndWhite(dither=None),
+        ),
+    ]
+    context = multiprocessing.get_context("fork")
+    rows = []
+    for transformer_class in (ImageSequentialTransformer, ImageTiledTransformer):
+        queue: "Queue[dict[str, Any]]" = context.Queue()
+        process = context.Process(
+            target=_benchmark_variant,
+            args=(transformer_class, transformations, image_size, queue),
+        )
+        process.start()
+        result = queue.get()
+        process.join()
+        rows.append({"transformer": transformer_class.name, **result})
+    return rows
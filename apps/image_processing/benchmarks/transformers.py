@@ -0,0 +1,124 @@
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any
+
+from django.conf import settings
+from PIL import Image as PImage
+
+from apps.image_processing.constants import TRANSFORMATION_FILTER_BLUR_FILTER
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    BaseImageTransformer,
+    InternalImageTransformationDefinition,
+    InternalImageTransformationFailure,
+)
+from apps.image_processing.core.transformers.multiprocess import (
+    ImageMultiProcessTransformer,
+)
+from apps.image_processing.core.transformers.pool import (
+    get_process_pool,
+    get_thread_pool,
+)
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+from apps.image_processing.core.transformers.threaded import ImageThreadedTransformer
+
+
+def transform_and_encode(
+    transformer: BaseImageTransformer, image: PImage.Image
+) -> list[bytes]:
+    """
+    Transforms an image and encodes each result on the shared thread pool as soon
+    as it completes, with at most `IMAGE_PROCESSING["PIPELINE_MAX_IN_FLIGHT"]`
+    encodes at the same time, the way `ResultPipeline` does without storing them.
+
+    Args:
+        transformer (BaseImageTransformer): The transformer to measure.
+        image (PImage.Image): The image to transform.
+
+    Returns:
+        list[bytes]: The encoded results, in completion order.
+    """
+    max_in_flight = max(1, settings.IMAGE_PROCESSING["PIPELINE_MAX_IN_FLIGHT"])
+    in_flight: deque[Future[bytes]] = deque()
+    encoded = []
+    for _, result in transformer._stream_completed(image):
+        if isinstance(result, InternalImageTransformationFailure):
+            raise result.error
+        if len(in_flight) >= max_in_flight:
+            encoded.append(in_flight.popleft().result())
+        in_flight.append(get_thread_pool().submit(transformer._encode_result, result))
+    encoded.extend(future.result() for future in in_flight)
+    return encoded
+
+
+def benchmark_transformers(
+    counts: tuple[int, ...] = (2, 4, 8),
+    image_size: tuple[int, int] = (2048, 1536),
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Compares the transformers of independent transformations, including the
+    encoding of their results.
+
+    Args:
+        counts (tuple[int, ...]): The numbers of transformations to measure.
+        image_size (tuple[int, int]): The size of the generated input image.
+        repeat (int): How many times each run is executed, the best run is kept.
+
+    Returns:
+        list[dict[str, Any]]: One row per transformer and number of transformations.
+    """
+    image = PImage.linear_gradient("L").resize(image_size).convert("RGB")
+    definitions = [
+        (
+            TransformationBlur,
+            ExternalTransformationFiltersBlur(
+                filter=TRANSFORMATION_FILTER_BLUR_FILTER.GAUSSIAN_BLUR, radius=4
+            ),
+        ),
+        (
+            TransformationThumbnail,
+            ExternalTransformationFiltersThumbnail(size=(1024, 1024)),
+        ),
+    ]
+    # Start the process pool workers before measuring
+    get_process_pool().submit(abs, 0).result()
+    rows = []
+    for count in counts:
+        transformations = [
+            InternalImageTransformationDefinition(
+                identifier=str(index),
+                transformation=definitions[index % len(definitions)][0],
+                filters=definitions[index % len(definitions)][1],
+            )
+            for index in range(count)
+        ]
+        for transformer_class in (
+            ImageSequentialTransformer,
+            ImageThreadedTransformer,
+            ImageMultiProcessTransformer,
+        ):
+            transformer = transformer_class(transformations=transformations)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                transform_and_encode(transformer, image)
+                best = min(best, time.perf_counter() - start)
+            rows.append(
+                {
+                    "transformations": count,
+                    "transformer": transformer.name,
+                    "seconds": round(best, 3),
+                }
+            )
+    return rows
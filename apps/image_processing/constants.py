@@ -1,6 +1,24 @@
 from enum import StrEnum, auto
 
+TRANSFORMATIONS_THREADED_TRESHOLD = 3
 TRANSFORMATIONS_MULTIPROCESS_TRESHOLD = 5
+# Max absolute per-pixel difference accepted when reordering chained transformations
+TRANSFORMATIONS_REORDER_MAX_TOLERANCE = 2
+# Min relative cost reduction for a reordering to be applied
+TRANSFORMATIONS_REORDER_MIN_GAIN = 0.1
+# Image modes the declared commutations hold for. Pillow premultiplies the alpha
+# band when resampling and resamples palette images by index, so swapping
+# transformations of other modes changes the output beyond their tolerance.
+TRANSFORMATIONS_REORDER_MODES = frozenset({"L", "RGB"})
+# Min ratio between the decoded size and the output size of a downscale, used to
+# decode sources at a reduced resolution when a thumbnail sets no reducing gap
+TRANSFORMATIONS_MIN_REDUCING_GAP = 2.0
+# Min PSNR, in dB, between a thumbnail rendered from a shared resolution pyramid
+# and the same thumbnail rendered alone, on premultiplied values for alpha images
+TRANSFORMATIONS_PYRAMID_MIN_PSNR = 45.0
+# Share of the max entries a full result cache is trimmed down to, so the entries
+# are listed and sorted once every few thousand results rather than on each one
+RESULT_CACHE_TRIM_RATIO = 0.9
 
 
 class TRANSFORMATION_FILTER_THUMBNAIL_RESAMPLING(StrEnum):
@@ -23,3 +41,31 @@ class TRANSFORMATION_FILTER_DITHER(StrEnum):
     NONE = auto()
     # ORDERED = auto()  # Not yet implemented (by PIL team)
     # RASTERIZE = auto()  # Not yet implemented (by PIL team)
+
+
+class TRANSFORMATION_BACKEND(StrEnum):
+    PILLOW = auto()
+    NUMPY = auto()
+
+
+class TRANSFORMATION_OUTPUT_FORMAT(StrEnum):
+    PNG = auto()
+    JPEG = auto()
+    WEBP = auto()
+    WEBP_LOSSLESS = auto()
+
+
+class TRANSFORMATION_OUTPUT_PROFILE(StrEnum):
+    FAST = auto()
+    BALANCED = auto()
+    SMALL = auto()
+
+
+class DETECTOR_FORMAT(StrEnum):
+    PYTORCH = auto()
+    ONNX = auto()
+    OPENVINO = auto()
+
+
+# Min tag agreement between an exported detector model and its PyTorch weights
+DETECTOR_EXPORT_MIN_AGREEMENT = 0.9
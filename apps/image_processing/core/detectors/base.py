@@ -7,7 +7,9 @@ from PIL import Image as PImage
 class DetectorObjectResult:
     type: int
     name: str
+    # Box corners (x1, y1, x2, y2) in pixels of the source image
     box: list[float]
+    confidence: float = 0.0
 
 
 @dataclass
@@ -20,3 +22,8 @@ class DetectorResult:
 class DetectorImage:
     identifier: str | int
     image: PImage.Image | str
+    # SHA-256 of the image file content, computed from the path when not given
+    content_hash: str | None = None
+    # Size of the source of an image decoded at a reduced resolution, the boxes
+    # are scaled back to it
+    source_size: tuple[int, int] | None = None
@@ -1,32 +1,113 @@
-from typing import Generator, Sequence
-
-from ultralytics import YOLO
+from dataclasses import replace
+from typing import Any, Generator, Iterator, Sequence
 
 from apps.image_processing.core.detectors.base import (
     DetectorImage,
     DetectorObjectResult,
     DetectorResult,
 )
+from apps.image_processing.core.detectors.export import get_detector_model_name
+from apps.image_processing.core.detectors.inputs import open_detector_image
+from apps.image_processing.core.detectors.registry import get_detector_registry
+from apps.image_processing.core.detectors.results import (
+    detection_result_create,
+    detection_results_retrieve,
+    detector_model_version,
+    file_content_hash,
+)
 
 
 class CommonObjectDetector:
     def __init__(self, images: Sequence[DetectorImage]) -> None:
-        model = YOLO("yolo11l.pt", task="detect")
+        model_name = get_detector_model_name()
+        self.model_version = detector_model_version(model_name)
         self.images = images
-        self._results = model([img.image for img in self.images], stream=True)
+        # Images are identified by their content, so a photo uploaded again or
+        # reused elsewhere is detected once per model
+        self._hashes = [
+            img.content_hash
+            or (file_content_hash(img.image) if isinstance(img.image, str) else None)
+            for img in self.images
+        ]
+        self._stored = detection_results_retrieve(
+            [content_hash for content_hash in self._hashes if content_hash],
+            self.model_version,
+        )
+        pending: list[DetectorImage] = []
+        pending_hashes: set[str] = set()
+        for img, content_hash in zip(self.images, self._hashes):
+            if content_hash is None:
+                pending.append(self._prescale(img))
+            elif (
+                content_hash not in self._stored and content_hash not in pending_hashes
+            ):
+                pending.append(self._prescale(img))
+                pending_hashes.add(content_hash)
+
+        self._pending = pending
+        self._results: Iterator[Any] = iter(())
+        if pending:
+            # The model is loaded once per worker process and shared by its tasks
+            model = get_detector_registry().get(model_name, task="detect")
+            # The images go through the model in a single batch, which is much
+            # cheaper per image than one inference each, mostly on CPU
+            self._results = model(
+                [img.image for img in pending],
+                stream=True,
+                batch=len(pending),
+            )
+
+    @staticmethod
+    def _prescale(img: DetectorImage) -> DetectorImage:
+        """
+        Decodes an image given by path at the resolution the model runs at, so
+        neither the full resolution decode nor the downscale happen in the model.
+        """
+        if not isinstance(img.image, str):
+            return img
+        image, source_size = open_detector_image(img.image)
+        return replace(img, image=image, source_size=source_size)
+
+    @staticmethod
+    def _box_scale(img: DetectorImage) -> tuple[float, float]:
+        """
+        The factors from the boxes of a prescaled image to its source pixels.
+        """
+        if img.source_size is None or isinstance(img.image, str):
+            return 1.0, 1.0
+        return (
+            img.source_size[0] / img.image.width,
+            img.source_size[1] / img.image.height,
+        )
 
     @property
     def results(self) -> Generator[DetectorResult]:
-        for i, r in enumerate(self._results):
-            r_id = self.images[i].identifier
-            yield DetectorResult(
-                identifier=r_id,
-                objects=[
+        pending = iter(self._pending)
+        for img, content_hash in zip(self.images, self._hashes):
+            if content_hash is not None and content_hash in self._stored:
+                objects = self._stored[content_hash]
+            else:
+                r = next(self._results)
+                scale_x, scale_y = self._box_scale(next(pending))
+                objects = [
                     DetectorObjectResult(
-                        type=box.cls.int(),
-                        name=r.names[box.cls.int().item()],
-                        box=box.xyxy,
+                        type=int(cls),
+                        name=r.names[int(cls)],
+                        box=[
+                            box[0] * scale_x,
+                            box[1] * scale_y,
+                            box[2] * scale_x,
+                            box[3] * scale_y,
+                        ],
+                        confidence=confidence,
                     )
-                    for box in r.boxes
-                ],
-            )
+                    for cls, confidence, box in zip(
+                        r.boxes.cls.tolist(),
+                        r.boxes.conf.tolist(),
+                        r.boxes.xyxy.tolist(),
+                    )
+                ]
+                if content_hash is not None:
+                    detection_result_create(content_hash, self.model_version, objects)
+                    self._stored[content_hash] = objects
+            yield DetectorResult(identifier=img.identifier, objects=objects)
@@ -0,0 +1,184 @@
+import logging
+import shutil
+from pathlib import Path
+from typing import Sequence
+
+from django.conf import settings
+from PIL import Image as PImage
+
+from apps.image_processing.constants import DETECTOR_FORMAT
+from apps.image_processing.core.detectors import registry
+from apps.image_processing.core.detectors.registry import get_detector_registry
+
+logger = logging.getLogger(__name__)
+
+# Input size of the exported models, the default input size of YOLO
+DETECTOR_EXPORT_IMAGE_SIZE = 640
+
+
+def _check_format(format: DETECTOR_FORMAT, int8: bool) -> None:
+    if format == DETECTOR_FORMAT.PYTORCH:
+        raise ValueError("PyTorch weights are not exported")
+    if int8 and format != DETECTOR_FORMAT.OPENVINO:
+        raise ValueError(f"The {format} export is not quantized to int8")
+
+
+def exported_model_path(
+    model: str,
+    format: DETECTOR_FORMAT,
+    int8: bool = False,
+    export_path: str | Path | None = None,
+) -> Path:
+    """
+    The path of the export of a model, named the way ultralytics names it.
+
+    Args:
+        model (str): The PyTorch weights of the model, e.g. "yolo11n.pt".
+        format (DETECTOR_FORMAT): The format of the export.
+        int8 (bool, optional): Whether the export is quantized to int8. Defaults
+            to False.
+        export_path (str | Path | None, optional): The directory of the exported
+            models. Defaults to `IMAGE_PROCESSING["DETECTOR_EXPORT_PATH"]`.
+
+    Returns:
+        Path: The path of the exported model, a directory for OpenVINO.
+
+    Raises:
+        ValueError: If the format is not exported or not quantized to int8.
+    """
+    format = DETECTOR_FORMAT(format)
+    _check_format(format, int8)
+    stem = Path(model).stem + ("_int8" if int8 else "")
+    name = (
+        f"{stem}.onnx" if format == DETECTOR_FORMAT.ONNX else f"{stem}_openvino_model"
+    )
+    return Path(export_path or settings.IMAGE_PROCESSING["DETECTOR_EXPORT_PATH"]) / name
+
+
+def get_detector_model_name() -> str:
+    """
+    The model the detector loads, the PyTorch weights or their export picked by
+    the `IMAGE_PROCESSING` settings.
+
+    A missing export falls back to the PyTorch weights, so detection keeps working
+    until the image_processing_export_detector command is run.
+
+    Returns:
+        str: The weights or the path of the exported model.
+    """
+    model = settings.IMAGE_PROCESSING["DETECTOR_MODEL"]
+    format = DETECTOR_FORMAT(settings.IMAGE_PROCESSING["DETECTOR_FORMAT"])
+    if format == DETECTOR_FORMAT.PYTORCH:
+        return model
+    path = exported_model_path(
+        model, format, int8=settings.IMAGE_PROCESSING["DETECTOR_INT8"]
+    )
+    if not path.exists():
+        logger.warning(f"Exported detector model {path} not found, using {model}")
+        return model
+    return str(path)
+
+
+def export_detector_model(
+    model: str,
+    format: DETECTOR_FORMAT,
+    int8: bool = False,
+    export_path: str | Path | None = None,
+    image_size: int = DETECTOR_EXPORT_IMAGE_SIZE,
+    data: str | None = None,
+) -> Path:
+    """
+    Exports a model with ultralytics to a CPU runtime and moves it to the
+    exported models directory.
+
+    The export has a dynamic batch size, so the detector can run the images of
+    a batch in a single inference.
+
+    Args:
+        model (str): The PyTorch weights of the model, e.g. "yolo11n.pt".
+        format (DETECTOR_FORMAT): The format of the export.
+        int8 (bool, optional): Whether to quantize the export to int8. Defaults
+            to False.
+        export_path (str | Path | None, optional): The directory of the exported
+            models. Defaults to `IMAGE_PROCESSING["DETECTOR_EXPORT_PATH"]`.
+        image_size (int, optional): The input size of the export. Defaults to
+            DETECTOR_EXPORT_IMAGE_SIZE.
+        data (str | None, optional): The dataset the int8 quantization is
+            calibrated on. Defaults to the ultralytics default.
+
+    Returns:
+        Path: The path of the exported model.
+    """
+    format = DETECTOR_FORMAT(format)
+    path = exported_model_path(model, format, int8=int8, export_path=export_path)
+    options = {"data": data} if data else {}
+    exported = registry._load_model(model, "detect").export(
+        format=format.value,
+        int8=int8,
+        imgsz=image_size,
+        dynamic=True,
+        **options,
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+    shutil.move(exported, path)
+    return path
+
+
+def sample_images() -> list[str]:
+    """
+    The sample images shipped with ultralytics, to check and compare models on.
+    """
+    from ultralytics.utils import ASSETS
+
+    return sorted(str(path) for path in Path(ASSETS).glob("*.jpg"))
+
+
+def detect_tags(
+    model: str, images: Sequence[PImage.Image | str], batch: int | None = None
+) -> list[set[str]]:
+    """
+    Detects the names of the objects of each image, the way the places tags are
+    suggested.
+
+    Args:
+        model (str): The weights or the path of the exported model.
+        images (Sequence[PImage.Image | str]): The images or their paths.
+        batch (int | None, optional): The images per inference. Defaults to all
+            of them.
+
+    Returns:
+        list[set[str]]: The lowercase object names of each image.
+    """
+    results = get_detector_registry().get(model, task="detect")(
+        list(images), batch=batch or max(len(images), 1), verbose=False
+    )
+    return [
+        {result.names[int(cls)].lower() for cls in result.boxes.cls.tolist()}
+        for result in results
+    ]
+
+
+def tag_agreement(reference: list[set[str]], candidate: list[set[str]]) -> float:
+    """
+    The mean Jaccard similarity between the tags of each image, 1 when two models
+    suggest the same tags.
+
+    Args:
+        reference (list[set[str]]): The tags of each image by the reference model.
+        candidate (list[set[str]]): The tags of each image by the compared model.
+
+    Returns:
+        float: The agreement, between 0 and 1.
+    """
+    if len(reference) != len(candidate):
+        raise ValueError("Both models must tag the same images")
+    if not reference:
+        return 1.0
+    return sum(
+        len(expected & tags) / len(expected | tags) if expected | tags else 1.0
+        for expected, tags in zip(reference, candidate)
+    ) / len(reference)
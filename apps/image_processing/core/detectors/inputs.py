@@ -0,0 +1,73 @@
+from PIL import ExifTags, ImageOps
+from PIL import Image as PImage
+
+from apps.image_processing.core.managers.base import image_reduce
+
+# Longest side of the detector input, the default input size of YOLO
+DETECTOR_INPUT_SIZE = 640
+# Version of the way images are opened for the detector, to bump whenever
+# open_detector_image changes the pixels the model sees
+DETECTOR_PREPROCESSING_VERSION = 1
+
+# EXIF orientations that swap the width and the height of the image
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def detector_input_size(
+    size: tuple[int, int], input_size: int = DETECTOR_INPUT_SIZE
+) -> tuple[int, int]:
+    """
+    The size an image is scaled to so its longest side fits the detector input,
+    the way YOLO scales it before letterboxing. Smaller images keep their size.
+
+    Args:
+        size (tuple[int, int]): The size of the image.
+        input_size (int, optional): The longest side of the detector input.
+            Defaults to DETECTOR_INPUT_SIZE.
+
+    Returns:
+        tuple[int, int]: The size of the detector input.
+    """
+    scale = input_size / max(size)
+    if scale >= 1:
+        return size
+    return (max(round(size[0] * scale), 1), max(round(size[1] * scale), 1))
+
+
+def open_detector_image(
+    path: str, input_size: int = DETECTOR_INPUT_SIZE
+) -> tuple[PImage.Image, tuple[int, int]]:
+    """
+    Opens an image at the resolution the detector runs at.
+
+    Formats that support it, such as JPEG, are decoded straight at a reduced
+    scale, so a 12 MP phone photo is never decoded at full resolution. The image
+    is then rotated by its EXIF orientation and resized to the detector input,
+    so the model only pads it.
+
+    Args:
+        path (str): The path of the image file.
+        input_size (int, optional): The longest side of the detector input.
+            Defaults to DETECTOR_INPUT_SIZE.
+
+    Returns:
+        tuple[PImage.Image, tuple[int, int]]: The detector input, and the size
+            of the source image once rotated, the boxes are scaled back to.
+    """
+    image = PImage.open(path)
+    source_size = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in _TRANSPOSED_ORIENTATIONS:
+        source_size = (source_size[1], source_size[0])
+    target_size = detector_input_size(source_size, input_size)
+    if target_size == source_size:
+        return ImageOps.exif_transpose(image).convert("RGB"), source_size
+
+    # The reduction happens before the rotation, on the stored axes
+    stored_target_size = (
+        target_size if source_size == image.size else (target_size[1], target_size[0])
+    )
+    image = image_reduce(image, stored_target_size)
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    if image.size != target_size:
+        image = image.resize(target_size, PImage.Resampling.BILINEAR)
+    return image, source_size
@@ -0,0 +1,241 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from PIL import Image as PImage
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Size of the blank image of the warm up inference, the default input size of YOLO
+DETECTOR_WARMUP_SIZE = 640
+
+
+def _load_model(name: str, task: str) -> "YOLO":
+    """
+    Loads a detector model with ultralytics, imported on first use so processes
+    that never detect do not pay for it.
+    """
+    from ultralytics import YOLO
+
+    return YOLO(name, task=task)
+
+
+def _download_weights(name: str) -> str:
+    """
+    Finds weights the way ultralytics does when loading them, in the current
+    directory then in its weights directory, downloading the released ones that
+    are missing.
+    """
+    from ultralytics.utils.downloads import attempt_download_asset
+
+    return str(attempt_download_asset(name))
+
+
+def detector_model_path(model: str) -> Path:
+    """
+    The weights file or export directory ultralytics loads a model from.
+
+    Args:
+        model (str): The weights or the path of the exported model.
+
+    Returns:
+        Path: The absolute path of the model.
+
+    Raises:
+        FileNotFoundError: If the model is neither on disk nor downloadable.
+    """
+    path = Path(model)
+    if not path.exists():
+        path = Path(_download_weights(model))
+    if not path.exists():
+        raise FileNotFoundError(f"Detector model {model} not found")
+    return path.resolve()
+
+
+def model_nbytes(model: Any) -> int:
+    """
+    Estimates the memory held by a loaded model.
+
+    PyTorch models hold their parameters and buffers, exported models are
+    estimated by the size of their weights file.
+
+    Args:
+        model (YOLO): The loaded model.
+
+    Returns:
+        int: The estimated size of the model, in bytes.
+    """
+    module = getattr(model, "model", None)
+    if hasattr(module, "parameters"):
+        return sum(
+            tensor.numel() * tensor.element_size()
+            for tensors in (module.parameters(), module.buffers())
+            for tensor in tensors
+        )
+    path = getattr(model, "ckpt_path", None) or getattr(model, "model_name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return os.path.getsize(path)
+    return 0
+
+
+@dataclass
+class DetectorModelEntry:
+    """
+    A loaded detector model.
+
+    Attributes:
+        model (YOLO): The model.
+        nbytes (int): The estimated memory held by the model, in bytes.
+        last_used (float): The `time.monotonic` of its last use.
+    """
+
+    model: "YOLO"
+    nbytes: int
+    last_used: float
+
+
+class DetectorModelRegistry:
+    """
+    Loads each detector model once per process and reuses it across tasks.
+
+    Models unused for more than `max_idle_seconds` are unloaded the next time a
+    model is requested, or explicitly with `unload_idle`.
+
+    Attributes:
+        max_idle_seconds (float | None): The idle time after which a model is
+            unloaded, None to keep the models loaded.
+    """
+
+    def __init__(self, max_idle_seconds: float | None = None) -> None:
+        self.max_idle_seconds = max_idle_seconds
+        self._entries: dict[tuple[str, str], DetectorModelEntry] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def bytes(self) -> int:
+        """The estimated memory held by the loaded models, in bytes."""
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def loaded(self) -> dict[str, int]:
+        """
+        Returns the estimated memory held by each loaded model, by name.
+        """
+        return {name: entry.nbytes for (name, _), entry in self._entries.items()}
+
+    def get(self, name: str, task: str = "detect") -> "YOLO":
+        """
+        Returns a model, loading it on first use.
+
+        Args:
+            name (str): The weights of the model, e.g. "yolo11l.pt".
+            task (str, optional): The task of the model. Defaults to "detect".
+
+        Returns:
+            YOLO: The loaded model.
+        """
+        if self.max_idle_seconds is not None:
+            self.unload_idle(self.max_idle_seconds)
+        with self._lock:
+            entry = self._entries.get((name, task))
+            if entry is None:
+                started_at = time.perf_counter()
+                model = _load_model(name, task)
+                entry = DetectorModelEntry(
+                    model=model, nbytes=model_nbytes(model), last_used=0.0
+                )
+                self._entries[(name, task)] = entry
+                logger.info(
+                    f"Loaded detector model {name} in "
+                    f"{time.perf_counter() - started_at:.2f}s, {entry.nbytes} bytes, "
+                    f"{self.bytes} bytes held by {len(self._entries)} models"
+                )
+            entry.last_used = time.monotonic()
+            return entry.model
+
+    def warm_up(self, name: str, task: str = "detect") -> None:
+        """
+        Loads a model and runs an inference on a blank image, so the first task
+        does not pay for the lazy initialization of the runtime.
+
+        Args:
+            name (str): The weights of the model.
+            task (str, optional): The task of the model. Defaults to "detect".
+        """
+        model = self.get(name, task)
+        model(
+            PImage.new("RGB", (DETECTOR_WARMUP_SIZE, DETECTOR_WARMUP_SIZE)),
+            verbose=False,
+        )
+
+    def unload(self, name: str, task: str = "detect") -> bool:
+        """
+        Unloads a model, tasks still using it keep their reference.
+
+        Returns:
+            bool: Whether the model was loaded.
+        """
+        with self._lock:
+            return self._entries.pop((name, task), None) is not None
+
+    def unload_idle(self, max_idle_seconds: float) -> list[str]:
+        """
+        Unloads the models unused for more than `max_idle_seconds`.
+
+        Args:
+            max_idle_seconds (float): The max idle time of the models kept.
+
+        Returns:
+            list[str]: The names of the unloaded models.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key
+                for key, entry in self._entries.items()
+                if now - entry.last_used > max_idle_seconds
+            ]
+            for key in idle:
+                del self._entries[key]
+        if idle:
+            logger.info(f"Unloaded idle detector models: {idle}")
+        return [name for name, _ in idle]
+
+    def clear(self) -> None:
+        """
+        Unloads every model.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+_detector_registry: DetectorModelRegistry | None = None
+_detector_registry_lock = threading.Lock()
+
+
+def get_detector_registry() -> DetectorModelRegistry:
+    """
+    Returns the detector model registry of the current process, creating it from
+    the `IMAGE_PROCESSING` settings on first use.
+
+    Returns:
+        DetectorModelRegistry: The detector model registry.
+    """
+    global _detector_registry
+    with _detector_registry_lock:
+        if _detector_registry is None:
+            max_idle_seconds = settings.IMAGE_PROCESSING["DETECTOR_MAX_IDLE_SECONDS"]
+            _detector_registry = DetectorModelRegistry(
+                max_idle_seconds=max_idle_seconds if max_idle_seconds > 0 else None
+            )
+        return _detector_registry
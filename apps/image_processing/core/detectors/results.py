@@ -0,0 +1,141 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.db import IntegrityError, transaction
+
+from apps.image_processing.core.detectors.base import DetectorObjectResult
+from apps.image_processing.core.detectors.inputs import (
+    DETECTOR_INPUT_SIZE,
+    DETECTOR_PREPROCESSING_VERSION,
+)
+from apps.image_processing.core.detectors.registry import detector_model_path
+from apps.image_processing.models import DetectionObject, DetectionResult
+
+
+def file_content_hash(path: str) -> str:
+    """
+    Returns the SHA-256 hash of a file content.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal hash.
+    """
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def _model_files(path: Path) -> list[Path]:
+    if path.is_dir():
+        return sorted(file for file in path.rglob("*") if file.is_file())
+    return [path]
+
+
+@lru_cache
+def _model_fingerprint(files: tuple[tuple[str, int, int], ...]) -> str:
+    # Keyed by the modification time and size of each file, so weights or an
+    # export replaced in place are hashed again
+    digest = hashlib.sha256()
+    for file, _, _ in files:
+        digest.update(file_content_hash(file).encode())
+    return digest.hexdigest()
+
+
+def detector_model_version(model: str) -> str:
+    """
+    The version the detection results of a model are stored under.
+
+    It holds the name of the weights or of their export, a fingerprint of the
+    files ultralytics loads them from, and the preprocessing of the images, so
+    stored results are not reused once the weights are replaced, the model is
+    exported again or the images are opened differently.
+
+    Args:
+        model (str): The weights or the path of the exported model.
+
+    Returns:
+        str: The version of the model.
+
+    Raises:
+        FileNotFoundError: If the model is neither on disk nor downloadable.
+    """
+    files = tuple(
+        (str(file), file.stat().st_mtime_ns, file.stat().st_size)
+        for file in _model_files(detector_model_path(model))
+    )
+    return ":".join(
+        [
+            Path(model).name,
+            _model_fingerprint(files)[:16],
+            f"input{DETECTOR_INPUT_SIZE}-v{DETECTOR_PREPROCESSING_VERSION}",
+        ]
+    )
+
+
+def detection_results_retrieve(
+    content_hashes: list[str], model_version: str
+) -> dict[str, list[DetectorObjectResult]]:
+    """
+    Returns the stored objects of the images already detected by a model.
+
+    Args:
+        content_hashes (list[str]): The content hashes of the images.
+        model_version (str): The version of the model.
+
+    Returns:
+        dict[str, list[DetectorObjectResult]]: The objects of each detected
+            image, by content hash. Images never detected are missing.
+    """
+    results = DetectionResult.objects.prefetch_related("detected_objects").filter(
+        content_hash__in=content_hashes, model_version=model_version
+    )
+    return {
+        result.content_hash: [
+            DetectorObjectResult(
+                type=obj.class_id,
+                name=obj.class_name,
+                box=[obj.x1, obj.y1, obj.x2, obj.y2],
+                confidence=obj.confidence,
+            )
+            for obj in result.detected_objects.all()
+        ]
+        for result in results
+    }
+
+
+def detection_result_create(
+    content_hash: str, model_version: str, objects: list[DetectorObjectResult]
+) -> None:
+    """
+    Stores the objects detected in an image, unless another task already stored
+    them.
+
+    Args:
+        content_hash (str): The content hash of the image.
+        model_version (str): The version of the model.
+        objects (list[DetectorObjectResult]): The detected objects.
+    """
+    try:
+        with transaction.atomic():
+            result = DetectionResult.objects.create(
+                content_hash=content_hash, model_version=model_version
+            )
+            DetectionObject.objects.bulk_create(
+                [
+                    DetectionObject(
+                        result=result,
+                        class_id=obj.type,
+                        class_name=obj.name,
+                        confidence=obj.confidence,
+                        x1=obj.box[0],
+                        y1=obj.box[1],
+                        x2=obj.box[2],
+                        y2=obj.box[3],
+                    )
+                    for obj in objects
+                ]
+            )
+    except IntegrityError:
+        pass
@@ -1,14 +1,72 @@
+import hashlib
+import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from functools import cached_property
 
 from PIL import Image as PImage
 
+from apps.image_processing.core.managers.source_cache import (
+    SourceCacheEntry,
+    get_source_cache,
+)
 from apps.image_processing.core.transformers.base import (
     BaseImageTransformer,
     InternalImageTransformationResult,
+    TransformationRun,
 )
+from apps.image_processing.core.transformers.result_cache import get_result_cache
 from apps.image_processing.models import ProcessingImage, TransformationBatch
 
+logger = logging.getLogger(__name__)
+
+
+def image_reduce(image: PImage.Image, size: tuple[int, int]) -> PImage.Image:
+    """
+    Reduces an image by the largest integer factor that keeps it at least as
+    large as `size` on both axes.
+
+    Images not decoded yet whose format supports it, such as JPEG, are decoded
+    straight at the reduced scale with `draft`, skipping the full resolution
+    decode. Other images are decoded and then reduced with `reduce`.
+
+    Args:
+        image (PImage.Image): The opened image.
+        size (tuple[int, int]): The min size of the reduced image.
+
+    Returns:
+        PImage.Image: The reduced image, or the same image if it cannot be reduced.
+    """
+    factor = min(image.width // max(size[0], 1), image.height // max(size[1], 1))
+    if factor < 2:
+        return image
+    original_size = image.size
+    if image.draft(image.mode, size) is not None:
+        logger.debug(f"Decoding image of size {original_size} at {image.size}")
+        return image
+    return image.reduce(factor)
+
+
+@dataclass(frozen=True)
+class ImageSourceMetadata:
+    """
+    The metadata of a source image read from its header, without decoding it.
+
+    Attributes:
+        size (tuple[int, int]): The size of the image.
+        mode (str): The mode of the image, e.g. "RGB".
+        format (str | None): The file format of the image, e.g. "JPEG".
+    """
+
+    size: tuple[int, int]
+    mode: str
+    format: str | None
+
+    @property
+    def bands(self) -> int:
+        """The number of bands of the image."""
+        return PImage.getmodebands(self.mode)
+
 
 @dataclass
 class InternalTransformationManagerSaveResult:
@@ -23,6 +81,9 @@ class BaseImageManager(ABC):
         """
         Initializes a BaseImageManager instance.
 
+        The image file is only opened when it is needed, and its pixels are only
+        decoded when some transformations are computed.
+
         Args:
             image (ProcessingImage): The path of the image to be processed.
             transformer (BaseImageTransformer | None, optional): The transformer
@@ -33,14 +94,112 @@ class BaseImageManager(ABC):
                 to apply transformations to the image.
             _transformations_applied (list[InternalImageTransformationResult]): The list
                 of transformations that have been applied to the image.
-            _opened_image (PIL.Image.Image): The opened image that has been processed
-                by the transformers.
+            _source (PIL.Image.Image | None): The opened source image, None until
+                it is needed.
+            _metadata (ImageSourceMetadata | None): The metadata of the source
+                image, None until it is opened.
         """
         self.image = image
         self.transformer = transformer
-        self._opened_image: PImage.Image = self._get_image()
+        self._source: PImage.Image | None = None
+        self._metadata: ImageSourceMetadata | None = None
+
+    @cached_property
+    def _opened_image(self) -> PImage.Image:
+        """
+        The image processed by the transformers, decoded at a reduced resolution
+        when the transformer allows it.
 
-    def apply_transformations(self) -> list[InternalImageTransformationResult]:
+        With the source cache enabled, the image is decoded once per worker
+        process and reused by the next managers of the same source content that
+        need at most its resolution.
+        """
+        cache = get_source_cache()
+        key = self.get_source_key() if cache is not None else None
+        if cache is None or key is None:
+            return self._reduce_image(self._open_source())
+
+        entry = cache.get(key, validate=self._covers)
+        logger.debug(
+            f"Source cache: {'hit' if entry else 'miss'} for {key}, "
+            f"{cache.stats.hit_rate:.0%} hit rate, {cache.bytes} bytes held"
+        )
+        if entry is not None:
+            self._metadata = entry.metadata
+            if self._source is not None:
+                # Only its header was read
+                self._source.close()
+            if entry.image.size != entry.metadata.size:
+                # Already decoded at a reduced resolution that covers the transformer
+                return entry.image
+            return self._reduce_image(entry.image)
+        image = self._reduce_image(self._open_source())
+        image.load()
+        assert self._metadata is not None
+        cache.set(key, SourceCacheEntry(image=image, metadata=self._metadata))
+        return image
+
+    def _covers(self, entry: SourceCacheEntry) -> bool:
+        """
+        Whether a cached image has the resolution the transformer needs.
+        """
+        required_size = (
+            self.transformer.required_input_size(entry.metadata.size)
+            if self.transformer is not None
+            else None
+        )
+        if required_size is None:
+            return entry.image.size == entry.metadata.size
+        return (
+            entry.image.width >= required_size[0]
+            and entry.image.height >= required_size[1]
+        )
+
+    def _open_source(self) -> PImage.Image:
+        """
+        Opens the source image once, reading its header only.
+        """
+        if self._source is None:
+            self._source = self._get_image()
+            self._metadata = ImageSourceMetadata(
+                size=self._source.size,
+                mode=self._source.mode,
+                format=self._source.format,
+            )
+        return self._source
+
+    def get_metadata(self) -> ImageSourceMetadata:
+        """
+        Returns the size, mode and format of the source image, read from its
+        header so no pixel is decoded, e.g. to plan the transformations.
+
+        Returns:
+            ImageSourceMetadata: The metadata of the source image.
+        """
+        if self._metadata is None:
+            self._open_source()
+        assert self._metadata is not None
+        return self._metadata
+
+    def start_transformations(self) -> TransformationRun:
+        """
+        Starts applying the transformations of the transformer to the image, the
+        results are saved by `apply_transformations`.
+
+        The image is only opened and decoded when some results are not cached.
+
+        Returns:
+            TransformationRun: The started transformations.
+        """
+        if not self.transformer:
+            raise NotImplementedError("No transformer set")
+
+        source_hash = self.get_source_hash() if get_result_cache() is not None else None
+        return self.transformer.start(self.get_image, source_hash)
+
+    def apply_transformations(
+        self, run: TransformationRun | None = None
+    ) -> list[InternalImageTransformationResult]:
         """
         Applies transformations to the image.
 
@@ -48,6 +207,8 @@ class BaseImageManager(ABC):
         returns a list of InternalImageTransformationResult with the transformed images.
 
         Args:
+            run (TransformationRun | None, optional): The transformations already
+                started with `start_transformations`. Defaults to None.
 
         Returns:
             list[InternalImageTransformationResult]: A list of InternalImageTransformationResult
@@ -62,12 +223,43 @@ class BaseImageManager(ABC):
         transformation_batch.full_clean()
         transformation_batch.save()
 
-        transformations = self.transformer.transform(
-            image=self._opened_image, transformation_batch=transformation_batch
+        if run is None:
+            run = self.start_transformations()
+        transformations = self.transformer.finish(
+            run=run, transformation_batch=transformation_batch
         )
+        if self._source is not None and "_opened_image" not in self.__dict__:
+            # Every result was cached, the file was only opened to read its header
+            self._source.close()
+            self._source = None
 
         return transformations
 
+    def get_source_key(self) -> str | None:
+        """
+        Returns the key of the source content in the decoded source cache, made
+        of the image id and the modification time of its file.
+
+        Returns:
+            str | None: The key, None if the storage has no modification times.
+        """
+        storage = self.image.file.storage
+        try:
+            modified_time = storage.get_modified_time(self.image.file.name)
+        except (NotImplementedError, OSError):
+            return None
+        return f"{self.image.id}:{modified_time.timestamp()}"
+
+    def get_source_hash(self) -> str:
+        """
+        Returns the SHA-256 hash of the source image file content.
+
+        Returns:
+            str: The hexadecimal hash.
+        """
+        with self.image.file.open("rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+
     def get_image(self) -> PImage.Image:
         """
         Returns the opened original image.
@@ -77,10 +269,32 @@ class BaseImageManager(ABC):
         """
         return self._opened_image
 
+    def _reduce_image(self, image: PImage.Image) -> PImage.Image:
+        """
+        Reduces the opened image to the smallest resolution the transformer needs,
+        e.g. when every output is a thumbnail.
+
+        Args:
+            image (PImage.Image): The opened image.
+
+        Returns:
+            PImage.Image: The image to transform.
+        """
+        if self.transformer is None:
+            return image
+        required_size = self.transformer.required_input_size(image.size)
+        if required_size is None:
+            return image
+        return image_reduce(image, required_size)
+
     @abstractmethod
     def _get_image(self) -> PImage.Image:
         """
-        Opens the image file and returns the opened image.
+        Opens the image file and returns the opened image, without decoding it.
+
+        Managers of files on a local filesystem open them by path, so Pillow
+        memory-maps uncompressed images whose layout matches their mode (e.g.
+        grayscale PPM or BMP, and uncompressed TIFF) instead of reading them.
 
         Returns:
             PImage.Image: The opened image.
@@ -5,5 +5,6 @@ from .base import BaseImageManager
 
 class ImageLocalManager(BaseImageManager):
     def _get_image(self) -> PImage.Image:
+        # Opened by path rather than from a file object, so it can be memory-mapped
         image_path = self.image.file.path
         return PImage.open(image_path)
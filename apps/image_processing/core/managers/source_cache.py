@@ -0,0 +1,169 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+from django.conf import settings
+from PIL import Image as PImage
+
+if TYPE_CHECKING:
+    from apps.image_processing.core.managers.base import ImageSourceMetadata
+
+
+def image_nbytes(image: PImage.Image) -> int:
+    """
+    Estimates the memory held by a decoded image.
+
+    Pillow stores the pixels of multiband and 32-bit modes on 4 bytes, and the
+    pixels of the other single band modes on 1 byte.
+
+    Args:
+        image (PImage.Image): The decoded image.
+
+    Returns:
+        int: The estimated size of the pixels, in bytes.
+    """
+    pixel_size = 4 if len(image.getbands()) > 1 or image.mode in ("I", "F") else 1
+    return image.width * image.height * pixel_size
+
+
+@dataclass(frozen=True)
+class SourceCacheEntry:
+    """
+    A decoded source image.
+
+    Attributes:
+        image (PImage.Image): The decoded image, possibly at a reduced resolution.
+        metadata (ImageSourceMetadata): The metadata of the source file.
+    """
+
+    image: PImage.Image
+    metadata: "ImageSourceMetadata"
+
+
+@dataclass
+class SourceCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SourceImageCache:
+    """
+    Keeps the decoded source images of the current process, so several requests
+    on the same image within a worker decode it once, evicting the least recently
+    used images beyond `max_bytes`.
+
+    Keys identify the source content, e.g. the image id and the modification time
+    of its file, so a replaced file is decoded again. The cached images are shared
+    and must not be modified.
+
+    Attributes:
+        max_bytes (int): The max estimated size of the images kept, in bytes.
+        stats (SourceCacheStats): The hit, miss and eviction counters.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.stats = SourceCacheStats()
+        self._entries: OrderedDict[str, tuple[SourceCacheEntry, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes(self) -> int:
+        """The estimated size of the images kept, in bytes."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        key: str,
+        validate: Callable[[SourceCacheEntry], bool] | None = None,
+    ) -> SourceCacheEntry | None:
+        """
+        Returns the entry of a key and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+            validate (Callable[[SourceCacheEntry], bool] | None, optional): Checks
+                the entry is usable, e.g. its resolution is high enough. Unusable
+                entries are kept, they count as misses. Defaults to None.
+
+        Returns:
+            SourceCacheEntry | None: The entry, None on a miss.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            entry = item[0] if item is not None else None
+            if entry is not None and validate is not None and not validate(entry):
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+        return entry
+
+    def set(self, key: str, entry: SourceCacheEntry) -> None:
+        """
+        Stores the entry of a key, evicting the least recently used entries if the
+        cache is full. Images larger than the whole cache are not kept.
+
+        Args:
+            key (str): The cache key.
+            entry (SourceCacheEntry): The entry, its image is decoded.
+        """
+        nbytes = image_nbytes(entry.image)
+        with self._lock:
+            self._pop(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (entry, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
+
+
+_source_cache: SourceImageCache | None = None
+_source_cache_lock = threading.Lock()
+
+
+def get_source_cache() -> SourceImageCache | None:
+    """
+    Returns the decoded source cache of the current process, creating it from the
+    `IMAGE_PROCESSING` settings on first use.
+
+    Returns:
+        SourceImageCache | None: The source cache, None when it is disabled.
+    """
+    global _source_cache
+    if settings.IMAGE_PROCESSING["SOURCE_CACHE_MAX_BYTES"] <= 0:
+        return None
+    with _source_cache_lock:
+        if _source_cache is None:
+            _source_cache = SourceImageCache(
+                max_bytes=settings.IMAGE_PROCESSING["SOURCE_CACHE_MAX_BYTES"]
+            )
+        return _source_cache
@@ -0,0 +1,37 @@
+import weakref
+
+from django.core.files.storage import Storage
+from PIL import Image as PImage
+
+from .base import BaseImageManager
+
+
+def storage_has_paths(storage: Storage) -> bool:
+    """
+    Whether the files of a storage are on the local filesystem.
+    """
+    try:
+        storage.path("")
+    except NotImplementedError:
+        return False
+    return True
+
+
+class ImageStorageManager(BaseImageManager):
+    """
+    Reads the image through the storage of its file, e.g. `default_storage`, so
+    the file does not need to be on the local disk of the node transforming it.
+
+    The image is opened from the file object of the storage: its header is read
+    on open and its pixels are decoded block by block as they are read, so storages
+    whose file objects read lazily only fetch the ranges Pillow reads. The results
+    are saved through the storage of `ProcessedImage.file`, `default_storage` too.
+    """
+
+    def _get_image(self) -> PImage.Image:
+        file = self.image.file.storage.open(self.image.file.name, "rb")
+        image = PImage.open(file)
+        # Pillow does not close the file objects it is given, the file is only
+        # read while the image is decoded
+        weakref.finalize(image, file.close)
+        return image
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image as PImage
+
+# Modes the array backend reads, mapped to their number of color bands. The
+# remaining bands, if any, are the alpha band.
+ARRAY_MODES = {"L": 1, "LA": 1, "RGB": 3, "RGBA": 3}
+# Pillow RGB to L weights, scaled by 2**16
+GRAYSCALE_WEIGHTS = (19595, 38470, 7471)
+IDENTITY_TABLE = tuple(range(256))
+
+
+@dataclass(frozen=True)
+class LookupOperation:
+    """
+    Maps every value of the color bands through a table, alpha is left untouched.
+
+    Attributes:
+        table (tuple[int, ...]): The 256 output values, one per input value.
+    """
+
+    table: tuple[int, ...]
+
+    def then(self, other: "LookupOperation") -> "LookupOperation":
+        """
+        Fuses this lookup with the one applied to its output.
+        """
+        return LookupOperation(table=tuple(other.table[value] for value in self.table))
+
+
+@dataclass(frozen=True)
+class GrayscaleOperation:
+    """
+    Converts the color bands to a single luminance band, as Pillow converts RGB
+    images to L.
+    """
+
+
+ArrayOperation = LookupOperation | GrayscaleOperation
+
+
+def supports_array_operations(image: PImage.Image) -> bool:
+    """
+    Whether the array backend can transform an image of this mode.
+    """
+    return image.mode in ARRAY_MODES
+
+
+def fuse_array_operations(
+    operations: list[ArrayOperation],
+) -> tuple[LookupOperation, bool, LookupOperation]:
+    """
+    Reduces a sequence of point operations to a lookup, an optional grayscale
+    conversion and a second lookup.
+
+    Consecutive lookups are fused in a single table, a lookup before the grayscale
+    conversion is applied while converting, and converting twice is the same as
+    converting once.
+
+    Args:
+        operations (list[ArrayOperation]): The operations, in the order they are
+            applied.
+
+    Returns:
+        tuple[LookupOperation, bool, LookupOperation]: The lookup applied to the
+        input, whether the result is converted to grayscale, and the lookup
+        applied to the converted result.
+    """
+    before = after = LookupOperation(IDENTITY_TABLE)
+    grayscale = False
+    for operation in operations:
+        if isinstance(operation, GrayscaleOperation):
+            grayscale = True
+        elif grayscale:
+            after = after.then(operation)
+        else:
+            before = before.then(operation)
+    return before, grayscale, after
+
+
+def apply_array_operations(
+    image: PImage.Image, operations: list[ArrayOperation]
+) -> PImage.Image:
+    """
+    Applies a sequence of point operations to an image in a single vectorized pass.
+
+    The operations are fused with `fuse_array_operations` and written to an
+    output buffer allocated once, no intermediate image is created.
+
+    Args:
+        image (PImage.Image): The image to transform, in one of `ARRAY_MODES`.
+        operations (list[ArrayOperation]): The operations, in the order they are
+            applied.
+
+    Returns:
+        PImage.Image: The transformed image.
+
+    Raises:
+        ValueError: If the image mode is not supported.
+    """
+    if not supports_array_operations(image):
+        raise ValueError(f"Mode '{image.mode}' is not supported by the array backend")
+    before, grayscale, after = fuse_array_operations(operations)
+    array = np.asarray(image)
+    if array.ndim == 2:
+        array = array[:, :, np.newaxis]
+    height, width, bands = array.shape
+    color_bands = ARRAY_MODES[image.mode]
+    color = array[:, :, :color_bands]
+
+    if grayscale:
+        # Like Pillow, converting to L drops the alpha band
+        output = np.empty((height, width), dtype=np.uint8)
+        if color_bands == 1:
+            fused = before.then(after)
+            np.take(np.asarray(fused.table, dtype=np.uint8), color[:, :, 0], out=output)
+        else:
+            # The input lookup is folded into the weighted table of each band
+            table = np.asarray(before.table, dtype=np.uint32)
+            luminance = np.empty((height, width), dtype=np.uint32)
+            weighted = np.empty((height, width), dtype=np.uint32)
+            for band, weight in enumerate(GRAYSCALE_WEIGHTS):
+                target = luminance if band == 0 else weighted
+                np.take(table * weight, color[:, :, band], out=target)
+                if band:
+                    luminance += weighted
+            luminance += 0x8000
+            luminance >>= 16
+            np.take(np.asarray(after.table, dtype=np.uint8), luminance, out=output)
+    else:
+        output = np.empty((height, width, bands), dtype=np.uint8)
+        fused = before.then(after)
+        np.take(
+            np.asarray(fused.table, dtype=np.uint8),
+            color,
+            out=output[:, :, :color_bands],
+        )
+        output[:, :, color_bands:] = array[:, :, color_bands:]
+        if bands == 1:
+            output = output[:, :, 0]
+    # The mode follows from the number of bands
+    return PImage.fromarray(output)
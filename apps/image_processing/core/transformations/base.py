@@ -1,9 +1,16 @@
 from abc import ABC, abstractmethod
+from collections import Counter
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar, Iterator, Type
 
 from PIL import Image as PImage
 
+from apps.image_processing.core.transformations.array import (
+    ArrayOperation,
+    apply_array_operations,
+    supports_array_operations,
+)
+
 
 @dataclass
 class InternalImageTransformationFilters(ABC): ...
@@ -21,6 +28,9 @@ class InternalImageTransformation(ABC):
     Abstract class that applies Subclass transformation at subclass
     instantiation to the image provided with the filters provided
 
+    Point transformations that select the array backend with their filters are
+    applied with `array_operation` instead of `_image_transform`.
+
     The transformed image is stored as an instance variable and can
     be accessed with the `image_transformed` attribute.
 
@@ -32,16 +42,167 @@ class InternalImageTransformation(ABC):
     """
 
     name: str
+    # Relative cost of processing one band of one input pixel, used to compare
+    # the cost of different orderings of the same transformations. Measured on a
+    # 12 MP image relative to a thumbnail.
+    cost_per_pixel: ClassVar[float] = 1.0
+    # Transformations that can be swapped with this one in a chain, mapped to the
+    # max absolute per-pixel difference the swap can introduce in the output.
+    commutes_with: ClassVar[dict[str, int]] = {}
 
     def __init__(
         self,
         image: PImage.Image,
         filters: ExternalTransformationFilters,
     ) -> None:
+        operation = self.array_operation(filters)
+        if operation is not None and supports_array_operations(image):
+            self.image_transformed = apply_array_operations(image, [operation])
+            return
         self.image_transformed = self._image_transform(
             image=image, filters=filters.to_internal()
         )
 
+    @classmethod
+    def transform_many(
+        cls,
+        image: PImage.Image,
+        filters: list[Any],  # Each subclass will have its own filters
+    ) -> list[PImage.Image]:
+        """
+        Applies the transformation to the same image once per filters.
+
+        Transformations that can share work between their outputs override it,
+        by default each output is computed on its own.
+
+        Args:
+            image (PImage.Image): The image to transform.
+            filters (list[ExternalTransformationFilters]): The filters of each output.
+
+        Returns:
+            list[PImage.Image]: The transformed images, in the order of `filters`.
+        """
+        return [
+            cls(image, output_filters).image_transformed for output_filters in filters
+        ]
+
+    @classmethod
+    def node(
+        cls, parent: "ImageNode", filters: ExternalTransformationFilters
+    ) -> "ImageTransformationNode":
+        """
+        Builds a lazy node that applies this transformation to the output of
+        `parent` when the graph is evaluated.
+
+        Args:
+            parent (ImageNode): The node whose output is transformed.
+            filters (ExternalTransformationFilters): The filters of the transformation.
+
+        Returns:
+            ImageTransformationNode: The new node.
+        """
+        return ImageTransformationNode(
+            parent=parent, transformation=cls, filters=filters
+        )
+
+    @classmethod
+    def estimate_output(
+        cls,
+        size: tuple[int, int],
+        bands: int,
+        filters: Any,  # Each subclass will have its own filters
+    ) -> tuple[tuple[int, int], int]:
+        """
+        Estimates the size and number of bands of the transformed image without
+        computing it.
+
+        Args:
+            size (tuple[int, int]): The size of the input image.
+            bands (int): The number of bands of the input image.
+            filters (ExternalTransformationFilters): The filters of the transformation.
+
+        Returns:
+            tuple[tuple[int, int], int]: The estimated output size and bands.
+        """
+        return size, bands
+
+    @classmethod
+    def required_input_size(
+        cls,
+        size: tuple[int, int],
+        filters: Any,  # Each subclass will have its own filters
+    ) -> tuple[int, int] | None:
+        """
+        The smallest input size the transformation needs to produce its output,
+        so sources can be decoded at a reduced resolution.
+
+        Args:
+            size (tuple[int, int]): The size of the input image.
+            filters (ExternalTransformationFilters): The filters of the transformation.
+
+        Returns:
+            tuple[int, int] | None: The min input size, None if the transformation
+            needs the full resolution.
+        """
+        return None
+
+    @classmethod
+    def tile_halo(
+        cls,
+        filters: Any,  # Each subclass will have its own filters
+    ) -> int | None:
+        """
+        The rows of context around a tile the transformation needs for its output
+        pixels to match the ones of the whole image, so large images can be
+        processed by tiles.
+
+        Args:
+            filters (ExternalTransformationFilters): The filters of the transformation.
+
+        Returns:
+            int | None: The rows of context, None if the transformation is not
+            tile-local.
+        """
+        return None
+
+    @classmethod
+    def array_operation(
+        cls,
+        filters: Any,  # Each subclass will have its own filters
+    ) -> ArrayOperation | None:
+        """
+        The point operation that applies the transformation with the array
+        backend, so consecutive point transformations are fused in a single pass.
+
+        Args:
+            filters (ExternalTransformationFilters): The filters of the transformation.
+
+        Returns:
+            ArrayOperation | None: The point operation, None if the transformation
+            is not a point operation or its filters select the Pillow backend.
+        """
+        return None
+
+    @classmethod
+    def estimate_cost(
+        cls,
+        size: tuple[int, int],
+        bands: int,
+        filters: Any,  # Each subclass will have its own filters
+    ) -> float:
+        """
+        Estimates the relative cost of the transformation without computing it.
+
+        Args:
+            size (tuple[int, int]): The size of the input image.
+            bands (int): The number of bands of the input image.
+            filters (ExternalTransformationFilters): The filters of the transformation.
+
+        Returns:
+            float: The relative cost, in `cost_per_pixel` units.
+        """
+        return cls.cost_per_pixel * size[0] * size[1] * bands
+
     @abstractmethod
     def _image_transform(
         self,
@@ -64,3 +225,205 @@ class InternalImageTransformation(ABC):
         Returns:
             PImage.Image: A new PIL image with the applied filters.
         """
+
+
+class ImageNode(ABC):
+    """
+    A lazy image in a graph of transformations.
+
+    Building nodes does not touch any pixel, so a graph can be inspected, costed
+    or rearranged before it is evaluated.
+    """
+
+    @property
+    @abstractmethod
+    def source(self) -> "ImageSourceNode":
+        """The source node at the root of the graph."""
+
+    @abstractmethod
+    def path(self) -> list["ImageTransformationNode"]:
+        """
+        The transformation nodes from the source down to this node, in the order
+        they are applied.
+        """
+
+    @abstractmethod
+    def estimate_output(self) -> tuple[tuple[int, int], int]:
+        """
+        Estimates the size and number of bands of the node output without
+        computing it.
+        """
+
+    def then(
+        self,
+        transformation: Type[InternalImageTransformation],
+        filters: ExternalTransformationFilters,
+    ) -> "ImageTransformationNode":
+        """
+        Builds a node that applies a transformation to the output of this node.
+        """
+        return transformation.node(self, filters)
+
+    def estimate_cost(self) -> float:
+        """
+        Estimates the relative cost of evaluating the node, from its source.
+        """
+        cost = 0.0
+        for node in self.path():
+            size, bands = node.parent.estimate_output()
+            cost += node.transformation.estimate_cost(size, bands, node.filters)
+        return cost
+
+    def stream(
+        self, fuse: bool = False
+    ) -> Iterator[tuple["ImageTransformationNode", PImage.Image]]:
+        """
+        Evaluates the transformation nodes from the source down to this node,
+        yielding the output of each one as soon as it is computed.
+
+        Args:
+            fuse (bool, optional): Whether consecutive nodes with an array
+                operation are applied in a single pass. Only the last node of each
+                fused run is yielded. Defaults to False.
+        """
+        image = self.source.image
+        path = self.path()
+        index = 0
+        while index < len(path):
+            run: list[ArrayOperation] = []
+            while fuse and index + len(run) < len(path):
+                node = path[index + len(run)]
+                operation = node.transformation.array_operation(node.filters)
+                if operation is None:
+                    break
+                run.append(operation)
+            if len(run) > 1 and supports_array_operations(image):
+                index += len(run)
+                image = apply_array_operations(image, run)
+                yield path[index - 1], image
+                continue
+            node = path[index]
+            index += 1
+            image = node.transformation(image, node.filters).image_transformed
+            yield node, image
+
+    def evaluate(self) -> PImage.Image:
+        """
+        Computes the output of the node.
+        """
+        return evaluate_nodes([self])[0]
+
+
+@dataclass(eq=False)
+class ImageSourceNode(ImageNode):
+    """
+    The root of a graph of transformations, holding the decoded source image.
+    """
+
+    image: PImage.Image
+
+    @property
+    def source(self) -> "ImageSourceNode":
+        return self
+
+    def path(self) -> list["ImageTransformationNode"]:
+        return []
+
+    def estimate_output(self) -> tuple[tuple[int, int], int]:
+        return self.image.size, len(self.image.getbands())
+
+
+@dataclass(eq=False)
+class ImageTransformationNode(ImageNode):
+    """
+    A transformation applied to the output of its parent node.
+
+    Attributes:
+        parent (ImageNode): The node whose output is transformed.
+        transformation (Type[InternalImageTransformation]): The transformation.
+        filters (ExternalTransformationFilters): The filters of the transformation.
+    """
+
+    parent: ImageNode
+    transformation: Type[InternalImageTransformation]
+    filters: ExternalTransformationFilters
+
+    @property
+    def source(self) -> ImageSourceNode:
+        return self.parent.source
+
+    def path(self) -> list["ImageTransformationNode"]:
+        nodes = [self]
+        node = self.parent
+        while isinstance(node, ImageTransformationNode):
+            nodes.append(node)
+            node = node.parent
+        return nodes[::-1]
+
+    def estimate_output(self) -> tuple[tuple[int, int], int]:
+        size, bands = self.parent.estimate_output()
+        return self.transformation.estimate_output(size, bands, self.filters)
+
+
+def stream_nodes(nodes: list[ImageNode]) -> Iterator[tuple[int, PImage.Image]]:
+    """
+    Computes the output of several nodes of a graph, yielding the position and
+    output of each one as soon as it is computed.
+
+    Every node shared by the requested nodes is computed once, and its output is
+    released as soon as no pending node needs it. The nodes are computed path by
+    path in the requested order.
+
+    Args:
+        nodes (list[ImageNode]): The nodes to compute.
+
+    Returns:
+        Iterator[tuple[int, PImage.Image]]: The position in `nodes` and the output
+        of each requested node.
+    """
+    order: dict[ImageTransformationNode, None] = {}
+    for node in nodes:
+        order.update(dict.fromkeys(node.path()))
+    positions: dict[ImageNode, list[int]] = {}
+    for position, node in enumerate(nodes):
+        positions.setdefault(node, []).append(position)
+    # Pending consumers of the output of each node
+    consumers: Counter[ImageNode] = Counter(nodes)
+    consumers.update(node.parent for node in order)
+
+    images: dict[ImageNode, PImage.Image] = {
+        node.source: node.source.image for node in nodes
+    }
+    for source in list(images):
+        for position in positions.get(source, []):
+            consumers[source] -= 1
+            yield position, images[source]
+    for node in order:
+        images[node] = node.transformation(
+            images[node.parent], node.filters
+        ).image_transformed
+        consumers[node.parent] -= 1
+        if not consumers[node.parent]:
+            del images[node.parent]
+        for position in positions.get(node, []):
+            consumers[node] -= 1
+            yield position, images[node]
+        if not consumers[node]:
+            del images[node]
+
+
+def evaluate_nodes(nodes: list[ImageNode]) -> list[PImage.Image]:
+    """
+    Computes the output of several nodes of a graph.
+
+    Every node shared by the requested nodes is computed once, and its output is
+    released as soon as no pending node needs it.
+
+    Args:
+        nodes (list[ImageNode]): The nodes to compute.
+
+    Returns:
+        list[PImage.Image]: The output of each node, in the same order.
+    """
+    images = dict(stream_nodes(nodes))
+    return [images[position] for position in range(len(nodes))]
@@ -3,9 +3,13 @@ from typing import Literal
 
 from PIL import Image as PImage
 
-from apps.image_processing.constants import TRANSFORMATION_FILTER_DITHER
+from apps.image_processing.constants import (
+    TRANSFORMATION_BACKEND,
+    TRANSFORMATION_FILTER_DITHER,
+)
 from apps.image_processing.models import ImageTransformation
 
+from .array import ArrayOperation, GrayscaleOperation
 from .base import (
     ExternalTransformationFilters,
     InternalImageTransformation,
@@ -24,6 +28,7 @@ class ExternalTransformationFiltersBlackAndWhite(ExternalTransformationFilters):
     dither: TRANSFORMATION_FILTER_DITHER | None = (
         TRANSFORMATION_FILTER_DITHER.FLOYDSTEINBERG
     )
+    backend: TRANSFORMATION_BACKEND = TRANSFORMATION_BACKEND.PILLOW
 
     def to_internal(self) -> InternalTransformationFiltersBlackAndWhite:
         _dither = PImage.Dither[self.dither.name] if self.dither else None
@@ -32,6 +37,34 @@ class ExternalTransformationFiltersBlackAndWhite(ExternalTransformationFilters):
 
 class TransformationBlackAndWhite(InternalImageTransformation):
     name = ImageTransformation.BLACK_AND_WHITE
+    cost_per_pixel = 0.6
+    commutes_with = {
+        ImageTransformation.BLUR: 2,
+        ImageTransformation.THUMBNAIL: 2,
+    }
+
+    @classmethod
+    def estimate_output(
+        cls,
+        size: tuple[int, int],
+        bands: int,
+        filters: ExternalTransformationFiltersBlackAndWhite,
+    ) -> tuple[tuple[int, int], int]:
+        return size, 1
+
+    @classmethod
+    def tile_halo(cls, filters: ExternalTransformationFiltersBlackAndWhite) -> int:
+        # Converting to grayscale only reads the pixel itself, the dither only
+        # applies to bilevel images
+        return 0
+
+    @classmethod
+    def array_operation(
+        cls, filters: ExternalTransformationFiltersBlackAndWhite
+    ) -> ArrayOperation | None:
+        if filters.backend != TRANSFORMATION_BACKEND.NUMPY:
+            return None
+        return GrayscaleOperation()
 
     def _image_transform(
         self, image: PImage.Image, filters: InternalTransformationFiltersBlackAndWhite
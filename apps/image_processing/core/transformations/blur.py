@@ -1,3 +1,4 @@
+import math
 from dataclasses import dataclass
 from typing import Sequence
 
@@ -40,6 +41,45 @@ class ExternalTransformationFiltersBlur(ExternalTransformationFilters):
 
 class TransformationBlur(InternalImageTransformation):
     name = ImageTransformation.BLUR
+    cost_per_pixel = 35.0
+    # Swapped with a grayscale conversion, box blurs differ by 1 and gaussian
+    # blurs by up to 2
+    commutes_with = {ImageTransformation.BLACK_AND_WHITE: 2}
+    # Cost of each filter relative to the default one. Pillow computes box and
+    # gaussian blurs with running sums, their cost does not depend on the radius.
+    filter_cost_factors = {
+        TRANSFORMATION_FILTER_BLUR_FILTER.BLUR: 1.0,
+        TRANSFORMATION_FILTER_BLUR_FILTER.BOX_BLUR: 0.4,
+        TRANSFORMATION_FILTER_BLUR_FILTER.GAUSSIAN_BLUR: 0.85,
+    }
+
+    @classmethod
+    def estimate_cost(
+        cls,
+        size: tuple[int, int],
+        bands: int,
+        filters: ExternalTransformationFiltersBlur,
+    ) -> float:
+        return (
+            super().estimate_cost(size, bands, filters)
+            * (cls.filter_cost_factors[filters.filter])
+        )
+
+    @classmethod
+    def tile_halo(cls, filters: ExternalTransformationFiltersBlur) -> int:
+        if filters.filter == TRANSFORMATION_FILTER_BLUR_FILTER.BLUR:
+            # 5x5 kernel
+            return 2
+        radius = (
+            filters.radius
+            if isinstance(filters.radius, (int, float))
+            else max(filters.radius)
+        )
+        if filters.filter == TRANSFORMATION_FILTER_BLUR_FILTER.BOX_BLUR:
+            return math.ceil(radius)
+        # Pillow approximates the gaussian with three box blurs of this radius
+        box_radius = math.sqrt(4 * radius**2 + 1) / 2 - 0.5
+        return 3 * math.ceil(box_radius)
 
     def _image_transform(
         self, image: PImage.Image, filters: InternalTransformationFiltersBlur
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+from apps.image_processing.models import ImageTransformation
+
+from .lookup import (
+    ExternalTransformationFiltersLookup,
+    InternalImageLookupTransformation,
+)
+
+
+@dataclass
+class ExternalTransformationFiltersBrightness(ExternalTransformationFiltersLookup):
+    factor: float = 1.0
+
+    def table(self) -> tuple[int, ...]:
+        return tuple(
+            min(max(round(value * self.factor), 0), 255) for value in range(256)
+        )
+
+
+class TransformationBrightness(InternalImageLookupTransformation):
+    name = ImageTransformation.BRIGHTNESS
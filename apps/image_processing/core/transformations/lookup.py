@@ -0,0 +1,72 @@
+from abc import abstractmethod
+from dataclasses import dataclass
+
+from PIL import Image as PImage
+
+from apps.image_processing.constants import TRANSFORMATION_BACKEND
+
+from .array import (
+    ARRAY_MODES,
+    IDENTITY_TABLE,
+    ArrayOperation,
+    LookupOperation,
+)
+from .base import (
+    ExternalTransformationFilters,
+    InternalImageTransformation,
+    InternalImageTransformationFilters,
+)
+
+
+@dataclass
+class InternalTransformationFiltersLookup(InternalImageTransformationFilters):
+    table: tuple[int, ...]
+
+
+@dataclass
+class ExternalTransformationFiltersLookup(ExternalTransformationFilters):
+    backend: TRANSFORMATION_BACKEND = TRANSFORMATION_BACKEND.PILLOW
+
+    def to_internal(self) -> InternalTransformationFiltersLookup:
+        return InternalTransformationFiltersLookup(table=self.table())
+
+    @abstractmethod
+    def table(self) -> tuple[int, ...]:
+        """
+        The 256 output values of the color bands, one per input value.
+        """
+
+
+class InternalImageLookupTransformation(InternalImageTransformation):
+    """
+    A point transformation that maps every value of the color bands through a
+    table, alpha is left untouched.
+
+    Subclasses only define the table in their filters, the same table is applied
+    by Pillow or by the array backend.
+    """
+
+    cost_per_pixel = 0.3
+
+    @classmethod
+    def tile_halo(cls, filters: ExternalTransformationFiltersLookup) -> int:
+        return 0
+
+    @classmethod
+    def array_operation(
+        cls, filters: ExternalTransformationFiltersLookup
+    ) -> ArrayOperation | None:
+        if filters.backend != TRANSFORMATION_BACKEND.NUMPY:
+            return None
+        return LookupOperation(table=filters.table())
+
+    def _image_transform(
+        self, image: PImage.Image, filters: InternalTransformationFiltersLookup
+    ) -> PImage.Image:
+        if image.mode not in ARRAY_MODES:
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        color_bands = ARRAY_MODES[image.mode]
+        alpha_bands = len(image.getbands()) - color_bands
+        return image.point(
+            list(filters.table) * color_bands + list(IDENTITY_TABLE) * alpha_bands
+        )
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+from apps.image_processing.models import ImageTransformation
+
+from .lookup import (
+    ExternalTransformationFiltersLookup,
+    InternalImageLookupTransformation,
+)
+
+
+@dataclass
+class ExternalTransformationFiltersThreshold(ExternalTransformationFiltersLookup):
+    threshold: int = 128
+
+    def table(self) -> tuple[int, ...]:
+        return tuple(255 if value >= self.threshold else 0 for value in range(256))
+
+
+class TransformationThreshold(InternalImageLookupTransformation):
+    name = ImageTransformation.THRESHOLD
@@ -1,8 +1,13 @@
+import math
 from dataclasses import dataclass
+from typing import Callable
 
 from PIL import Image as PImage
 
-from apps.image_processing.constants import TRANSFORMATION_FILTER_THUMBNAIL_RESAMPLING
+from apps.image_processing.constants import (
+    TRANSFORMATION_FILTER_THUMBNAIL_RESAMPLING,
+    TRANSFORMATIONS_MIN_REDUCING_GAP,
+)
 from apps.image_processing.models import ImageTransformation
 
 from .base import (
@@ -35,8 +40,125 @@ class ExternalTransformationFiltersThumbnail(ExternalTransformationFilters):
         )
 
 
+def thumbnail_size(
+    size: tuple[int, int], box: tuple[float, float]
+) -> tuple[int, int] | None:
+    """
+    The size of the thumbnail of an image, rounded as `PIL.Image.Image.thumbnail`
+    rounds it.
+
+    Args:
+        size (tuple[int, int]): The size of the image.
+        box (tuple[float, float]): The box the thumbnail fits in.
+
+    Returns:
+        tuple[int, int] | None: The thumbnail size, None if the image already
+        fits in the box.
+    """
+    width, height = size
+    x, y = math.floor(box[0]), math.floor(box[1])
+    if x >= width and y >= height:
+        return None
+
+    def round_aspect(number: float, key: Callable[[int], float]) -> int:
+        return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+    aspect = width / height
+    if x / y >= aspect:
+        x = round_aspect(y * aspect, key=lambda n: abs(aspect - n / y))
+    else:
+        y = round_aspect(x / aspect, key=lambda n: 0 if n == 0 else abs(aspect - x / n))
+    return x, y
+
+
 class TransformationThumbnail(InternalImageTransformation):
     name = ImageTransformation.THUMBNAIL
+    cost_per_pixel = 1.0
+    commutes_with = {ImageTransformation.BLACK_AND_WHITE: 2}
+
+    @classmethod
+    def estimate_output(
+        cls,
+        size: tuple[int, int],
+        bands: int,
+        filters: ExternalTransformationFiltersThumbnail,
+    ) -> tuple[tuple[int, int], int]:
+        width, height = size
+        ratio = min(filters.size[0] / width, filters.size[1] / height)
+        if ratio >= 1:
+            return size, bands
+        return (
+            max(math.floor(width * ratio), 1),
+            max(math.floor(height * ratio), 1),
+        ), bands
+
+    @classmethod
+    def required_input_size(
+        cls,
+        size: tuple[int, int],
+        filters: ExternalTransformationFiltersThumbnail,
+    ) -> tuple[int, int] | None:
+        # Pillow also reduces by `reducing_gap` before resampling, keep that margin
+        reducing_gap = filters.reducing_gap or TRANSFORMATIONS_MIN_REDUCING_GAP
+        return (
+            math.ceil(filters.size[0] * reducing_gap),
+            math.ceil(filters.size[1] * reducing_gap),
+        )
+
+    @classmethod
+    def transform_many(
+        cls,
+        image: PImage.Image,
+        filters: list[ExternalTransformationFiltersThumbnail],
+    ) -> list[PImage.Image]:
+        """
+        Renders several thumbnails from a resolution pyramid built once.
+
+        Each level halves the previous one with `reduce`, and each thumbnail is
+        resampled from the smallest level that keeps `reducing_gap` times its size,
+        instead of reducing the full resolution image again. Outputs keep a PSNR
+        of at least `TRANSFORMATIONS_PYRAMID_MIN_PSNR` against the ones rendered
+        alone.
+        """
+        if len(filters) < 2 or image.mode in ("1", "P"):
+            return super().transform_many(image, filters)
+        # Resample premultiplied alpha as Pillow does
+        premultiplied_mode = {"LA": "La", "RGBA": "RGBa"}.get(image.mode)
+        source = image.convert(premultiplied_mode) if premultiplied_mode else image
+        width, height = image.size
+        levels = [source]
+        thumbnails = []
+        for output_filters in filters:
+            internal_filters = output_filters.to_internal()
+            output_size = thumbnail_size(image.size, output_filters.size)
+            if output_size is None:
+                thumbnails.append(image.copy())
+                continue
+            if internal_filters.resample == PImage.Resampling.NEAREST:
+                thumbnails.append(cls(image, output_filters).image_transformed)
+                continue
+            reducing_gap = (
+                output_filters.reducing_gap or TRANSFORMATIONS_MIN_REDUCING_GAP
+            )
+            max_factor = min(
+                int(width / output_size[0] / reducing_gap),
+                int(height / output_size[1] / reducing_gap),
+            )
+            level = max(max_factor, 1).bit_length() - 1
+            while len(levels) <= level:
+                levels.append(levels[-1].reduce(2))
+            factor = 2**level
+            # The last pixels of a level average partial blocks, only resample
+            # the area of the source
+            thumbnail = levels[level].resize(
+                output_size,
+                internal_filters.resample,
+                box=(0, 0, width / factor, height / factor),
+            )
+            thumbnails.append(
+                thumbnail.convert(image.mode) if premultiplied_mode else thumbnail
+            )
+        return thumbnails
 
     def _image_transform(
         self,
@@ -1,27 +1,43 @@
+import copy
+import logging
 from abc import ABC, abstractmethod
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, field
 from io import BytesIO
-from typing import Type
+from typing import Callable, Iterator, Type
 
-from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
 from PIL import Image as PImage
 
 from apps.image_processing.core.transformations.base import (
     ExternalTransformationFilters,
     InternalImageTransformation,
 )
+from apps.image_processing.core.transformers.encoders import (
+    ImageEncoder,
+    get_encoder,
+)
+from apps.image_processing.core.transformers.pipeline import ResultPipeline
+from apps.image_processing.core.transformers.result_cache import (
+    ResultCacheEntry,
+    get_result_cache,
+    result_cache_key,
+)
 from apps.image_processing.models import (
-    ImageTransformation,
     ProcessedImage,
     TransformationBatch,
 )
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class InternalImageTransformationDefinition:
     identifier: str
     transformation: Type[InternalImageTransformation]
     filters: ExternalTransformationFilters
+    # Identifier of the transformation whose output is transformed, None for the
+    # source image
+    parent: str | None = None
 
 
 @dataclass
@@ -29,6 +45,7 @@ class ExternalImageTransformationDefinition:
     identifier: str
     transformation: str
     filters: ExternalTransformationFilters | None = None
+    parent: str | None = None
 
 
 @dataclass
@@ -37,6 +54,94 @@ class InternalImageTransformationResult:
     transformation_name: str
     applied_filters: ExternalTransformationFilters
     image: PImage.Image
+    applied_order: list[str] | None = None
+
+
+@dataclass
+class InternalImageTransformationFailure:
+    identifier: str
+    transformation_name: str
+    applied_filters: ExternalTransformationFilters
+    error: Exception
+
+
+class ImageTransformationError(Exception):
+    """
+    Raised when some transformations failed, once the results of the others are
+    computed and, by `BaseImageTransformer.transform`, saved.
+
+    Attributes:
+        failures (list[InternalImageTransformationFailure]): The failed
+            transformations, in the requested order.
+        results (list[InternalImageTransformationResult]): The saved results, in
+            the requested order.
+    """
+
+    def __init__(
+        self,
+        failures: list[InternalImageTransformationFailure],
+        results: list[InternalImageTransformationResult],
+    ) -> None:
+        identifiers = ", ".join(failure.identifier for failure in failures)
+        super().__init__(f"Transformations failed: {identifiers}")
+        self.failures = failures
+        self.results = results
+
+
+@dataclass
+class TransformationRun:
+    """
+    The transformations of an image started by `BaseImageTransformer.start`.
+
+    Attributes:
+        computed (Iterator[tuple[int, InternalImageTransformationResult | InternalImageTransformationFailure]]):
+            The result or failure of each computed transformation as they
+            complete, with its position in `missing` when the results are
+            cached.
+        cached_results (dict[int, InternalImageTransformationResult]): The
+            results found in the result cache, by position.
+        entries (list[ResultCacheEntry | None]): The cache entry of every result,
+            None for the computed ones. Empty when the results are not cached.
+        cache_keys (list[str] | None): The cache key of every result, None when
+            the results are not cached.
+        missing (list[int]): The positions of the computed results that are
+            cached once saved.
+    """
+
+    computed: Iterator[
+        tuple[
+            int, InternalImageTransformationResult | InternalImageTransformationFailure
+        ]
+    ]
+    cached_results: dict[int, InternalImageTransformationResult] = field(
+        default_factory=dict
+    )
+    entries: list[ResultCacheEntry | None] = field(default_factory=list)
+    cache_keys: list[str] | None = None
+    missing: list[int] = field(default_factory=list)
+
+    def close(self) -> None:
+        """
+        Releases the work of the results that were not collected.
+        """
+        close = getattr(self.computed, "close", None)
+        if close is not None:
+            close()
+
+
+def _get_image(image: PImage.Image | Callable[[], PImage.Image]) -> PImage.Image:
+    """
+    Returns the image, calling the function that returns it if given one.
+    """
+    return image if isinstance(image, PImage.Image) else image()
+
+
+def _open_stored_image(storage: Storage, name: str) -> PImage.Image:
+    """
+    Opens a stored image without decoding it.
+    """
+    with storage.open(name) as file:
+        return PImage.open(BytesIO(file.read()))
 
 
 class BaseImageTransformer(ABC):
@@ -52,14 +157,43 @@ class BaseImageTransformer(ABC):
     def __init__(
         self,
         transformations: list[InternalImageTransformationDefinition],
+        encoder: ImageEncoder | None = None,
     ) -> None:
         """
         Initializes the BaseImageTransformer with a list of transformations.
 
         Args:
             transformations (list[InternalImageTransformationDefinition]): A list of transformation definitions.
+            encoder (ImageEncoder | None, optional): The encoder of the saved
+                results. Defaults to the encoder of
+                `IMAGE_PROCESSING["OUTPUT_FORMAT"]` and
+                `IMAGE_PROCESSING["OUTPUT_PROFILE"]`.
         """
         self.transformations_data = transformations
+        self.encoder = encoder or get_encoder()
+
+    def required_input_size(self, size: tuple[int, int]) -> tuple[int, int] | None:
+        """
+        The smallest input size every transformation needs to produce its output.
+
+        Args:
+            size (tuple[int, int]): The size of the input image.
+
+        Returns:
+            tuple[int, int] | None: The min input size, None if any transformation
+            needs the full resolution.
+        """
+        if not self.transformations_data:
+            return None
+        width = height = 0
+        for transform_data in self.transformations_data:
+            required_size = transform_data.transformation.required_input_size(
+                size, transform_data.filters
+            )
+            if required_size is None:
+                return None
+            width, height = max(width, required_size[0]), max(height, required_size[1])
+        return width, height
 
     @abstractmethod
     def _transform(
@@ -76,41 +210,282 @@ class BaseImageTransformer(ABC):
         """
         ...
 
+    def _stream(
+        self, image: PImage.Image
+    ) -> Iterator[InternalImageTransformationResult]:
+        """
+        Yields the results of `_transform` in the same order.
+
+        Transformers that compute their results one after the other override it to
+        yield each one as soon as it is computed, so it is stored while the next
+        ones are computed.
+
+        Args:
+            image (PImage.Image): The image to transform.
+
+        Returns:
+            Iterator[InternalImageTransformationResult]: The transformation results.
+        """
+        yield from self._transform(image)
+
+    def _stream_completed(
+        self, image: PImage.Image
+    ) -> Iterator[
+        tuple[
+            int, InternalImageTransformationResult | InternalImageTransformationFailure
+        ]
+    ]:
+        """
+        Yields the results of `_stream` as soon as each one completes, with its
+        position in the order `_stream` returns them.
+
+        Transformers that compute their results concurrently override it to yield
+        them in completion order, and to yield an `InternalImageTransformationFailure`
+        for a failed transformation instead of losing the other results.
+
+        Args:
+            image (PImage.Image): The image to transform.
+
+        Returns:
+            Iterator[tuple[int, InternalImageTransformationResult | InternalImageTransformationFailure]]:
+            The position and the result or failure of each transformation.
+        """
+        return enumerate(self._stream(image))
+
+    def _encode(self, image: PImage.Image) -> bytes:
+        """
+        Encodes a transformed image with the encoder of the transformer.
+
+        Args:
+            image (PImage.Image): The transformed image.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        return self.encoder.encode(image)
+
+    def _encode_result(
+        self, transform_data: InternalImageTransformationResult
+    ) -> bytes:
+        """
+        Encodes the image of a transformation result.
+
+        Args:
+            transform_data (InternalImageTransformationResult): The result to encode.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        return self._encode(transform_data.image)
+
+    def _cache_keys(self, source_hash: str) -> list[str] | None:
+        """
+        Builds the result cache keys of the results `_transform` returns, in the
+        same order.
+
+        Independent transformers return one result per transformation.
+
+        Args:
+            source_hash (str): The hash of the source image content.
+
+        Returns:
+            list[str] | None: The cache keys, None if the results cannot be cached.
+        """
+        return [
+            result_cache_key(source_hash, [transform_data], encoder=self.encoder.name)
+            for transform_data in self.transformations_data
+        ]
+
+    def _stream_missing(
+        self, image: PImage.Image, missing: list[int]
+    ) -> Iterator[
+        tuple[
+            int, InternalImageTransformationResult | InternalImageTransformationFailure
+        ]
+    ]:
+        """
+        Yields the results at the `missing` positions of `_cache_keys` as they
+        complete, only applying the transformations that produce them.
+
+        Args:
+            image (PImage.Image): The image to transform.
+            missing (list[int]): The positions of the results to compute.
+
+        Returns:
+            Iterator[tuple[int, InternalImageTransformationResult | InternalImageTransformationFailure]]:
+            The position in `missing` and the result or failure of each
+            transformation, see `_stream_completed`.
+        """
+        transformer = copy.copy(self)
+        transformer.transformations_data = [
+            self.transformations_data[index] for index in missing
+        ]
+        return transformer._stream_completed(image)
+
+    def _cached_result(
+        self, index: int, entry: ResultCacheEntry, image: PImage.Image
+    ) -> InternalImageTransformationResult:
+        """
+        Builds the result at the `index` position of `_cache_keys` from its cache
+        entry.
+        """
+        transform_data = self.transformations_data[index]
+        return InternalImageTransformationResult(
+            identifier=transform_data.identifier,
+            transformation_name=transform_data.transformation.name,
+            applied_filters=transform_data.filters,
+            image=image,
+            applied_order=entry.applied_order,
+        )
+
     def transform(
-        self, image: PImage.Image, transformation_batch: TransformationBatch
+        self,
+        image: PImage.Image,
+        transformation_batch: TransformationBatch,
+        source_hash: str | None = None,
     ) -> list[InternalImageTransformationResult]:
         """
         Transforms an image and saves the results.
 
+        When `source_hash` is set and the result cache is enabled, results already
+        computed for the same source content, transformations and filters are not
+        computed nor encoded again, their rows point at the existing files.
+
+        Every result is encoded with the encoder of the transformer and stored by
+        a `ResultPipeline` as soon as it is computed, its rows record the encoder
+        and the encoded size. The returned images of the stored results are their
+        lazily opened encoded files.
+
         Args:
             image (PImage.Image): The image to transform.
             transformation_batch (TransformationBatch): The batch of transformations.
+            source_hash (str | None, optional): The hash of the source image
+                content. Defaults to None.
 
         Returns:
             list[InternalImageTransformationResult]: A list of applied transformation results.
         """
-        transformations_applied = self._transform(image)
-        image_transformations = []
-        processed_images = []
-        for transform_data in transformations_applied:
-            image_transformation = ImageTransformation(
-                identifier=transform_data.identifier,
-                transformation=transform_data.transformation_name,
-                filters=asdict(transform_data.applied_filters),
-                batch=transformation_batch,
-            )
-            buffer = BytesIO()
-            transform_data.image.save(buffer, format="png")
-            processed = ProcessedImage(
-                identifier=transform_data.identifier,
-                file=ContentFile(
-                    buffer.getvalue(), name=f"{transform_data.identifier}.png"
-                ),
-                transformation=image_transformation,
-            )
-            processed_images.append(processed)
-            image_transformations.append(image_transformation)
-        ImageTransformation.objects.bulk_create(image_transformations)
-        ProcessedImage.objects.bulk_create(processed_images)
+        return self.finish(self.start(image, source_hash), transformation_batch)
+
+    def start(
+        self,
+        image: PImage.Image | Callable[[], PImage.Image],
+        source_hash: str | None = None,
+    ) -> TransformationRun:
+        """
+        Looks up the cached results of an image and starts computing the missing
+        ones, the results are saved by `finish`.
 
+        Transformers running on a pool submit their work right away, so the work
+        of the next images is queued while the results of the current one are
+        saved.
+
+        Args:
+            image (PImage.Image | Callable[[], PImage.Image]): The image to
+                transform, or a function returning it, only called when some
+                results are not cached.
+            source_hash (str | None, optional): The hash of the source image
+                content. Defaults to None.
+
+        Returns:
+            TransformationRun: The started transformations.
+        """
+        storage = ProcessedImage._meta.get_field("file").storage
+        cache = get_result_cache() if source_hash is not None else None
+        cache_keys = (
+            self._cache_keys(source_hash)
+            if cache is not None and source_hash is not None
+            else None
+        )
+        if cache is None or cache_keys is None:
+            return TransformationRun(computed=self._stream_completed(_get_image(image)))
+
+        entries = [
+            cache.get(key, validate=lambda entry: storage.exists(entry.file_name))
+            for key in cache_keys
+        ]
+        missing = [index for index, entry in enumerate(entries) if entry is None]
+        logger.debug(
+            f"Result cache: {len(entries) - len(missing)}/{len(entries)} hits, "
+            f"{cache.stats} since start"
+        )
+        computed = (
+            self._stream_missing(_get_image(image), missing) if missing else iter(())
+        )
+        return TransformationRun(
+            computed=computed,
+            cached_results={
+                index: self._cached_result(
+                    index, entry, _open_stored_image(storage, entry.file_name)
+                )
+                for index, entry in enumerate(entries)
+                if entry is not None
+            },
+            entries=entries,
+            cache_keys=cache_keys,
+            missing=missing,
+        )
+
+    def finish(
+        self, run: TransformationRun, transformation_batch: TransformationBatch
+    ) -> list[InternalImageTransformationResult]:
+        """
+        Saves the results of transformations started by `start`, as they complete.
+
+        Args:
+            run (TransformationRun): The started transformations.
+            transformation_batch (TransformationBatch): The batch of transformations.
+
+        Returns:
+            list[InternalImageTransformationResult]: A list of applied transformation results.
+
+        Raises:
+            ImageTransformationError: If some transformations failed, once the
+                results of the others are saved.
+        """
+        results: dict[int, InternalImageTransformationResult] = {}
+        failures: dict[int, InternalImageTransformationFailure] = {}
+        try:
+            with ResultPipeline(self, transformation_batch) as pipeline:
+                for index, transform_data in run.cached_results.items():
+                    results[index] = transform_data
+                    pipeline.add(transform_data, run.entries[index])
+                # Results are stored in completion order, returned in the requested one
+                for position, outcome in run.computed:
+                    index = (
+                        position if run.cache_keys is None else run.missing[position]
+                    )
+                    if isinstance(outcome, InternalImageTransformationFailure):
+                        logger.warning(
+                            f"Transformation {outcome.identifier} failed: "
+                            f"{outcome.error!r}"
+                        )
+                        failures[index] = outcome
+                        continue
+                    results[index] = outcome
+                    pipeline.add(outcome)
+        finally:
+            run.close()
+        # The rows follow the order the results were added in
+        processed_images = dict(zip(results, pipeline.processed_images))
+        transformations_applied = [results[index] for index in sorted(results)]
+
+        cache = get_result_cache()
+        if cache is not None and run.cache_keys is not None:
+            for index in run.missing:
+                if index not in results:
+                    continue
+                processed = processed_images[index]
+                cache.set(
+                    run.cache_keys[index],
+                    ResultCacheEntry(
+                        file_name=processed.file.name,
+                        applied_order=results[index].applied_order,
+                        file_size=processed.file_size,
+                    ),
+                )
+        if failures:
+            raise ImageTransformationError(
+                [failures[index] for index in sorted(failures)], transformations_applied
+            )
         return transformations_applied
@@ -1,45 +1,185 @@
-from typing import Generator
+from dataclasses import dataclass
+from typing import Generator, Iterator
 
 from PIL import Image as PImage
 
+from apps.image_processing.constants import (
+    TRANSFORMATIONS_REORDER_MAX_TOLERANCE,
+    TRANSFORMATIONS_REORDER_MIN_GAIN,
+)
+from apps.image_processing.core.transformations.base import (
+    ImageNode,
+    ImageSourceNode,
+)
 from apps.image_processing.core.transformers.base import (
     InternalImageTransformationDefinition,
+    InternalImageTransformationFailure,
     InternalImageTransformationResult,
 )
+from apps.image_processing.core.transformers.encoders import ImageEncoder
+from apps.image_processing.core.transformers.optimizer import (
+    transformations_optimize_order,
+)
+from apps.image_processing.core.transformers.result_cache import (
+    ResultCacheEntry,
+    result_cache_key,
+)
 from apps.image_processing.models import TransformationBatch
 
 from .base import BaseImageTransformer
 
 
+@dataclass
+class ChainExecutionStep:
+    """
+    A single step of a chain execution plan.
+
+    Attributes:
+        identifier (str): The identifier of the image produced by this step, made
+            of the identifiers of every transformation applied so far.
+        definition (InternalImageTransformationDefinition): The transformation
+            applied on top of the previous step output.
+    """
+
+    identifier: str
+    definition: InternalImageTransformationDefinition
+
+
 class ImageChainTransformer(BaseImageTransformer):
     """Applies a sequence of image transformations in a chain-like manner."""
 
     name = TransformationBatch.CHAIN
 
-    def _internal_transform(
+    def __init__(
         self,
-        image: PImage.Image,
         transformations: list[InternalImageTransformationDefinition],
-    ) -> Generator[PImage.Image, None, None]:
+        include_intermediates: bool = False,
+        optimize: bool = True,
+        encoder: ImageEncoder | None = None,
+    ) -> None:
         """
-        Recursively applies transformations to the image.
+        Initializes the ImageChainTransformer with the chain of transformations.
+
+        Args:
+            transformations (list[InternalImageTransformationDefinition]): The
+                transformations to apply, in chain order.
+            include_intermediates (bool, optional): Whether to also return the
+                result of every intermediate step of the chain. Defaults to False.
+            optimize (bool, optional): Whether to reorder commuting transformations
+                to reduce the cost of the chain. Intermediate results are returned
+                in the requested order, so the chain is never reordered when
+                `include_intermediates` is set. Defaults to True.
+            encoder (ImageEncoder | None, optional): The encoder of the saved
+                results. Defaults to the encoder of the settings.
+        """
+        super().__init__(transformations, encoder)
+        self.include_intermediates = include_intermediates
+        self.optimize = optimize
+
+    @property
+    def identifier(self) -> str:
         """
-        if len(transformations) == 1:
-            transformation = transformations[0].transformation(
-                image,
-                transformations[0].filters,
+        The identifier of the chain final result, made of the identifiers of
+        every transformation in the requested order.
+        """
+        return "-".join(
+            transform_data.identifier for transform_data in self.transformations_data
+        )
+
+    def required_input_size(self, size: tuple[int, int]) -> tuple[int, int] | None:
+        """
+        The smallest input size the first transformation of the chain needs, the
+        following ones only see its output.
+        """
+        if not self.transformations_data:
+            return None
+        first = self.transformations_data[0]
+        return first.transformation.required_input_size(size, first.filters)
+
+    def _cache_keys(self, source_hash: str) -> list[str] | None:
+        """
+        The chain returns its final result only, cached as a whole. Chains that
+        return their intermediate results are not cached.
+        """
+        if self.include_intermediates or not self.transformations_data:
+            return None
+        return [
+            result_cache_key(
+                source_hash,
+                self.transformations_data,
+                optimize=self.optimize,
+                encoder=self.encoder.name,
             )
-            yield transformation.image_transformed
+        ]
 
+    def _stream_missing(
+        self, image: PImage.Image, missing: list[int]
+    ) -> Iterator[
+        tuple[
+            int, InternalImageTransformationResult | InternalImageTransformationFailure
+        ]
+    ]:
+        return self._stream_completed(image)
+
+    def _cached_result(
+        self, index: int, entry: ResultCacheEntry, image: PImage.Image
+    ) -> InternalImageTransformationResult:
+        final = self.transformations_data[-1]
+        return InternalImageTransformationResult(
+            identifier=self.identifier,
+            transformation_name=final.transformation.name,
+            applied_filters=final.filters,
+            image=image,
+            applied_order=entry.applied_order,
+        )
+
+    def build_plan(
+        self,
+        transformations: list[InternalImageTransformationDefinition] | None = None,
+    ) -> list[ChainExecutionStep]:
+        """
+        Builds the execution plan of the chain, one step per transformation.
+
+        Args:
+            transformations (list[InternalImageTransformationDefinition] | None, optional):
+                The transformations in the order they are applied. Defaults to the
+                requested order.
+
+        Returns:
+            list[ChainExecutionStep]: The steps to execute, in order.
+        """
+        if transformations is None:
+            transformations = self.transformations_data
+        plan = []
+        identifiers: list[str] = []
         for transform_data in transformations:
-            _image = transform_data.transformation(
-                image,
-                transform_data.filters,
-            )
-            yield from self._internal_transform(
-                _image.image_transformed,
-                transformations=transformations[1:],
+            identifiers.append(transform_data.identifier)
+            plan.append(
+                ChainExecutionStep(
+                    identifier="-".join(identifiers),
+                    definition=transform_data,
+                )
             )
+        return plan
+
+    def _execute_plan(
+        self, image: PImage.Image, plan: list[ChainExecutionStep]
+    ) -> Generator[tuple[ChainExecutionStep, PImage.Image], None, None]:
+        """
+        Executes every step of the plan exactly once, feeding each step with the
+        output of the previous one, and yields the output of each step.
+
+        Unless intermediate results are returned, consecutive point transformations
+        on the array backend are fused and only the output of the last one of
+        each run is yielded.
+        """
+        node: ImageNode = ImageSourceNode(image)
+        steps: dict[ImageNode, ChainExecutionStep] = {}
+        for step in plan:
+            node = node.then(step.definition.transformation, step.definition.filters)
+            steps[node] = step
+        for step_node, step_image in node.stream(fuse=not self.include_intermediates):
+            yield steps[step_node], step_image
 
     def _transform(
         self, image: PImage.Image
@@ -47,21 +187,42 @@ class ImageChainTransformer(BaseImageTransformer):
         """
         Transforms an image using a defined sequence of transformations.
         """
-        all_identifiers = [
-            transform_data.identifier for transform_data in self.transformations_data
-        ]
-        identifier = "-".join(all_identifiers)
-
-        # Optimize transformation order based on resource consumption while maintaining
-        # the required order of certain transformations.
-        # For example, applying the black and white filter to a cropped image will consume less resources.
-        final_image = next(self._internal_transform(image, self.transformations_data))
-        transformations_applied = [
-            InternalImageTransformationResult(
-                identifier=identifier,
-                transformation_name=self.transformations_data[-1].transformation.name,
-                applied_filters=self.transformations_data[-1].filters,
-                image=final_image,
+        return list(self._stream(image))
+
+    def _stream(
+        self, image: PImage.Image
+    ) -> Iterator[InternalImageTransformationResult]:
+        transformations = self.transformations_data
+        if self.optimize and not self.include_intermediates:
+            # Optimize transformation order based on resource consumption while maintaining
+            # the required order of certain transformations.
+            # For example, blurring a black and white image will consume less resources.
+            transformations = transformations_optimize_order(
+                transformations,
+                size=image.size,
+                bands=len(image.getbands()),
+                mode=image.mode,
+                max_tolerance=TRANSFORMATIONS_REORDER_MAX_TOLERANCE,
+                min_gain=TRANSFORMATIONS_REORDER_MIN_GAIN,
+            )
+        plan = self.build_plan(transformations)
+        if not plan:
+            return
+
+        final_step = plan[-1]
+        applied_order = [step.definition.identifier for step in plan]
+        for step, step_image in self._execute_plan(image, plan):
+            if step is not final_step and not self.include_intermediates:
+                continue
+            # The final result is recorded as the requested last transformation,
+            # the order it was actually computed in is kept in `applied_order`
+            definition = (
+                self.transformations_data[-1] if step is final_step else step.definition
+            )
+            yield InternalImageTransformationResult(
+                identifier=(self.identifier if step is final_step else step.identifier),
+                transformation_name=definition.transformation.name,
+                applied_filters=definition.filters,
+                image=step_image,
+                applied_order=applied_order[: plan.index(step) + 1],
             )
-        ]
-        return transformations_applied
@@ -0,0 +1,310 @@
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from functools import cache, partial
+from pathlib import Path
+from typing import Callable
+
+from django.conf import settings
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.multiprocess import (
+    ImageMultiProcessTransformer,
+)
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+from apps.image_processing.core.transformers.shared_memory import (
+    SharedImage,
+    load_shared_image_result,
+)
+from apps.image_processing.core.transformers.threaded import ImageThreadedTransformer
+from apps.image_processing.models import TransformationBatch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransformerCostModel:
+    """
+    Estimates the wall time of applying independent transformations with each
+    transformer, so the fastest one can be picked for a given image.
+
+    The cost of a transformation comes from its `estimate_cost`, which accounts for
+    the image size and the filters, converted to seconds with the calibrated
+    coefficients of the host. The defaults assume every core is used and are
+    meant to be replaced by running the `image_processing_calibrate` command.
+
+    Attributes:
+        seconds_per_cost (float): The seconds per cost unit of transformations
+            that were not calibrated.
+        transformation_seconds_per_cost (dict[str, float]): The seconds per cost
+            unit of each calibrated transformation, by name.
+        threaded_overhead (float): The seconds added by each thread pool job.
+        threaded_speedup (float): The effective parallelism of the thread pool.
+        multiprocess_overhead (float): The seconds added by each process pool job.
+        multiprocess_seconds_per_pixel (float): The seconds to hand one pixel to
+            or from a worker process.
+        multiprocess_speedup (float): The effective parallelism of the process pool.
+    """
+
+    seconds_per_cost: float = 6e-10
+    transformation_seconds_per_cost: dict[str, float] = field(default_factory=dict)
+    threaded_overhead: float = 5e-5
+    threaded_speedup: float = float(os.cpu_count() or 1)
+    multiprocess_overhead: float = 1e-3
+    multiprocess_seconds_per_pixel: float = 4e-9
+    multiprocess_speedup: float = float(os.cpu_count() or 1)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "TransformerCostModel":
+        """
+        Loads a cost model written by `dump`.
+        """
+        with open(path) as file:
+            return cls(**json.load(file))
+
+    def dump(self, path: str | Path) -> None:
+        """
+        Writes the cost model coefficients as JSON.
+        """
+        with open(path, "w") as file:
+            json.dump(asdict(self), file, indent=4)
+
+    def estimate_transformation(
+        self,
+        transform_data: InternalImageTransformationDefinition,
+        size: tuple[int, int],
+        bands: int = 3,
+    ) -> float:
+        """
+        Estimates the seconds taken by a single transformation.
+
+        Args:
+            transform_data (InternalImageTransformationDefinition): The transformation.
+            size (tuple[int, int]): The size of the input image.
+            bands (int, optional): The number of bands of the input image.
+                Defaults to 3.
+
+        Returns:
+            float: The estimated seconds.
+        """
+        transformation = transform_data.transformation
+        seconds_per_cost = self.transformation_seconds_per_cost.get(
+            transformation.name, self.seconds_per_cost
+        )
+        return seconds_per_cost * transformation.estimate_cost(
+            size, bands, transform_data.filters
+        )
+
+    def estimate(
+        self,
+        transformer: str,
+        transformations: list[InternalImageTransformationDefinition],
+        size: tuple[int, int],
+        bands: int = 3,
+        images: int = 1,
+    ) -> float:
+        """
+        Estimates the seconds taken by a transformer to apply independent
+        transformations.
+
+        When several images are transformed together their work shares the pool,
+        so the longest transformation of an image no longer bounds its time. At
+        most `IMAGE_PROCESSING["BATCH_PREFETCH_IMAGES"]` + 1 images overlap, so
+        larger batches do not overlap more.
+
+        Args:
+            transformer (str): The name of a sequential, threaded or multiprocess
+                transformer.
+            transformations (list[InternalImageTransformationDefinition]): The
+                transformations to apply.
+            size (tuple[int, int]): The size of the input image.
+            bands (int, optional): The number of bands of the input image.
+                Defaults to 3.
+            images (int, optional): The number of images of the same size
+                transformed together, the estimate is per image. Defaults to 1.
+
+        Returns:
+            float: The estimated seconds.
+
+        Raises:
+            ValueError: If the transformer cannot be estimated.
+        """
+        durations = [
+            self.estimate_transformation(transform_data, size, bands)
+            for transform_data in transformations
+        ]
+        if not durations:
+            return 0.0
+        total = sum(durations)
+        count = len(durations)
+        overlapping = min(
+            max(images, 1),
+            max(0, settings.IMAGE_PROCESSING["BATCH_PREFETCH_IMAGES"]) + 1,
+        )
+        longest = max(durations) / overlapping
+        if transformer == TransformationBatch.SEQUENTIAL:
+            return total
+        if transformer == TransformationBatch.THREADED:
+            return (
+                max(longest, total / self.threaded_speedup)
+                + count * self.threaded_overhead
+            )
+        if transformer == TransformationBatch.MULTIPROCESS:
+            # The source is handed once and every result is handed back
+            hand_off = self.multiprocess_seconds_per_pixel * size[0] * size[1]
+            return (
+                max(longest, total / self.multiprocess_speedup)
+                + count * self.multiprocess_overhead
+                + (count + 1) * hand_off
+            )
+        raise ValueError(f"Transformer '{transformer}' cannot be estimated")
+
+    def choose(
+        self,
+        transformations: list[InternalImageTransformationDefinition],
+        size: tuple[int, int],
+        bands: int = 3,
+        images: int = 1,
+    ) -> str:
+        """
+        Picks the transformer with the lowest estimated time, sequential on ties.
+
+        Args:
+            transformations (list[InternalImageTransformationDefinition]): The
+                transformations to apply.
+            size (tuple[int, int]): The size of the input image.
+            bands (int, optional): The number of bands of the input image.
+                Defaults to 3.
+            images (int, optional): The number of images transformed together.
+                Defaults to 1.
+
+        Returns:
+            str: The name of the sequential, threaded or multiprocess transformer.
+        """
+        return min(
+            (
+                TransformationBatch.SEQUENTIAL,
+                TransformationBatch.THREADED,
+                TransformationBatch.MULTIPROCESS,
+            ),
+            key=lambda transformer: self.estimate(
+                transformer, transformations, size, bands, images
+            ),
+        )
+
+
+@cache
+def get_cost_model() -> TransformerCostModel:
+    """
+    Returns the cost model of the host, loaded once from
+    `IMAGE_PROCESSING["COST_MODEL_PATH"]`.
+
+    Falls back to the default coefficients when the host was not calibrated.
+
+    Returns:
+        TransformerCostModel: The cost model.
+    """
+    path = settings.IMAGE_PROCESSING["COST_MODEL_PATH"]
+    if not path or not os.path.exists(path):
+        logger.info("No calibrated cost model found, using the default coefficients")
+        return TransformerCostModel()
+    try:
+        return TransformerCostModel.load(path)
+    except (OSError, TypeError, ValueError) as error:
+        logger.warning(f"Invalid cost model at {path}, using the defaults: {error}")
+        return TransformerCostModel()
+
+
+def _best_time(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate_cost_model(
+    transformations: list[InternalImageTransformationDefinition],
+    image_size: tuple[int, int] = (2000, 1500),
+    repeat: int = 3,
+) -> TransformerCostModel:
+    """
+    Measures the cost model coefficients on the current host.
+
+    Args:
+        transformations (list[InternalImageTransformationDefinition]): One
+            definition per transformation to calibrate.
+        image_size (tuple[int, int], optional): The size of the generated image.
+            Defaults to (2000, 1500).
+        repeat (int, optional): How many times each measure is taken, the best
+            one is kept. Defaults to 3.
+
+    Returns:
+        TransformerCostModel: The calibrated cost model.
+    """
+    image = PImage.linear_gradient("L").resize(image_size).convert("RGB")
+    image.load()
+    bands = len(image.getbands())
+    pixels = image_size[0] * image_size[1]
+    model = TransformerCostModel()
+
+    for transform_data in transformations:
+        transformation = transform_data.transformation
+        seconds = _best_time(
+            partial(transformation, image, transform_data.filters), repeat
+        )
+        model.transformation_seconds_per_cost[transformation.name] = (
+            seconds
+            / transformation.estimate_cost(image.size, bands, transform_data.filters)
+        )
+    model.seconds_per_cost = sum(model.transformation_seconds_per_cost.values()) / len(
+        model.transformation_seconds_per_cost
+    )
+
+    # Enough jobs to keep every core busy
+    jobs = transformations * max(1, -(-(os.cpu_count() or 1) // len(transformations)))
+    count = len(jobs)
+    tiny = image.resize((8, 8))
+    sequential = ImageSequentialTransformer(jobs)
+    threaded = ImageThreadedTransformer(jobs)
+    multiprocess = ImageMultiProcessTransformer(jobs)
+    sequential_seconds = _best_time(partial(sequential._transform, image), repeat)
+
+    def hand_off() -> None:
+        shared, memory = SharedImage.from_image(image, track=False)
+        memory.close()
+        load_shared_image_result(shared)
+
+    model.multiprocess_seconds_per_pixel = _best_time(hand_off, repeat) / (2 * pixels)
+    # The process pool is measured first, so its workers are not forked while the
+    # thread pool is running
+    model.multiprocess_overhead = (
+        _best_time(partial(multiprocess._transform, tiny), repeat) / count
+    )
+    multiprocess_seconds = (
+        _best_time(partial(multiprocess._transform, image), repeat)
+        - count * model.multiprocess_overhead
+        - (count + 1) * model.multiprocess_seconds_per_pixel * pixels
+    )
+    model.multiprocess_speedup = min(
+        max(sequential_seconds / max(multiprocess_seconds, 1e-9), 1.0), count
+    )
+    model.threaded_overhead = (
+        _best_time(partial(threaded._transform, tiny), repeat) / count
+    )
+    threaded_seconds = (
+        _best_time(partial(threaded._transform, image), repeat)
+        - count * model.threaded_overhead
+    )
+    model.threaded_speedup = min(
+        max(sequential_seconds / max(threaded_seconds, 1e-9), 1.0), count
+    )
+    return model
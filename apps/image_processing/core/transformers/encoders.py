@@ -0,0 +1,144 @@
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any
+
+from django.conf import settings
+from PIL import Image as PImage
+
+from apps.image_processing.constants import (
+    TRANSFORMATION_OUTPUT_FORMAT,
+    TRANSFORMATION_OUTPUT_PROFILE,
+)
+
+# Pillow format and file extension of each output format
+OUTPUT_FORMATS = {
+    TRANSFORMATION_OUTPUT_FORMAT.PNG: ("PNG", "png"),
+    TRANSFORMATION_OUTPUT_FORMAT.JPEG: ("JPEG", "jpg"),
+    TRANSFORMATION_OUTPUT_FORMAT.WEBP: ("WEBP", "webp"),
+    TRANSFORMATION_OUTPUT_FORMAT.WEBP_LOSSLESS: ("WEBP", "webp"),
+}
+# Pillow save options of each output format and profile. The balanced PNG profile
+# is the Pillow default.
+OUTPUT_PROFILES: dict[
+    TRANSFORMATION_OUTPUT_FORMAT, dict[TRANSFORMATION_OUTPUT_PROFILE, dict[str, Any]]
+] = {
+    TRANSFORMATION_OUTPUT_FORMAT.PNG: {
+        TRANSFORMATION_OUTPUT_PROFILE.FAST: {"compress_level": 1},
+        TRANSFORMATION_OUTPUT_PROFILE.BALANCED: {"compress_level": 6},
+        TRANSFORMATION_OUTPUT_PROFILE.SMALL: {"compress_level": 9},
+    },
+    TRANSFORMATION_OUTPUT_FORMAT.JPEG: {
+        TRANSFORMATION_OUTPUT_PROFILE.FAST: {"quality": 85},
+        TRANSFORMATION_OUTPUT_PROFILE.BALANCED: {"quality": 85, "optimize": True},
+        TRANSFORMATION_OUTPUT_PROFILE.SMALL: {
+            "quality": 75,
+            "optimize": True,
+            "progressive": True,
+        },
+    },
+    TRANSFORMATION_OUTPUT_FORMAT.WEBP: {
+        TRANSFORMATION_OUTPUT_PROFILE.FAST: {"quality": 80, "method": 0},
+        TRANSFORMATION_OUTPUT_PROFILE.BALANCED: {"quality": 80, "method": 4},
+        TRANSFORMATION_OUTPUT_PROFILE.SMALL: {"quality": 75, "method": 6},
+    },
+    # Lossless WebP uses the quality as the compression effort, past 90 with
+    # method 6 it is an order of magnitude slower for a negligible gain
+    TRANSFORMATION_OUTPUT_FORMAT.WEBP_LOSSLESS: {
+        TRANSFORMATION_OUTPUT_PROFILE.FAST: {
+            "lossless": True,
+            "quality": 0,
+            "method": 0,
+        },
+        TRANSFORMATION_OUTPUT_PROFILE.BALANCED: {
+            "lossless": True,
+            "quality": 50,
+            "method": 3,
+        },
+        TRANSFORMATION_OUTPUT_PROFILE.SMALL: {
+            "lossless": True,
+            "quality": 90,
+            "method": 6,
+        },
+    },
+}
+# Modes stored by JPEG, images of other modes are converted before encoding
+JPEG_MODES = ("L", "RGB", "CMYK")
+
+
+@dataclass(frozen=True)
+class ImageEncoder:
+    """
+    Encodes transformed images to an output format with the save options of a
+    profile.
+
+    Attributes:
+        format (TRANSFORMATION_OUTPUT_FORMAT): The output format.
+        profile (TRANSFORMATION_OUTPUT_PROFILE): The speed/size trade-off of the
+            save options.
+    """
+
+    format: TRANSFORMATION_OUTPUT_FORMAT
+    profile: TRANSFORMATION_OUTPUT_PROFILE
+    options: dict[str, Any] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "options", OUTPUT_PROFILES[self.format][self.profile])
+
+    @property
+    def name(self) -> str:
+        """The format and profile of the encoder, as stored on the results."""
+        return f"{self.format}:{self.profile}"
+
+    @property
+    def extension(self) -> str:
+        """The file extension of the encoded images."""
+        return OUTPUT_FORMATS[self.format][1]
+
+    def encode(self, image: PImage.Image) -> bytes:
+        """
+        Encodes an image.
+
+        JPEG does not store alpha nor palettes, such images are converted to RGB,
+        or L for grayscale ones, dropping the alpha band.
+
+        Args:
+            image (PImage.Image): The image to encode.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        if (
+            self.format == TRANSFORMATION_OUTPUT_FORMAT.JPEG
+            and image.mode not in JPEG_MODES
+        ):
+            grayscale = len(image.getbands()) <= 2 and image.mode not in ("P", "PA")
+            image = image.convert("L" if grayscale else "RGB")
+        buffer = BytesIO()
+        image.save(buffer, format=OUTPUT_FORMATS[self.format][0], **self.options)
+        return buffer.getvalue()
+
+
+def get_encoder(format: str | None = None, profile: str | None = None) -> ImageEncoder:
+    """
+    Returns the encoder of an output format and profile.
+
+    Args:
+        format (str | None, optional): The output format. Defaults to
+            `IMAGE_PROCESSING["OUTPUT_FORMAT"]`.
+        profile (str | None, optional): The output profile. Defaults to
+            `IMAGE_PROCESSING["OUTPUT_PROFILE"]`.
+
+    Returns:
+        ImageEncoder: The encoder.
+
+    Raises:
+        ValueError: If the format or the profile is unknown.
+    """
+    return ImageEncoder(
+        format=TRANSFORMATION_OUTPUT_FORMAT(
+            format or settings.IMAGE_PROCESSING["OUTPUT_FORMAT"]
+        ),
+        profile=TRANSFORMATION_OUTPUT_PROFILE(
+            profile or settings.IMAGE_PROCESSING["OUTPUT_PROFILE"]
+        ),
+    )
@@ -0,0 +1,189 @@
+import copy
+from typing import Iterator
+
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformations.base import (
+    ImageNode,
+    ImageSourceNode,
+    stream_nodes,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+    InternalImageTransformationFailure,
+    InternalImageTransformationResult,
+)
+from apps.image_processing.core.transformers.encoders import ImageEncoder
+from apps.image_processing.core.transformers.result_cache import (
+    ResultCacheEntry,
+    result_cache_key,
+)
+from apps.image_processing.models import TransformationBatch
+
+from .base import BaseImageTransformer
+
+
+def has_parent_transformations(
+    transformations: list[InternalImageTransformationDefinition],
+) -> bool:
+    """
+    Whether any transformation is applied to the output of another one.
+    """
+    return any(transform_data.parent for transform_data in transformations)
+
+
+class ImageGraphTransformer(BaseImageTransformer):
+    """
+    Applies transformations that take the source image or the output of another
+    transformation as input, so a shared prefix fans out to several outputs.
+
+    Every transformation is computed once, however many outputs depend on it, and
+    its output is released as soon as no pending transformation needs it.
+    """
+
+    name = TransformationBatch.GRAPH
+
+    def __init__(
+        self,
+        transformations: list[InternalImageTransformationDefinition],
+        include_intermediates: bool = False,
+        encoder: ImageEncoder | None = None,
+    ) -> None:
+        """
+        Initializes the ImageGraphTransformer with the transformations of the graph.
+
+        Args:
+            transformations (list[InternalImageTransformationDefinition]): The
+                transformations to apply, each one after its parent.
+            include_intermediates (bool, optional): Whether to also return the
+                result of the transformations other transformations are applied
+                to. Defaults to False, only the leaves of the graph are returned.
+            encoder (ImageEncoder | None, optional): The encoder of the saved
+                results. Defaults to the encoder of the settings.
+
+        Raises:
+            ValueError: If an identifier is repeated or a parent is not a previous
+                transformation.
+        """
+        super().__init__(transformations, encoder)
+        self.include_intermediates = include_intermediates
+        self._indexes: dict[str, int] = {}
+        for index, transform_data in enumerate(transformations):
+            if transform_data.identifier in self._indexes:
+                raise ValueError(
+                    f"Duplicated transformation identifier: {transform_data.identifier}"
+                )
+            if (
+                transform_data.parent is not None
+                and transform_data.parent not in self._indexes
+            ):
+                raise ValueError(
+                    f"Transformation {transform_data.identifier} has an unknown "
+                    f"parent: {transform_data.parent}"
+                )
+            self._indexes[transform_data.identifier] = index
+        parents = {transform_data.parent for transform_data in transformations}
+        # The positions in `transformations_data` of the returned results
+        self.outputs = [
+            index
+            for index, transform_data in enumerate(transformations)
+            if include_intermediates or transform_data.identifier not in parents
+        ]
+
+    def path(self, index: int) -> list[InternalImageTransformationDefinition]:
+        """
+        The transformations from the source down to the one at `index`, in the
+        order they are applied.
+        """
+        path = [self.transformations_data[index]]
+        while path[-1].parent is not None:
+            path.append(self.transformations_data[self._indexes[path[-1].parent]])
+        return path[::-1]
+
+    def required_input_size(self, size: tuple[int, int]) -> tuple[int, int] | None:
+        """
+        The smallest input size the transformations applied to the source need,
+        the other ones only see their outputs.
+        """
+        roots = copy.copy(self)
+        roots.transformations_data = [
+            transform_data
+            for transform_data in self.transformations_data
+            if transform_data.parent is None
+        ]
+        return BaseImageTransformer.required_input_size(roots, size)
+
+    def _build_nodes(self, image: PImage.Image) -> list[ImageNode]:
+        """
+        Builds a lazy node per transformation, in the same order.
+        """
+        source = ImageSourceNode(image)
+        nodes: list[ImageNode] = []
+        for transform_data in self.transformations_data:
+            parent = (
+                source
+                if transform_data.parent is None
+                else nodes[self._indexes[transform_data.parent]]
+            )
+            nodes.append(
+                parent.then(transform_data.transformation, transform_data.filters)
+            )
+        return nodes
+
+    def _cache_keys(self, source_hash: str) -> list[str] | None:
+        """
+        Every result is cached by the transformations of its path.
+        """
+        return [
+            result_cache_key(source_hash, self.path(index), encoder=self.encoder.name)
+            for index in self.outputs
+        ]
+
+    def _stream_missing(
+        self, image: PImage.Image, missing: list[int]
+    ) -> Iterator[
+        tuple[
+            int, InternalImageTransformationResult | InternalImageTransformationFailure
+        ]
+    ]:
+        transformer = copy.copy(self)
+        transformer.outputs = [self.outputs[index] for index in missing]
+        return transformer._stream_completed(image)
+
+    def _cached_result(
+        self, index: int, entry: ResultCacheEntry, image: PImage.Image
+    ) -> InternalImageTransformationResult:
+        transform_data = self.transformations_data[self.outputs[index]]
+        return InternalImageTransformationResult(
+            identifier=transform_data.identifier,
+            transformation_name=transform_data.transformation.name,
+            applied_filters=transform_data.filters,
+            image=image,
+            applied_order=entry.applied_order,
+        )
+
+    def _transform(
+        self, image: PImage.Image
+    ) -> list[InternalImageTransformationResult]:
+        """
+        Transforms an image with every transformation of the graph.
+        """
+        return list(self._stream(image))
+
+    def _stream(
+        self, image: PImage.Image
+    ) -> Iterator[InternalImageTransformationResult]:
+        # Parents come before their children, so the outputs are computed in order
+        nodes = self._build_nodes(image)
+        for position, output_image in stream_nodes(
+            [nodes[index] for index in self.outputs]
+        ):
+            index = self.outputs[position]
+            transform_data = self.transformations_data[index]
+            yield InternalImageTransformationResult(
+                identifier=transform_data.identifier,
+                transformation_name=transform_data.transformation.name,
+                applied_filters=transform_data.filters,
+                image=output_image,
+                applied_order=[path_data.identifier for path_data in self.path(index)],
+            )
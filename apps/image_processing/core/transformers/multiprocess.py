@@ -1,6 +1,7 @@
 from concurrent import futures as cfutures
-from typing import Callable
+from typing import Generator, Iterator, Type, cast
 
+from django.conf import settings
 from PIL import Image as PImage
 
 from apps.image_processing.core.transformations.base import (
@@ -8,67 +9,197 @@ from apps.image_processing.core.transformations.base import (
     InternalImageTransformation,
 )
 from apps.image_processing.core.transformers.base import (
+    ImageTransformationError,
     InternalImageTransformationDefinition,
+    InternalImageTransformationFailure,
     InternalImageTransformationResult,
 )
+from apps.image_processing.core.transformers.encoders import ImageEncoder
+from apps.image_processing.core.transformers.pool import get_process_pool
+from apps.image_processing.core.transformers.shared_memory import (
+    SharedImage,
+    load_shared_image_result,
+    transform_shared_image,
+)
 from apps.image_processing.models import TransformationBatch
 
 from .base import BaseImageTransformer
 
+WorkerResult = SharedImage | PImage.Image
+
+
+def transform_image(
+    transformation: Type[InternalImageTransformation],
+    image: PImage.Image,
+    filters: ExternalTransformationFilters,
+) -> PImage.Image:
+    """
+    Applies a transformation to an image sent to a worker process.
+    """
+    return transformation(image, filters).image_transformed
+
 
 class ImageMultiProcessTransformer(BaseImageTransformer):
     name = TransformationBatch.MULTIPROCESS
 
     def __init__(
-        self, transformations: list[InternalImageTransformationDefinition]
+        self,
+        transformations: list[InternalImageTransformationDefinition],
+        use_shared_memory: bool | None = None,
+        encoder: ImageEncoder | None = None,
     ) -> None:
         """
         Initializes the ImageMultiProcessTransformer with a list of transformations to be fullfilled in parallel.
-        """
-        super().__init__(transformations)
-        self._transformations_applied: list[InternalImageTransformationResult] = []
 
-    def _callback_process(
-        self, identifier: str, filters: ExternalTransformationFilters
-    ) -> Callable[[cfutures.Future[InternalImageTransformation]], None]:
+        The transformations run on the process pool shared by the whole process,
+        see `apps.image_processing.core.transformers.pool.get_process_pool`.
+
+        Args:
+            transformations (list[InternalImageTransformationDefinition]): The
+                transformations to apply.
+            use_shared_memory (bool | None, optional): Whether the image is handed
+                to the workers through shared memory instead of being pickled.
+                Defaults to `IMAGE_PROCESSING["POOL_SHARED_MEMORY"]`.
+            encoder (ImageEncoder | None, optional): The encoder of the saved
+                results. Defaults to the encoder of the settings.
         """
-        Creates a callback function to handle the completion of a transformation.
+        super().__init__(transformations, encoder)
+        if use_shared_memory is None:
+            use_shared_memory = settings.IMAGE_PROCESSING["POOL_SHARED_MEMORY"]
+        self.use_shared_memory = use_shared_memory
+
+    def _transform(
+        self, image: PImage.Image
+    ) -> list[InternalImageTransformationResult]:
         """
+        Applies transformations to an image using the shared process pool.
 
-        def callback(future: cfutures.Future[InternalImageTransformation]) -> None:
-            """
-            Processes the result of a completed transformation and stores it.
-            """
-            transformed_image = future.result().image_transformed
-            self._transformations_applied.append(
-                InternalImageTransformationResult(
-                    identifier=identifier,
-                    image=transformed_image,
-                    transformation_name=future.result().name,
-                    applied_filters=filters,
-                )
+        Raises:
+            ImageTransformationError: If some transformations failed, once the
+                others completed.
+        """
+        results: dict[int, InternalImageTransformationResult] = {}
+        failures: dict[int, InternalImageTransformationFailure] = {}
+        for index, outcome in self._stream_completed(image):
+            if isinstance(outcome, InternalImageTransformationFailure):
+                failures[index] = outcome
+            else:
+                results[index] = outcome
+        # Results complete in any order, return them in the requested one
+        transformations_applied = [results[index] for index in sorted(results)]
+        if failures:
+            raise ImageTransformationError(
+                [failures[index] for index in sorted(failures)], transformations_applied
             )
+        return transformations_applied
 
-        return callback
-
-    def _transform(
+    def _stream_completed(
         self, image: PImage.Image
-    ) -> list[InternalImageTransformationResult]:
+    ) -> Iterator[
+        tuple[
+            int, InternalImageTransformationResult | InternalImageTransformationFailure
+        ]
+    ]:
         """
-        Applies transformations to an image using a process pool executor.
+        Applies transformations to an image using the shared process pool, and
+        yields each result as soon as its worker returns it.
+
+        The decoded image is copied once into shared memory and every worker
+        rebuilds it from there, the results come back through shared memory too.
+        Images whose mode cannot be shared are pickled to the workers instead.
+
+        The work is submitted before returning, so the pool starts on it while
+        the caller is busy. Closing the returned generator releases the results
+        that were not collected.
+
+        A transformation that raises yields its failure, the others still complete.
         """
-        with cfutures.ProcessPoolExecutor() as executor:
-            for transform_data in self.transformations_data:
-                image_copy = image.copy()
-                future: cfutures.Future[InternalImageTransformation] = executor.submit(
-                    transform_data.transformation,
-                    image_copy,
-                    transform_data.filters,
-                )
-                future.add_done_callback(
-                    self._callback_process(
-                        transform_data.identifier,
+        stream = self._submit(image)
+        # Run up to the submission of the work, the first value is a placeholder
+        next(stream)
+        return cast(
+            Iterator[
+                tuple[
+                    int,
+                    InternalImageTransformationResult
+                    | InternalImageTransformationFailure,
+                ]
+            ],
+            stream,
+        )
+
+    def _submit(
+        self, image: PImage.Image
+    ) -> Generator[
+        tuple[
+            int, InternalImageTransformationResult | InternalImageTransformationFailure
+        ]
+        | None,
+        None,
+        None,
+    ]:
+        image.load()
+        source: SharedImage | None = None
+        if self.use_shared_memory and SharedImage.supports(image):
+            source, source_memory = SharedImage.from_image(image)
+
+        pool = get_process_pool()
+        futures: dict[cfutures.Future[WorkerResult], int] = {}
+        pending: set[cfutures.Future[WorkerResult]] = set()
+        try:
+            for index, transform_data in enumerate(self.transformations_data):
+                future: cfutures.Future[WorkerResult]
+                if source is not None:
+                    future = pool.submit(
+                        transform_shared_image,
+                        transform_data.transformation,
+                        source,
                         transform_data.filters,
                     )
+                else:
+                    future = pool.submit(
+                        transform_image,
+                        transform_data.transformation,
+                        image,
+                        transform_data.filters,
+                    )
+                futures[future] = index
+                pending.add(future)
+            yield None
+            for future in cfutures.as_completed(futures):
+                pending.discard(future)
+                index = futures[future]
+                transform_data = self.transformations_data[index]
+                try:
+                    transformed_image = load_shared_image_result(future.result())
+                except Exception as error:
+                    yield (
+                        index,
+                        InternalImageTransformationFailure(
+                            identifier=transform_data.identifier,
+                            transformation_name=transform_data.transformation.name,
+                            applied_filters=transform_data.filters,
+                            error=error,
+                        ),
+                    )
+                    continue
+                yield (
+                    index,
+                    InternalImageTransformationResult(
+                        identifier=transform_data.identifier,
+                        transformation_name=transform_data.transformation.name,
+                        applied_filters=transform_data.filters,
+                        image=transformed_image,
+                    ),
                 )
-        return self._transformations_applied
+        except BaseException:
+            # Release the shared results that will not be collected, also when the
+            # consumer stops iterating early
+            for future in cfutures.wait(pending).done:
+                if future.exception() is None:
+                    load_shared_image_result(future.result())
+            raise
+        finally:
+            if source is not None:
+                source_memory.close()
+                source_memory.unlink()
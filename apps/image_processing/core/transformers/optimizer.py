@@ -0,0 +1,116 @@
+from typing import Type
+
+from apps.image_processing.constants import TRANSFORMATIONS_REORDER_MODES
+from apps.image_processing.core.transformations.base import (
+    InternalImageTransformation,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+
+
+def transformations_can_commute(
+    first: Type[InternalImageTransformation],
+    second: Type[InternalImageTransformation],
+    max_tolerance: int,
+    mode: str,
+) -> bool:
+    """
+    Checks whether two transformations can be swapped in a chain.
+
+    Both transformations must declare each other in `commutes_with`, the declared
+    tolerance of the swap must not exceed `max_tolerance` and the chain must run
+    on an image mode the tolerances hold for, see TRANSFORMATIONS_REORDER_MODES.
+
+    Args:
+        first (Type[InternalImageTransformation]): The transformation applied first.
+        second (Type[InternalImageTransformation]): The transformation applied second.
+        max_tolerance (int): The max absolute per-pixel difference accepted.
+        mode (str): The mode of the image the chain runs on.
+
+    Returns:
+        bool: True if the transformations can be swapped.
+    """
+    if mode not in TRANSFORMATIONS_REORDER_MODES:
+        return False
+    if second.name not in first.commutes_with or first.name not in second.commutes_with:
+        return False
+    tolerance = max(first.commutes_with[second.name], second.commutes_with[first.name])
+    return tolerance <= max_tolerance
+
+
+def transformations_estimate_cost(
+    transformations: list[InternalImageTransformationDefinition],
+    size: tuple[int, int],
+    bands: int,
+) -> float:
+    """
+    Estimates the cost of applying the transformations in chain order.
+
+    Args:
+        transformations (list[InternalImageTransformationDefinition]): The
+            transformations in chain order.
+        size (tuple[int, int]): The size of the input image.
+        bands (int): The number of bands of the input image.
+
+    Returns:
+        float: The relative cost of the chain.
+    """
+    cost = 0.0
+    for transform_data in transformations:
+        transformation = transform_data.transformation
+        cost += transformation.estimate_cost(size, bands, transform_data.filters)
+        size, bands = transformation.estimate_output(
+            size, bands, transform_data.filters
+        )
+    return cost
+
+
+def transformations_optimize_order(
+    transformations: list[InternalImageTransformationDefinition],
+    size: tuple[int, int],
+    bands: int,
+    mode: str,
+    max_tolerance: int,
+    min_gain: float = 0.0,
+) -> list[InternalImageTransformationDefinition]:
+    """
+    Reorders chained transformations to reduce the cost of the chain.
+
+    Adjacent transformations that commute are swapped whenever the swap lowers the
+    estimated cost by more than `min_gain`, e.g. a black and white conversion is
+    moved ahead of a blur so the blur runs on a single band. Transformations that
+    do not commute keep their relative order.
+
+    Args:
+        transformations (list[InternalImageTransformationDefinition]): The
+            transformations in the requested chain order.
+        size (tuple[int, int]): The size of the input image.
+        bands (int): The number of bands of the input image.
+        mode (str): The mode of the input image.
+        max_tolerance (int): The max absolute per-pixel difference accepted.
+        min_gain (float, optional): The min relative cost reduction for a swap to
+            be applied. Defaults to 0.0.
+
+    Returns:
+        list[InternalImageTransformationDefinition]: The transformations in the
+        order they should be applied.
+    """
+    optimized = list(transformations)
+    cost = transformations_estimate_cost(optimized, size, bands)
+    swapped = True
+    while swapped:
+        swapped = False
+        for index in range(len(optimized) - 1):
+            first, second = optimized[index], optimized[index + 1]
+            if not transformations_can_commute(
+                first.transformation, second.transformation, max_tolerance, mode
+            ):
+                continue
+            candidate = list(optimized)
+            candidate[index], candidate[index + 1] = second, first
+            candidate_cost = transformations_estimate_cost(candidate, size, bands)
+            if candidate_cost < cost * (1 - min_gain):
+                optimized, cost = candidate, candidate_cost
+                swapped = True
+    return optimized
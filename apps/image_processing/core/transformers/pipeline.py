@@ -0,0 +1,182 @@
+from collections import deque
+from concurrent import futures as cfutures
+from dataclasses import asdict
+from io import BytesIO
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformers.pool import get_thread_pool
+from apps.image_processing.core.transformers.result_cache import ResultCacheEntry
+from apps.image_processing.models import (
+    ImageTransformation,
+    ProcessedImage,
+    TransformationBatch,
+)
+
+if TYPE_CHECKING:
+    from apps.image_processing.core.transformers.base import (
+        BaseImageTransformer,
+        InternalImageTransformationResult,
+    )
+
+
+class ResultPipeline:
+    """
+    Encodes and stores the results of a transformer on the shared thread pool
+    while the next ones are computed, and writes their rows in batches.
+
+    At most `max_in_flight` results are encoded or stored at the same time, adding
+    one more waits for the oldest one. Once stored, the decoded image of a result
+    is replaced by its lazily opened encoded file, so only the results in flight
+    are held decoded. Rows are written in the order the results are added.
+
+    Use it as a context manager, leaving the context waits for the results in
+    flight and writes the remaining rows, unless an exception was raised.
+
+    Attributes:
+        processed_images (list[ProcessedImage]): The rows written, in order.
+    """
+
+    def __init__(
+        self,
+        transformer: "BaseImageTransformer",
+        transformation_batch: TransformationBatch,
+        max_in_flight: int | None = None,
+        batch_size: int | None = None,
+    ) -> None:
+        """
+        Args:
+            transformer (BaseImageTransformer): The transformer whose results are
+                stored, it encodes them.
+            transformation_batch (TransformationBatch): The batch of the rows.
+            max_in_flight (int | None, optional): The max results encoded or
+                stored at the same time. Defaults to
+                `IMAGE_PROCESSING["PIPELINE_MAX_IN_FLIGHT"]`.
+            batch_size (int | None, optional): The rows written per query.
+                Defaults to `IMAGE_PROCESSING["PIPELINE_BATCH_SIZE"]`.
+        """
+        self.transformer = transformer
+        self.transformation_batch = transformation_batch
+        self.max_in_flight = max(
+            1, max_in_flight or settings.IMAGE_PROCESSING["PIPELINE_MAX_IN_FLIGHT"]
+        )
+        self.batch_size = max(
+            1, batch_size or settings.IMAGE_PROCESSING["PIPELINE_BATCH_SIZE"]
+        )
+        self.processed_images: list[ProcessedImage] = []
+        self._field = ProcessedImage._meta.get_field("file")
+        self._pending: deque[
+            tuple[
+                "InternalImageTransformationResult",
+                ResultCacheEntry | None,
+                cfutures.Future[tuple[str, bytes]] | None,
+            ]
+        ] = deque()
+        self._in_flight = 0
+        self._rows: list[tuple[ImageTransformation, ProcessedImage]] = []
+
+    def __enter__(self) -> "ResultPipeline":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is not None:
+            # Let the results in flight finish, their files are left unreferenced
+            cfutures.wait(future for _, _, future in self._pending if future)
+            return
+        while self._pending:
+            self._collect()
+        self._flush()
+
+    def add(
+        self,
+        result: "InternalImageTransformationResult",
+        entry: ResultCacheEntry | None = None,
+    ) -> None:
+        """
+        Stores a result in the background, or reuses the file of its cache entry.
+
+        Args:
+            result (InternalImageTransformationResult): The result to store.
+            entry (ResultCacheEntry | None, optional): The cache entry of the
+                result, None if it was computed. Defaults to None.
+        """
+        future = None
+        if entry is None:
+            while self._in_flight >= self.max_in_flight:
+                self._collect()
+            future = get_thread_pool().submit(self._store, result)
+            self._in_flight += 1
+        self._pending.append((result, entry, future))
+        while self._pending and (
+            self._pending[0][2] is None or self._pending[0][2].done()
+        ):
+            self._collect()
+
+    def _store(self, result: "InternalImageTransformationResult") -> tuple[str, bytes]:
+        """
+        Encodes a result and saves it to the storage, runs on the thread pool.
+        """
+        encoded = self.transformer._encode_result(result)
+        name = self._field.generate_filename(
+            None, f"{result.identifier}.{self.transformer.encoder.extension}"
+        )
+        return self._field.storage.save(name, ContentFile(encoded)), encoded
+
+    def _collect(self) -> None:
+        """
+        Waits for the oldest pending result and builds its rows.
+        """
+        result, entry, future = self._pending.popleft()
+        if future is None:
+            assert entry is not None
+            file_name = entry.file_name
+            file_size = (
+                self._field.storage.size(file_name)
+                if entry.file_size is None
+                else entry.file_size
+            )
+        else:
+            self._in_flight -= 1
+            file_name, encoded = future.result()
+            file_size = len(encoded)
+            result.image = PImage.open(BytesIO(encoded))
+
+        filters = asdict(result.applied_filters)
+        if result.applied_order:
+            filters["applied_order"] = result.applied_order
+        image_transformation = ImageTransformation(
+            identifier=result.identifier,
+            transformation=result.transformation_name,
+            filters=filters,
+            batch=self.transformation_batch,
+        )
+        processed = ProcessedImage(
+            identifier=result.identifier,
+            file=file_name,
+            encoder=self.transformer.encoder.name,
+            file_size=file_size,
+            transformation=image_transformation,
+        )
+        self._rows.append((image_transformation, processed))
+        self.processed_images.append(processed)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Writes the rows built since the last flush.
+        """
+        if not self._rows:
+            return
+        ImageTransformation.objects.bulk_create([rows[0] for rows in self._rows])
+        ProcessedImage.objects.bulk_create([rows[1] for rows in self._rows])
+        self._rows = []
@@ -0,0 +1,181 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent import futures as cfutures
+from typing import Any, Callable, TypeVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _worker_initializer() -> None:
+    """
+    Sets up Django once per worker process, so the modules needed by the
+    transformations are imported when the worker starts instead of on its first job.
+    """
+    import django
+
+    django.setup()
+
+
+class ImageProcessPool:
+    """
+    A long-lived process pool shared by every transformation job of the current
+    process.
+
+    The underlying executor is created on the first submit and reused by the
+    following ones. Each worker is replaced by a fresh one after running
+    `max_jobs` jobs, bounding the memory a worker can accumulate. Workers are
+    replaced one at a time, as each one reaches its limit.
+
+    Attributes:
+        max_workers (int | None): The number of worker processes, defaults to
+            the CPU count.
+        max_jobs (int | None): The jobs a worker runs before it is replaced,
+            None to never replace them.
+    """
+
+    def __init__(
+        self, max_workers: int | None = None, max_jobs: int | None = None
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._executor: cfutures.ProcessPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._lock = threading.Lock()
+
+    def submit(
+        self, fn: Callable[..., T], /, *args: Any, **kwargs: Any
+    ) -> cfutures.Future[T]:
+        """
+        Submits a job to the pool, starting its workers if needed.
+
+        Args:
+            fn (Callable[..., T]): The picklable callable to run in a worker.
+            *args (Any): The positional arguments of the callable.
+            **kwargs (Any): The keyword arguments of the callable.
+
+        Returns:
+            cfutures.Future[T]: The future of the job.
+        """
+        with self._lock:
+            return self._get_executor().submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shuts down the workers, a new executor is started on the next submit.
+
+        Args:
+            wait (bool, optional): Whether to wait for the pending jobs to finish.
+                Defaults to True.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self) -> cfutures.ProcessPoolExecutor:
+        if self._executor is not None and self._executor_pid != os.getpid():
+            # The pool was inherited from a forked parent, its workers belong to it
+            self._executor = None
+        if self._executor is None:
+            # Workers are started from a clean server process, forking the current
+            # one is unsafe once the result pipeline threads are running
+            self._executor = cfutures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_worker_initializer,
+                max_tasks_per_child=self.max_jobs or None,
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+
+_process_pool: ImageProcessPool | None = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ImageProcessPool:
+    """
+    Returns the process pool of the current process, creating it from the
+    `IMAGE_PROCESSING` settings on first use.
+
+    Returns:
+        ImageProcessPool: The shared process pool.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ImageProcessPool(
+                max_workers=settings.IMAGE_PROCESSING["POOL_MAX_WORKERS"],
+                max_jobs=settings.IMAGE_PROCESSING["POOL_MAX_JOBS"],
+            )
+            atexit.register(shutdown_process_pool)
+        return _process_pool
+
+
+def shutdown_process_pool(wait: bool = True) -> None:
+    """
+    Shuts down the process pool of the current process, if any.
+
+    Args:
+        wait (bool, optional): Whether to wait for the pending jobs to finish.
+            Defaults to True.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+_thread_pool: cfutures.ThreadPoolExecutor | None = None
+_thread_pool_pid: int | None = None
+_thread_pool_lock = threading.Lock()
+
+
+def get_thread_pool() -> cfutures.ThreadPoolExecutor:
+    """
+    Returns the thread pool of the current process, creating it from the
+    `IMAGE_PROCESSING` settings on first use.
+
+    Pillow releases the GIL in its filters, resampling and encoders, so the
+    threads of this pool run the heavy parts of the transformations in parallel
+    without pickling images between processes.
+
+    Returns:
+        cfutures.ThreadPoolExecutor: The shared thread pool.
+    """
+    global _thread_pool, _thread_pool_pid
+    with _thread_pool_lock:
+        if _thread_pool is not None and _thread_pool_pid != os.getpid():
+            # The pool was inherited from a forked parent, its threads are gone
+            _thread_pool = None
+        if _thread_pool is None:
+            _thread_pool = cfutures.ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING["THREAD_POOL_MAX_WORKERS"],
+                thread_name_prefix="image_processing",
+            )
+            _thread_pool_pid = os.getpid()
+            atexit.register(shutdown_thread_pool)
+        return _thread_pool
+
+
+def shutdown_thread_pool(wait: bool = True) -> None:
+    """
+    Shuts down the thread pool of the current process, if any.
+
+    Args:
+        wait (bool, optional): Whether to wait for the pending jobs to finish.
+            Defaults to True.
+    """
+    global _thread_pool
+    with _thread_pool_lock:
+        pool, _thread_pool = _thread_pool, None
+    if pool is not None and _thread_pool_pid == os.getpid():
+        pool.shutdown(wait=wait)
@@ -0,0 +1,349 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from django.conf import settings
+
+from apps.image_processing.constants import RESULT_CACHE_TRIM_RATIO
+
+if TYPE_CHECKING:
+    from apps.image_processing.core.transformers.base import (
+        InternalImageTransformationDefinition,
+    )
+
+logger = logging.getLogger(__name__)
+
+
+def result_cache_key(
+    source_hash: str,
+    transformations: list["InternalImageTransformationDefinition"],
+    **options: Any,
+) -> str:
+    """
+    Builds the cache key of a transformation result.
+
+    The key is a hash of the source content hash, the names and canonical filters
+    of the transformations in order, and any option that changes the result.
+
+    Args:
+        source_hash (str): The hash of the source image content.
+        transformations (list[InternalImageTransformationDefinition]): The
+            transformations that produce the result, in the order they are applied.
+        **options (Any): The options that change the result.
+
+    Returns:
+        str: The cache key.
+    """
+    payload = {
+        "source": source_hash,
+        "transformations": [
+            {
+                "transformation": transform_data.transformation.name,
+                "filters": asdict(transform_data.filters),
+            }
+            for transform_data in transformations
+        ],
+        "options": options,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class ResultCacheEntry:
+    """
+    A cached transformation result.
+
+    Attributes:
+        file_name (str): The storage name of the encoded result.
+        applied_order (list[str] | None): The order the transformations were
+            applied in, for reordered chains.
+        file_size (int | None): The size of the encoded result, in bytes.
+    """
+
+    file_name: str
+    applied_order: list[str] | None = None
+    file_size: int | None = None
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class BaseResultCache(ABC):
+    """
+    Maps result cache keys to the stored files of the results, evicting the least
+    recently used entries beyond `max_entries`.
+
+    Only the entries are evicted, the files belong to the `ProcessedImage` rows
+    that reference them.
+
+    Attributes:
+        max_entries (int): The max number of entries kept.
+        stats (ResultCacheStats): The hit, miss and eviction counters of the
+            current process.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.stats = ResultCacheStats()
+        self._stats_lock = threading.Lock()
+
+    def get(
+        self,
+        key: str,
+        validate: Callable[[ResultCacheEntry], bool] | None = None,
+    ) -> ResultCacheEntry | None:
+        """
+        Returns the entry of a key and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+            validate (Callable[[ResultCacheEntry], bool] | None, optional): Checks
+                the entry is still usable, e.g. its file exists. Invalid entries are
+                removed and count as misses. Defaults to None.
+
+        Returns:
+            ResultCacheEntry | None: The entry, None on a miss.
+        """
+        entry = self._get(key)
+        if entry is not None and validate is not None and not validate(entry):
+            self.delete(key)
+            entry = None
+        with self._stats_lock:
+            if entry is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return entry
+
+    def set(self, key: str, entry: ResultCacheEntry) -> None:
+        """
+        Stores the entry of a key, evicting the least recently used entries if the
+        cache is full.
+
+        Args:
+            key (str): The cache key.
+            entry (ResultCacheEntry): The entry.
+        """
+        self._set(key, entry)
+        evicted = self._evict()
+        if evicted:
+            with self._stats_lock:
+                self.stats.evictions += evicted
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Removes the entry of a key, if any.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def _get(self, key: str) -> ResultCacheEntry | None: ...
+
+    @abstractmethod
+    def _set(self, key: str, entry: ResultCacheEntry) -> None: ...
+
+    @abstractmethod
+    def _evict(self) -> int:
+        """
+        Evicts the least recently used entries beyond `max_entries`.
+
+        Returns:
+            int: The number of evicted entries.
+        """
+
+
+class InMemoryResultCache(BaseResultCache):
+    """
+    A result cache local to the current process.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        super().__init__(max_entries)
+        self._entries: OrderedDict[str, ResultCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: str) -> ResultCacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key: str, entry: ResultCacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+    def _evict(self) -> int:
+        evicted = 0
+        with self._lock:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+
+class FileSystemResultCache(BaseResultCache):
+    """
+    A result cache shared by every process of the host, one JSON file per entry.
+
+    The modification time of an entry file is its last use. Each process counts
+    the entries it stores, starting from the entries found on its first store,
+    and once the count passes `max_entries` the least recently used entries are
+    removed down to `trim_ratio` of `max_entries`. Entries stored by other
+    processes are only counted on the next trim, so the cache may briefly hold
+    more than `max_entries`.
+
+    Attributes:
+        location (Path): The directory of the entry files.
+        trim_ratio (float): The share of `max_entries` kept by a trim.
+    """
+
+    def __init__(
+        self,
+        location: str | Path,
+        max_entries: int,
+        trim_ratio: float = RESULT_CACHE_TRIM_RATIO,
+    ) -> None:
+        super().__init__(max_entries)
+        self.location = Path(location)
+        self.trim_ratio = trim_ratio
+        self._count: int | None = None
+        self._count_lock = threading.Lock()
+
+    def delete(self, key: str) -> None:
+        self._unlink(self._path(key))
+
+    def clear(self) -> None:
+        for path in self._paths():
+            path.unlink(missing_ok=True)
+        with self._count_lock:
+            self._count = 0
+
+    def __len__(self) -> int:
+        return len(self._paths())
+
+    def _path(self, key: str) -> Path:
+        return self.location / f"{key}.json"
+
+    def _paths(self) -> list[Path]:
+        if not self.location.is_dir():
+            return []
+        return list(self.location.glob("*.json"))
+
+    def _unlink(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._count_lock:
+            if self._count:
+                self._count -= 1
+
+    def _get(self, key: str) -> ResultCacheEntry | None:
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                entry = ResultCacheEntry(**json.load(file))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError) as error:
+            logger.warning(f"Discarding invalid result cache entry {path}: {error}")
+            self._unlink(path)
+            return None
+        return entry
+
+    def _set(self, key: str, entry: ResultCacheEntry) -> None:
+        self.location.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        created = not path.exists()
+        # Write then rename, so other processes never read a partial entry
+        temporary_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporary_path, "w") as file:
+            json.dump(asdict(entry), file)
+        os.replace(temporary_path, path)
+        with self._count_lock:
+            if self._count is None:
+                self._count = len(self._paths())
+            elif created:
+                self._count += 1
+
+    def _evict(self) -> int:
+        with self._count_lock:
+            if self._count is None or self._count <= self.max_entries:
+                return 0
+            paths = self._paths()
+            last_uses = []
+            for path in paths:
+                try:
+                    last_uses.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    continue
+            if len(last_uses) <= self.max_entries:
+                self._count = len(last_uses)
+                return 0
+            last_uses.sort()
+            evicted = last_uses[
+                : len(last_uses) - int(self.max_entries * self.trim_ratio)
+            ]
+            for _, path in evicted:
+                path.unlink(missing_ok=True)
+            self._count = len(last_uses) - len(evicted)
+        return len(evicted)
+
+
+_result_cache: BaseResultCache | None = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> BaseResultCache | None:
+    """
+    Returns the result cache of the current process, creating it from the
+    `IMAGE_PROCESSING` settings on first use.
+
+    Returns:
+        BaseResultCache | None: The result cache, None when it is disabled.
+    """
+    global _result_cache
+    if not settings.IMAGE_PROCESSING["RESULT_CACHE"]:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = FileSystemResultCache(
+                location=settings.IMAGE_PROCESSING["RESULT_CACHE_PATH"],
+                max_entries=settings.IMAGE_PROCESSING["RESULT_CACHE_MAX_ENTRIES"],
+            )
+        return _result_cache
@@ -1,5 +1,12 @@
+from collections import defaultdict
+from typing import Iterator, Type
+
 from PIL import Image as PImage
 
+from apps.image_processing.core.transformations.base import (
+    ImageSourceNode,
+    InternalImageTransformation,
+)
 from apps.image_processing.core.transformers.base import (
     InternalImageTransformationResult,
 )
@@ -8,9 +15,27 @@ from apps.image_processing.models import TransformationBatch
 from .base import BaseImageTransformer
 
 
+def _shares_work(transformation: Type[InternalImageTransformation]) -> bool:
+    """
+    Whether a transformation computes several outputs together with its own
+    `transform_many`, the default one computes them one by one.
+    """
+    for klass in transformation.__mro__:
+        if klass is InternalImageTransformation:
+            return False
+        if "transform_many" in vars(klass):
+            return True
+    return False
+
+
 class ImageSequentialTransformer(BaseImageTransformer):
     """
     Applies a list of transformations in sequence order to the input image.
+
+    Several transformations of a kind that overrides `transform_many` are
+    applied together with it, so they can share work, e.g. thumbnails of
+    different sizes share a resolution pyramid. The other ones are computed one
+    at a time, when their turn comes.
     """
 
     name = TransformationBatch.SEQUENTIAL
@@ -21,18 +46,42 @@ class ImageSequentialTransformer(BaseImageTransformer):
         """
         Applies transformations to an image in sequence order.
         """
-        transformations = []
-        for transform_data in self.transformations_data:
-            transformation = transform_data.transformation(
-                image,
-                transform_data.filters,
-            )
-            transformations.append(
-                InternalImageTransformationResult(
-                    identifier=transform_data.identifier,
-                    transformation_name=transform_data.transformation.name,
-                    applied_filters=transform_data.filters,
-                    image=transformation.image_transformed,
+        return list(self._stream(image))
+
+    def _stream(
+        self, image: PImage.Image
+    ) -> Iterator[InternalImageTransformationResult]:
+        groups: defaultdict[Type[InternalImageTransformation], list[int]] = defaultdict(
+            list
+        )
+        for index, transform_data in enumerate(self.transformations_data):
+            if _shares_work(transform_data.transformation):
+                groups[transform_data.transformation].append(index)
+
+        # Outputs of groups computed together, kept until their turn comes
+        images: dict[int, PImage.Image] = {}
+        source = ImageSourceNode(image)
+        for index, transform_data in enumerate(self.transformations_data):
+            indices = groups.get(transform_data.transformation, [])
+            if index in images:
+                transformed = images.pop(index)
+            elif len(indices) > 1:
+                outputs = transform_data.transformation.transform_many(
+                    image,
+                    [
+                        self.transformations_data[position].filters
+                        for position in indices
+                    ],
                 )
+                images.update(zip(indices[1:], outputs[1:]))
+                transformed = outputs[0]
+            else:
+                transformed = source.then(
+                    transform_data.transformation, transform_data.filters
+                ).evaluate()
+            yield InternalImageTransformationResult(
+                identifier=transform_data.identifier,
+                transformation_name=transform_data.transformation.name,
+                applied_filters=transform_data.filters,
+                image=transformed,
             )
-        return transformations
@@ -0,0 +1,173 @@
+import traceback
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Type
+
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformations.base import (
+    ExternalTransformationFilters,
+    InternalImageTransformation,
+)
+
+# Image modes that can be mapped on a shared buffer without copying it, with the
+# layout of their pixels in the buffer. Pillow stores RGB pixels padded to 4 bytes,
+# so they are shared as RGBX.
+SHARED_IMAGE_RAW_MODES = {
+    "L": "L",
+    "RGB": "RGBX",
+    "RGBX": "RGBX",
+    "RGBA": "RGBA",
+    "CMYK": "CMYK",
+    "I;16": "I;16",
+}
+_RAW_MODE_BYTES = {"L": 1, "RGBX": 4, "RGBA": 4, "CMYK": 4, "I;16": 2}
+
+
+@dataclass(frozen=True)
+class SharedImage:
+    """
+    A picklable reference to an image whose pixels live in shared memory.
+
+    Only the reference is sent to other processes, which rebuild the image on top
+    of the shared buffer without copying it.
+
+    Attributes:
+        name (str): The name of the shared memory block.
+        mode (str): The mode of the referenced image.
+        raw_mode (str): The layout of the pixels in the shared memory block.
+        size (tuple[int, int]): The size of the referenced image.
+    """
+
+    name: str
+    mode: str
+    raw_mode: str
+    size: tuple[int, int]
+
+    @staticmethod
+    def supports(image: PImage.Image) -> bool:
+        """
+        Checks whether the image mode can be shared without copying.
+        """
+        return image.mode in SHARED_IMAGE_RAW_MODES
+
+    @classmethod
+    def from_image(
+        cls, image: PImage.Image, track: bool = True
+    ) -> tuple["SharedImage", SharedMemory]:
+        """
+        Copies the image pixels once into a new shared memory block.
+
+        The caller owns the returned block and must close and unlink it once every
+        process is done with it.
+
+        Args:
+            image (PImage.Image): The image to share, its mode must be supported.
+            track (bool, optional): Whether the block is tracked by the resource
+                tracker of the current process. Defaults to True.
+
+        Returns:
+            tuple[SharedImage, SharedMemory]: The image reference and its block.
+        """
+        raw_mode = SHARED_IMAGE_RAW_MODES[image.mode]
+        width, height = image.size
+        memory = SharedMemory(
+            create=True,
+            size=max(width * height * _RAW_MODE_BYTES[raw_mode], 1),
+            track=track,
+        )
+        shared = cls(
+            name=memory.name, mode=image.mode, raw_mode=raw_mode, size=image.size
+        )
+        target = shared.open(memory)
+        target.readonly = False
+        target.paste(image)
+        return shared, memory
+
+    def attach(self) -> SharedMemory:
+        """
+        Attaches to the shared memory block created by another process.
+        """
+        return SharedMemory(name=self.name, track=False)
+
+    def open(self, memory: SharedMemory) -> PImage.Image:
+        """
+        Builds a read-only image on top of the shared buffer, without copying it.
+
+        Every reference to the returned image must be released before closing the
+        shared memory block.
+        """
+        return PImage.frombuffer(
+            self.raw_mode, self.size, memory.buf, "raw", self.raw_mode, 0, 1
+        )
+
+    def copy(self, memory: SharedMemory) -> PImage.Image:
+        """
+        Copies the shared pixels into a new image owned by the current process.
+        """
+        view = self.open(memory)
+        if view.mode != self.mode:
+            return view.convert(self.mode)
+        return view.copy()
+
+
+def transform_shared_image(
+    transformation: Type[InternalImageTransformation],
+    source: SharedImage,
+    filters: ExternalTransformationFilters,
+) -> SharedImage | PImage.Image:
+    """
+    Applies a transformation to a shared image inside a worker process.
+
+    The source image is rebuilt on top of the shared buffer and the result is
+    written to a new shared memory block, which the caller must unlink. Results
+    whose mode cannot be shared are returned as they are.
+
+    Args:
+        transformation (Type[InternalImageTransformation]): The transformation.
+        source (SharedImage): The reference to the source image.
+        filters (ExternalTransformationFilters): The filters of the transformation.
+
+    Returns:
+        SharedImage | PImage.Image: The reference to the transformed image, or the
+        transformed image itself.
+    """
+    source_memory = source.attach()
+    try:
+        image = source.open(source_memory)
+        try:
+            transformed = transformation(image, filters).image_transformed
+        except Exception as error:
+            # The frames of the traceback keep the image on top of the shared
+            # buffer, which could not be closed and would hide the error
+            traceback.clear_frames(error.__traceback__)
+            raise
+        finally:
+            del image
+        if not SharedImage.supports(transformed):
+            return transformed.copy()
+        result, result_memory = SharedImage.from_image(transformed, track=False)
+        result_memory.close()
+        if source.mode == "RGB" and result.mode == "RGBX":
+            # The source was mapped as RGBX, restore the mode it had
+            result = SharedImage(
+                name=result.name, mode="RGB", raw_mode=result.raw_mode, size=result.size
+            )
+        return result
+    finally:
+        source_memory.close()
+
+
+def load_shared_image_result(result: SharedImage | PImage.Image) -> PImage.Image:
+    """
+    Copies a result returned by `transform_shared_image` into the current process
+    and releases its shared memory block.
+    """
+    if isinstance(result, PImage.Image):
+        return result
+    memory = result.attach()
+    try:
+        return result.copy(memory)
+    finally:
+        memory.close()
+        memory.unlink()
@@ -0,0 +1,57 @@
+from typing import Iterator
+
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+    InternalImageTransformationResult,
+)
+from apps.image_processing.core.transformers.pool import get_thread_pool
+from apps.image_processing.models import TransformationBatch
+
+from .base import BaseImageTransformer
+
+
+def _apply_transformation(
+    image: PImage.Image, transform_data: InternalImageTransformationDefinition
+) -> InternalImageTransformationResult:
+    transformation = transform_data.transformation(image, transform_data.filters)
+    return InternalImageTransformationResult(
+        identifier=transform_data.identifier,
+        transformation_name=transform_data.transformation.name,
+        applied_filters=transform_data.filters,
+        image=transformation.image_transformed,
+    )
+
+
+class ImageThreadedTransformer(BaseImageTransformer):
+    """
+    Applies independent transformations in parallel on the shared thread pool.
+
+    Pillow releases the GIL while filtering, resampling and encoding, so threads
+    share the decoded image without spawning processes or pickling it. The
+    transformed images are encoded on the same pool.
+    """
+
+    name = TransformationBatch.THREADED
+
+    def _transform(
+        self, image: PImage.Image
+    ) -> list[InternalImageTransformationResult]:
+        """
+        Applies transformations to an image using the shared thread pool.
+        """
+        return list(self._stream(image))
+
+    def _stream(
+        self, image: PImage.Image
+    ) -> Iterator[InternalImageTransformationResult]:
+        # Decode once before the threads read the image concurrently
+        image.load()
+        pool = get_thread_pool()
+        futures = [
+            pool.submit(_apply_transformation, image, transform_data)
+            for transform_data in self.transformations_data
+        ]
+        # The work is submitted before returning, the results are collected lazily
+        return (future.result() for future in futures)
@@ -0,0 +1,154 @@
+from io import BytesIO
+from typing import Iterator
+
+from django.conf import settings
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+    InternalImageTransformationResult,
+)
+from apps.image_processing.core.transformers.encoders import ImageEncoder
+from apps.image_processing.models import TransformationBatch
+
+from .base import BaseImageTransformer
+
+
+def is_tile_local(transformations: list[InternalImageTransformationDefinition]) -> bool:
+    """
+    Whether every transformation can be applied by tiles.
+    """
+    return all(
+        transform_data.transformation.tile_halo(transform_data.filters) is not None
+        for transform_data in transformations
+    )
+
+
+class ImageTiledTransformer(BaseImageTransformer):
+    """
+    Applies independent tile-local transformations to horizontal strips of the
+    image, so very large images are transformed within a bounded memory.
+
+    Each strip is read with the rows of context its transformation needs around it,
+    transformed, and written to the output image. Every output is encoded as soon
+    as it is complete and only kept encoded, so a single decoded output is held at
+    any time besides the source.
+    """
+
+    name = TransformationBatch.TILED
+
+    def __init__(
+        self,
+        transformations: list[InternalImageTransformationDefinition],
+        memory_limit: int | None = None,
+        encoder: ImageEncoder | None = None,
+    ) -> None:
+        """
+        Initializes the ImageTiledTransformer with a list of tile-local
+        transformations.
+
+        Args:
+            transformations (list[InternalImageTransformationDefinition]): The
+                transformations to apply.
+            memory_limit (int | None, optional): The max bytes used to transform a
+                strip. Defaults to `IMAGE_PROCESSING["TILED_MEMORY_LIMIT"]`.
+            encoder (ImageEncoder | None, optional): The encoder of the saved
+                results. Defaults to the encoder of the settings.
+
+        Raises:
+            ValueError: If a transformation is not tile-local.
+        """
+        if not is_tile_local(transformations):
+            raise ValueError("Every transformation must be tile-local to be tiled")
+        super().__init__(transformations, encoder)
+        self.memory_limit = (
+            settings.IMAGE_PROCESSING["TILED_MEMORY_LIMIT"]
+            if memory_limit is None
+            else memory_limit
+        )
+        self._encoded: dict[int, bytes] = {}
+
+    def strip_height(self, image: PImage.Image, halo: int, bands: int) -> int:
+        """
+        The rows of the strips that fit the memory limit.
+
+        A strip holds its rows and the rows of context, once read from the source,
+        once as the transformation input and once transformed.
+
+        Args:
+            image (PImage.Image): The image to transform.
+            halo (int): The rows of context above and below each strip.
+            bands (int): The number of bands of the transformed image.
+
+        Returns:
+            int: The rows of each strip, at least one.
+        """
+        source_bands = len(image.getbands())
+        row_bytes = image.width * (2 * source_bands + bands)
+        return max(1, self.memory_limit // row_bytes - 2 * halo)
+
+    def _transform_by_strips(
+        self,
+        image: PImage.Image,
+        transform_data: InternalImageTransformationDefinition,
+    ) -> PImage.Image:
+        transformation = transform_data.transformation
+        halo = transformation.tile_halo(transform_data.filters) or 0
+        _, bands = transformation.estimate_output(
+            image.size, len(image.getbands()), transform_data.filters
+        )
+        rows = self.strip_height(image, halo, bands)
+        width, height = image.size
+        output: PImage.Image | None = None
+        for top in range(0, height, rows):
+            bottom = min(top + rows, height)
+            context_top = max(0, top - halo)
+            strip = image.crop((0, context_top, width, min(bottom + halo, height)))
+            transformed = transformation(
+                strip, transform_data.filters
+            ).image_transformed
+            if output is None:
+                output = PImage.new(transformed.mode, image.size)
+            output.paste(
+                transformed.crop((0, top - context_top, width, bottom - context_top)),
+                (0, top),
+            )
+        if output is None:
+            # Empty image, nothing to split
+            return transformation(image, transform_data.filters).image_transformed
+        return output
+
+    def _transform(
+        self, image: PImage.Image
+    ) -> list[InternalImageTransformationResult]:
+        """
+        Applies transformations to an image by strips, one transformation after
+        the other.
+        """
+        return list(self._stream(image))
+
+    def _stream(
+        self, image: PImage.Image
+    ) -> Iterator[InternalImageTransformationResult]:
+        image.load()
+        self._encoded.clear()
+        for transform_data in self.transformations_data:
+            encoded = self._encode(self._transform_by_strips(image, transform_data))
+            # Keep the output encoded, it is decoded again only if it is read
+            transformed = PImage.open(BytesIO(encoded))
+            self._encoded[id(transformed)] = encoded
+            yield InternalImageTransformationResult(
+                identifier=transform_data.identifier,
+                transformation_name=transform_data.transformation.name,
+                applied_filters=transform_data.filters,
+                image=transformed,
+            )
+
+    def _encode_result(
+        self, transform_data: InternalImageTransformationResult
+    ) -> bytes:
+        """
+        Returns the image encoded while transforming, instead of encoding it again.
+        """
+        encoded = self._encoded.pop(id(transform_data.image), None)
+        return self._encode(transform_data.image) if encoded is None else encoded
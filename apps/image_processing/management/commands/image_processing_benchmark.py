@@ -0,0 +1,38 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.image_processing.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Runs the image processing benchmarks and prints their results"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "benchmarks",
+            nargs="*",
+            choices=sorted(BENCHMARKS),
+            help="The benchmarks to run (all by default)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        for name in options["benchmarks"] or sorted(BENCHMARKS):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Benchmark: {name}"))
+            rows = BENCHMARKS[name]()
+            if not rows:
+                continue
+            columns = list(rows[0])
+            widths = {
+                column: max(len(column), *(len(str(row[column])) for row in rows))
+                for column in columns
+            }
+            self.stdout.write(
+                "  ".join(column.ljust(widths[column]) for column in columns).rstrip()
+            )
+            for row in rows:
+                self.stdout.write(
+                    "  ".join(
+                        str(row[column]).ljust(widths[column]) for column in columns
+                    ).rstrip()
+                )
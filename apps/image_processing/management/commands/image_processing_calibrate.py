@@ -0,0 +1,76 @@
+from dataclasses import asdict
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.cost_model import (
+    calibrate_cost_model,
+    get_cost_model,
+)
+from apps.image_processing.core.transformers.pool import (
+    shutdown_process_pool,
+    shutdown_thread_pool,
+)
+from apps.image_processing.models import ImageTransformation
+from apps.image_processing.utils import transformations_mapper
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the transformer cost model on this host and stores it for the "
+        "workers to load at startup"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--output",
+            default=settings.IMAGE_PROCESSING["COST_MODEL_PATH"],
+            help="The path of the cost model (IMAGE_PROCESSING['COST_MODEL_PATH'] by default)",
+        )
+        parser.add_argument(
+            "--size",
+            nargs=2,
+            type=int,
+            default=(2000, 1500),
+            metavar=("WIDTH", "HEIGHT"),
+            help="The size of the image the transformations are measured on",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="How many times each measure is taken, the best one is kept",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        transformations = []
+        for name in ImageTransformation.IMAGE_TRANSFORMATION_CHOICES:
+            mapper = transformations_mapper(transformation_name=name)
+            transformations.append(
+                InternalImageTransformationDefinition(
+                    identifier=name,
+                    transformation=mapper.transformation,
+                    filters=mapper.filters,
+                )
+            )
+        try:
+            cost_model = calibrate_cost_model(
+                transformations,
+                image_size=tuple(options["size"]),
+                repeat=options["repeat"],
+            )
+        finally:
+            shutdown_process_pool()
+            shutdown_thread_pool()
+        cost_model.dump(options["output"])
+        get_cost_model.cache_clear()
+
+        for name, value in asdict(cost_model).items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Cost model written to {options['output']}")
+        )
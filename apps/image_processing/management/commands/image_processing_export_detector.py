@@ -0,0 +1,102 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.image_processing.constants import (
+    DETECTOR_EXPORT_MIN_AGREEMENT,
+    DETECTOR_FORMAT,
+)
+from apps.image_processing.core.detectors.export import (
+    DETECTOR_EXPORT_IMAGE_SIZE,
+    detect_tags,
+    export_detector_model,
+    sample_images,
+    tag_agreement,
+)
+
+EXPORT_FORMATS = [
+    format for format in DETECTOR_FORMAT if format != DETECTOR_FORMAT.PYTORCH
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the detector model to a CPU runtime and checks it suggests the "
+        "same tags as its PyTorch weights"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--model",
+            default=settings.IMAGE_PROCESSING["DETECTOR_MODEL"],
+            help="The PyTorch weights to export (IMAGE_PROCESSING['DETECTOR_MODEL'] by default)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default=(
+                settings.IMAGE_PROCESSING["DETECTOR_FORMAT"]
+                if settings.IMAGE_PROCESSING["DETECTOR_FORMAT"] in EXPORT_FORMATS
+                else DETECTOR_FORMAT.ONNX
+            ),
+            help="The format of the export (IMAGE_PROCESSING['DETECTOR_FORMAT'] by default)",
+        )
+        parser.add_argument(
+            "--int8",
+            action="store_true",
+            default=settings.IMAGE_PROCESSING["DETECTOR_INT8"],
+            help="Quantize the export to int8, openvino only",
+        )
+        parser.add_argument(
+            "--output",
+            default=settings.IMAGE_PROCESSING["DETECTOR_EXPORT_PATH"],
+            help="The directory of the exported models (IMAGE_PROCESSING['DETECTOR_EXPORT_PATH'] by default)",
+        )
+        parser.add_argument(
+            "--image-size",
+            type=int,
+            default=DETECTOR_EXPORT_IMAGE_SIZE,
+            help="The input size of the export",
+        )
+        parser.add_argument(
+            "--data",
+            help="The dataset the int8 quantization is calibrated on",
+        )
+        parser.add_argument(
+            "--images",
+            nargs="*",
+            help="The images the export is checked on (the ultralytics samples by default)",
+        )
+        parser.add_argument(
+            "--min-agreement",
+            type=float,
+            default=DETECTOR_EXPORT_MIN_AGREEMENT,
+            help="The min tag agreement with the PyTorch weights",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            path = export_detector_model(
+                options["model"],
+                DETECTOR_FORMAT(options["format"]),
+                int8=options["int8"],
+                export_path=options["output"],
+                image_size=options["image_size"],
+                data=options["data"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Exported {options['model']} to {path}")
+
+        images = options["images"] or sample_images()
+        agreement = tag_agreement(
+            detect_tags(options["model"], images), detect_tags(str(path), images)
+        )
+        self.stdout.write(f"Tag agreement on {len(images)} images: {agreement:.3f}")
+        if agreement < options["min_agreement"]:
+            raise CommandError(
+                f"The export agrees on {agreement:.3f} of the tags, "
+                f"below {options['min_agreement']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Exported model {path} is valid"))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("image_processing", "0005_alter_transformationbatch_input_image"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transformationbatch",
+            name="transformer",
+            field=models.CharField(
+                choices=[
+                    ("multiprocess", "multiprocess"),
+                    ("sequential", "sequential"),
+                    ("chain", "chain"),
+                    ("threaded", "threaded"),
+                ],
+                max_length=100,
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("image_processing", "0006_alter_transformationbatch_transformer"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transformationbatch",
+            name="transformer",
+            field=models.CharField(
+                choices=[
+                    ("multiprocess", "multiprocess"),
+                    ("sequential", "sequential"),
+                    ("chain", "chain"),
+                    ("threaded", "threaded"),
+                    ("tiled", "tiled"),
+                ],
+                max_length=100,
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("image_processing", "0007_alter_transformationbatch_transformer"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="imagetransformation",
+            name="transformation",
+            field=models.CharField(
+                choices=[
+                    ("thumbnail", "thumbnail"),
+                    ("blur", "blur"),
+                    ("black_and_white", "black_and_white"),
+                    ("brightness", "brightness"),
+                    ("threshold", "threshold"),
+                ],
+                max_length=100,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("image_processing", "0008_alter_imagetransformation_transformation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="processedimage",
+            name="encoder",
+            field=models.CharField(default="png:balanced", max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="processedimage",
+            name="file_size",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-17 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("image_processing", "0009_processedimage_encoder_processedimage_file_size"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transformationbatch",
+            name="transformer",
+            field=models.CharField(
+                choices=[
+                    ("multiprocess", "multiprocess"),
+                    ("sequential", "sequential"),
+                    ("chain", "chain"),
+                    ("threaded", "threaded"),
+                    ("tiled", "tiled"),
+                    ("graph", "graph"),
+                ],
+                max_length=100,
+            ),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-17 16:40
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("image_processing", "0010_alter_transformationbatch_transformer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DetectionResult",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, primary_key=True, serialize=False
+                    ),
+                ),
+                ("content_hash", models.CharField(max_length=64)),
+                ("model_version", models.CharField(max_length=255)),
+            ],
+            options={
+                "unique_together": {("content_hash", "model_version")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DetectionObject",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, primary_key=True, serialize=False
+                    ),
+                ),
+                ("class_id", models.PositiveIntegerField()),
+                ("class_name", models.CharField(db_index=True, max_length=100)),
+                ("confidence", models.FloatField()),
+                ("x1", models.FloatField()),
+                ("y1", models.FloatField()),
+                ("x2", models.FloatField()),
+                ("y2", models.FloatField()),
+                (
+                    "result",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="detected_objects",
+                        to="image_processing.detectionresult",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-confidence"],
+            },
+        ),
+    ]
@@ -19,10 +19,16 @@ class TransformationBatch(BaseModel):
     MULTIPROCESS = "multiprocess"
     SEQUENTIAL = "sequential"
     CHAIN = "chain"
+    THREADED = "threaded"
+    TILED = "tiled"
+    GRAPH = "graph"
     TRANSFORMER_CHOICES = {
         MULTIPROCESS: MULTIPROCESS,
         SEQUENTIAL: SEQUENTIAL,
         CHAIN: CHAIN,
+        THREADED: THREADED,
+        TILED: TILED,
+        GRAPH: GRAPH,
     }
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
@@ -36,10 +42,14 @@ class ImageTransformation(BaseModel):
     THUMBNAIL = "thumbnail"
     BLUR = "blur"
     BLACK_AND_WHITE = "black_and_white"
+    BRIGHTNESS = "brightness"
+    THRESHOLD = "threshold"
     IMAGE_TRANSFORMATION_CHOICES = {
         THUMBNAIL: THUMBNAIL,
         BLUR: BLUR,
         BLACK_AND_WHITE: BLACK_AND_WHITE,
+        BRIGHTNESS: BRIGHTNESS,
+        THRESHOLD: THRESHOLD,
     }
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
@@ -57,6 +67,9 @@ class ProcessedImage(BaseModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     identifier = models.CharField(max_length=100)
     file = models.ImageField(upload_to="image_processing/processed/")
+    # Output format and profile the file was encoded with, e.g. "png:balanced"
+    encoder = models.CharField(max_length=50)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
     transformation = models.OneToOneField(
         ImageTransformation, on_delete=models.PROTECT, related_name="processed_image"
     )
@@ -64,3 +77,32 @@ class ProcessedImage(BaseModel):
     @property
     def url(self) -> str:
         return self.file.url  # type: ignore[no-any-return]
+
+
+class DetectionResult(BaseModel):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    # SHA-256 of the detected image file content
+    content_hash = models.CharField(max_length=64)
+    # Weights or exported model the objects were detected with, e.g. "yolo11l.pt"
+    model_version = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ["content_hash", "model_version"]
+
+
+class DetectionObject(BaseModel):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    result = models.ForeignKey(
+        DetectionResult, on_delete=models.CASCADE, related_name="detected_objects"
+    )
+    class_id = models.PositiveIntegerField()
+    class_name = models.CharField(max_length=100, db_index=True)
+    confidence = models.FloatField()
+    # Box corners in pixels of the source image
+    x1 = models.FloatField()
+    y1 = models.FloatField()
+    x2 = models.FloatField()
+    y2 = models.FloatField()
+
+    class Meta:
+        ordering = ["-confidence"]
@@ -1,8 +1,18 @@
 import logging
+from collections import deque
+from typing import Any
 
+from django.conf import settings
+
+from apps.image_processing.core.managers.base import BaseImageManager
 from apps.image_processing.core.transformers.base import (
     ExternalImageTransformationDefinition,
     InternalImageTransformationResult,
+    TransformationRun,
+)
+from apps.image_processing.core.transformers.encoders import get_encoder
+from apps.image_processing.core.transformers.graph import (
+    has_parent_transformations,
 )
 from apps.image_processing.models import (
     ProcessingImage,
@@ -23,6 +33,9 @@ def image_local_transform(
     image_id: str,
     transformations: list[ExternalImageTransformationDefinition],
     is_chain: bool = False,
+    include_intermediates: bool = False,
+    output_format: str | None = None,
+    output_profile: str | None = None,
 ) -> list[InternalImageTransformationResult]:
     """
     Applies a series of transformations to a image and saves the transformed
@@ -35,6 +48,13 @@ def image_local_transform(
             transformation definitions to apply to the image.
         is_chain (bool, optional): A flag indicating whether to use a chain
             transformer. Defaults to False.
+        include_intermediates (bool, optional): A flag indicating whether a chain
+            or graph transformer should also save every intermediate result.
+            Defaults to False.
+        output_format (str | None, optional): The format the transformed images
+            are saved in. Defaults to `IMAGE_PROCESSING["OUTPUT_FORMAT"]`.
+        output_profile (str | None, optional): The speed/size profile of the
+            output encoder. Defaults to `IMAGE_PROCESSING["OUTPUT_PROFILE"]`.
 
     Returns:
         list[InternalTransformationManagerSaveResult]: A list containing the
@@ -44,14 +64,132 @@ def image_local_transform(
     internal_transformations = get_internal_transformations(
         external_transformations=transformations
     )
+    is_graph = has_parent_transformations(internal_transformations)
+    manager = get_manager_strategy()
+    # The transformer is planned from the image header, before decoding it
+    image_manager = manager(image=image)
     transformer = get_transformer_strategy(
-        transformations=internal_transformations, is_chain=is_chain
+        transformations=internal_transformations,
+        is_chain=is_chain,
+        is_graph=is_graph,
+        image_size=image_manager.get_metadata().size,
     )
-    manager = get_manager_strategy()
 
-    image_manager = manager(
-        image=image,
-        transformer=transformer(transformations=internal_transformations),
+    transformer_options: dict[str, Any] = {
+        "encoder": get_encoder(output_format, output_profile)
+    }
+    if (is_chain or is_graph) and include_intermediates:
+        transformer_options["include_intermediates"] = include_intermediates
+
+    image_manager.transformer = transformer(
+        transformations=internal_transformations, **transformer_options
     )
     transformations_applied = image_manager.apply_transformations()
     return transformations_applied
+
+
+def images_local_transform(
+    user_id: int,
+    image_ids: list[str],
+    transformations: list[ExternalImageTransformationDefinition],
+    is_chain: bool = False,
+    include_intermediates: bool = False,
+    output_format: str | None = None,
+    output_profile: str | None = None,
+) -> dict[str, list[InternalImageTransformationResult]]:
+    """
+    Applies the same series of transformations to several images and saves the
+    transformed images locally, each image in its own TransformationBatch.
+
+    The transformations and the encoder are resolved once for every image. The
+    transformations of the next `IMAGE_PROCESSING["BATCH_PREFETCH_IMAGES"]`
+    images are started before the results of the current one are saved, so the
+    shared pools keep working across images instead of draining after each one.
+
+    A failing image does not stop the others, the first error is raised once
+    every image has been transformed.
+
+    Args:
+        user_id (int): The user_id who is performing the transformation.
+        image_ids (list[str]): The ids of the ProcessingImages to be transformed.
+        transformations (list[ExternalImageTransformationDefinition]): A list of
+            transformation definitions to apply to every image.
+        is_chain (bool, optional): A flag indicating whether to use a chain
+            transformer. Defaults to False.
+        include_intermediates (bool, optional): A flag indicating whether a chain
+            or graph transformer should also save every intermediate result.
+            Defaults to False.
+        output_format (str | None, optional): The format the transformed images
+            are saved in. Defaults to `IMAGE_PROCESSING["OUTPUT_FORMAT"]`.
+        output_profile (str | None, optional): The speed/size profile of the
+            output encoder. Defaults to `IMAGE_PROCESSING["OUTPUT_PROFILE"]`.
+
+    Returns:
+        dict[str, list[InternalImageTransformationResult]]: The results of each
+        transformed image, by image id.
+    """
+    images_by_id = {
+        str(image.id): image
+        for image in ProcessingImage.objects.filter(id__in=image_ids, user_id=user_id)
+    }
+    # Transformed in the requested order, the query does not keep it
+    images = [
+        images_by_id[str(image_id)]
+        for image_id in image_ids
+        if str(image_id) in images_by_id
+    ]
+    internal_transformations = get_internal_transformations(
+        external_transformations=transformations
+    )
+    is_graph = has_parent_transformations(internal_transformations)
+    manager = get_manager_strategy()
+
+    transformer_options: dict[str, Any] = {
+        "encoder": get_encoder(output_format, output_profile)
+    }
+    if (is_chain or is_graph) and include_intermediates:
+        transformer_options["include_intermediates"] = include_intermediates
+
+    def start(
+        image: ProcessingImage,
+    ) -> tuple[str, BaseImageManager, TransformationRun]:
+        image_manager = manager(image=image)
+        transformer = get_transformer_strategy(
+            transformations=internal_transformations,
+            is_chain=is_chain,
+            is_graph=is_graph,
+            image_size=image_manager.get_metadata().size,
+            images=len(images),
+        )
+        image_manager.transformer = transformer(
+            transformations=internal_transformations, **transformer_options
+        )
+        return str(image.id), image_manager, image_manager.start_transformations()
+
+    prefetch = max(0, settings.IMAGE_PROCESSING["BATCH_PREFETCH_IMAGES"])
+    pending = iter(images)
+    started: deque[tuple[str, BaseImageManager, TransformationRun]] = deque()
+    results: dict[str, list[InternalImageTransformationResult]] = {}
+    first_error: Exception | None = None
+    while True:
+        while len(started) <= prefetch:
+            image = next(pending, None)
+            if image is None:
+                break
+            try:
+                started.append(start(image))
+            except Exception as error:
+                logger.exception(f"Error starting the transformations of {image.id}")
+                first_error = first_error or error
+        if not started:
+            break
+        image_id, image_manager, run = started.popleft()
+        try:
+            results[image_id] = image_manager.apply_transformations(run)
+        except Exception as error:
+            logger.exception(f"Error transforming image {image_id}")
+            first_error = first_error or error
+
+    if first_error is not None:
+        raise first_error
+    return results
@@ -1,34 +1,112 @@
 from typing import Type
 
-from apps.image_processing.constants import TRANSFORMATIONS_MULTIPROCESS_TRESHOLD
+from django.conf import settings
+
+from apps.image_processing.constants import (
+    TRANSFORMATIONS_MULTIPROCESS_TRESHOLD,
+    TRANSFORMATIONS_THREADED_TRESHOLD,
+)
 from apps.image_processing.core.managers.base import BaseImageManager
 from apps.image_processing.core.managers.local import ImageLocalManager
+from apps.image_processing.core.managers.storage import (
+    ImageStorageManager,
+    storage_has_paths,
+)
 from apps.image_processing.core.transformers.base import (
     BaseImageTransformer,
     InternalImageTransformationDefinition,
 )
 from apps.image_processing.core.transformers.chain import ImageChainTransformer
+from apps.image_processing.core.transformers.cost_model import get_cost_model
+from apps.image_processing.core.transformers.graph import ImageGraphTransformer
 from apps.image_processing.core.transformers.multiprocess import (
     ImageMultiProcessTransformer,
 )
 from apps.image_processing.core.transformers.sequential import (
     ImageSequentialTransformer,
 )
+from apps.image_processing.core.transformers.threaded import ImageThreadedTransformer
+from apps.image_processing.core.transformers.tiled import (
+    ImageTiledTransformer,
+    is_tile_local,
+)
+from apps.image_processing.models import ProcessingImage
+
+INDEPENDENT_TRANSFORMERS: dict[str, Type[BaseImageTransformer]] = {
+    transformer.name: transformer
+    for transformer in (
+        ImageSequentialTransformer,
+        ImageThreadedTransformer,
+        ImageMultiProcessTransformer,
+    )
+}
 
 
 def get_transformer_strategy(
     transformations: list[InternalImageTransformationDefinition],
     is_chain: bool = False,
+    is_graph: bool = False,
+    image_size: tuple[int, int] | None = None,
+    images: int = 1,
 ) -> Type[BaseImageTransformer]:
+    """
+    Picks the transformer that applies the transformations.
+
+    Independent transformations on an image of known size run by strips when the
+    image has at least `IMAGE_PROCESSING["TILED_MIN_PIXELS"]` pixels and every
+    transformation is tile-local, otherwise with the transformer the host cost
+    model estimates as the fastest. Without the image size the choice falls back
+    to the number of transformations.
+
+    Args:
+        transformations (list[InternalImageTransformationDefinition]): The
+            transformations to apply.
+        is_chain (bool, optional): Whether the transformations are chained.
+            Defaults to False.
+        is_graph (bool, optional): Whether some transformations are applied to
+            the output of others. Defaults to False.
+        image_size (tuple[int, int] | None, optional): The size of the image to
+            transform. Defaults to None.
+        images (int, optional): The number of images of that size transformed
+            together, as their work shares the pools. Defaults to 1.
+
+    Returns:
+        Type[BaseImageTransformer]: The transformer class.
+    """
     transformer: Type[BaseImageTransformer] = ImageSequentialTransformer
-    if is_chain:
+    if is_graph:
+        transformer = ImageGraphTransformer
+    elif is_chain:
         transformer = ImageChainTransformer
+    elif (
+        image_size is not None
+        and image_size[0] * image_size[1]
+        >= settings.IMAGE_PROCESSING["TILED_MIN_PIXELS"]
+        and is_tile_local(transformations)
+    ):
+        transformer = ImageTiledTransformer
+    elif image_size is not None:
+        transformer = INDEPENDENT_TRANSFORMERS[
+            get_cost_model().choose(transformations, image_size, images=images)
+        ]
     elif len(transformations) >= TRANSFORMATIONS_MULTIPROCESS_TRESHOLD:
         transformer = ImageMultiProcessTransformer
+    elif len(transformations) >= TRANSFORMATIONS_THREADED_TRESHOLD:
+        transformer = ImageThreadedTransformer
 
     return transformer
 
 
 def get_manager_strategy() -> Type[BaseImageManager]:
-    # Currently, only local image processing is supported
-    return ImageLocalManager
+    """
+    Picks the manager that reads the images.
+
+    Images on the local filesystem are opened by path, so uncompressed ones are
+    memory-mapped, other storages are read through their file objects.
+
+    Returns:
+        Type[BaseImageManager]: The manager class.
+    """
+    if storage_has_paths(ProcessingImage._meta.get_field("file").storage):
+        return ImageLocalManager
+    return ImageStorageManager
@@ -1,6 +1,9 @@
 import pytest
+from django.core.files.storage import storages
 from PIL import Image as PImage
 
+from apps.image_processing.core.managers import source_cache as source_cache_module
+from apps.image_processing.core.managers.source_cache import get_source_cache
 from apps.image_processing.core.transformations.black_and_white import (
     ExternalTransformationFiltersBlackAndWhite,
     TransformationBlackAndWhite,
@@ -13,10 +16,13 @@ from apps.image_processing.core.transformations.thumbnail import (
     ExternalTransformationFiltersThumbnail,
     TransformationThumbnail,
 )
+from apps.image_processing.core.transformers import result_cache as result_cache_module
 from apps.image_processing.core.transformers.base import (
     ExternalImageTransformationDefinition,
     InternalImageTransformationDefinition,
 )
+from apps.image_processing.core.transformers.pool import shutdown_thread_pool
+from apps.image_processing.core.transformers.result_cache import get_result_cache
 from apps.image_processing.tests.factories import ProcessingImageFactory
 
 
@@ -75,3 +81,48 @@ def external_image_transformations():
             filters=ExternalTransformationFiltersBlackAndWhite(dither=None),
         ),
     ]
+
+
+@pytest.fixture
+def thread_pool():
+    """Shuts down the shared thread pool, so later tests do not fork with live threads."""
+    yield
+    shutdown_thread_pool()
+
+
+@pytest.fixture
+def result_cache(tmp_path, settings):
+    """Enables the result cache on a temporary directory."""
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "RESULT_CACHE": True,
+        "RESULT_CACHE_PATH": tmp_path / "result_cache",
+    }
+    result_cache_module._result_cache = None
+    yield get_result_cache()
+    result_cache_module._result_cache = None
+
+
+@pytest.fixture
+def source_cache(settings):
+    """Enables the decoded source cache."""
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "SOURCE_CACHE_MAX_BYTES": 16 * 1024 * 1024,
+    }
+    source_cache_module._source_cache = None
+    yield get_source_cache()
+    source_cache_module._source_cache = None
+
+
+@pytest.fixture
+def slow_storage(tmp_path, settings):
+    """Stores the files in a storage without local paths that simulates latency."""
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {
+            "BACKEND": "apps.image_processing.tests.storage.SlowStorage",
+            "OPTIONS": {"location": tmp_path / "storage"},
+        },
+    }
+    return storages["default"]
@@ -0,0 +1,54 @@
+import io
+import time
+from datetime import datetime
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, Storage
+
+
+class _CountingReader(io.BufferedReader):
+    def __init__(self, raw: io.RawIOBase, storage: "SlowStorage") -> None:
+        super().__init__(raw)
+        self._storage = storage
+
+    def read(self, size: int | None = -1) -> bytes:
+        data = super().read(size)
+        self._storage.bytes_read += len(data)
+        return data
+
+
+class SlowStorage(Storage):
+    """
+    A local directory standing in for a remote storage: its files have no local
+    path, and opening or saving one waits `latency` seconds. The bytes read from
+    its files are counted in `bytes_read`.
+    """
+
+    def __init__(self, location: str, latency: float = 0.005) -> None:
+        self._storage = FileSystemStorage(location=location)
+        self.latency = latency
+        self.bytes_read = 0
+
+    def _open(self, name: str, mode: str = "rb") -> File:
+        time.sleep(self.latency)
+        raw = io.FileIO(self._storage.path(name), mode.replace("b", ""))
+        return File(_CountingReader(raw, self), name=name)
+
+    def _save(self, name: str, content: File) -> str:
+        time.sleep(self.latency)
+        return self._storage._save(name, content)
+
+    def delete(self, name: str) -> None:
+        self._storage.delete(name)
+
+    def exists(self, name: str) -> bool:
+        return self._storage.exists(name)
+
+    def size(self, name: str) -> int:
+        return self._storage.size(name)
+
+    def url(self, name: str | None) -> str:
+        return f"/slow/{name}"
+
+    def get_modified_time(self, name: str) -> datetime:
+        return self._storage.get_modified_time(name)
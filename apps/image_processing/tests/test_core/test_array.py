@@ -0,0 +1,102 @@
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from apps.image_processing.core.transformations.array import (
+    IDENTITY_TABLE,
+    GrayscaleOperation,
+    LookupOperation,
+    apply_array_operations,
+    fuse_array_operations,
+)
+
+INVERT = LookupOperation(tuple(255 - value for value in range(256)))
+HALF = LookupOperation(tuple(value // 2 for value in range(256)))
+THRESHOLD = LookupOperation(tuple(255 if value >= 100 else 0 for value in range(256)))
+
+
+def _noise_image(mode):
+    bands = [
+        Image.effect_noise((70, 40), 90),
+        Image.linear_gradient("L").resize((70, 40)),
+        Image.effect_noise((70, 40), 30),
+        Image.linear_gradient("L").rotate(90).resize((70, 40)),
+    ]
+    return Image.merge(mode, bands[: len(mode)])
+
+
+def _pillow_operations(image, operations):
+    for operation in operations:
+        if isinstance(operation, GrayscaleOperation):
+            image = image.convert("L")
+        else:
+            color_bands = 1 if image.mode in ("L", "LA") else 3
+            alpha_bands = len(image.getbands()) - color_bands
+            image = image.point(
+                list(operation.table) * color_bands + list(IDENTITY_TABLE) * alpha_bands
+            )
+    return image
+
+
+def test_lookup_operation_then():
+    fused = INVERT.then(HALF)
+
+    assert fused.table[0] == 127
+    assert fused.table[255] == 0
+    assert INVERT.then(INVERT).table == IDENTITY_TABLE
+
+
+def test_fuse_array_operations():
+    before, grayscale, after = fuse_array_operations(
+        [INVERT, HALF, GrayscaleOperation(), THRESHOLD, GrayscaleOperation(), INVERT]
+    )
+
+    assert before == INVERT.then(HALF)
+    assert grayscale
+    assert after == THRESHOLD.then(INVERT)
+
+
+def test_fuse_array_operations_without_grayscale():
+    before, grayscale, after = fuse_array_operations([HALF, THRESHOLD])
+
+    assert before == HALF.then(THRESHOLD)
+    assert not grayscale
+    assert after.table == IDENTITY_TABLE
+
+
+@pytest.mark.parametrize("mode", ["L", "LA", "RGB", "RGBA"])
+@pytest.mark.parametrize(
+    "operations",
+    [
+        [GrayscaleOperation()],
+        [HALF],
+        [INVERT, GrayscaleOperation(), THRESHOLD],
+        [GrayscaleOperation(), HALF, INVERT],
+        [HALF, INVERT, THRESHOLD],
+    ],
+)
+def test_apply_array_operations_matches_pillow(mode, operations):
+    image = _noise_image(mode)
+
+    transformed = apply_array_operations(image, operations)
+    expected = _pillow_operations(image, operations)
+
+    assert transformed.mode == expected.mode
+    assert transformed.tobytes() == expected.tobytes()
+
+
+def test_apply_array_operations_allocates_one_image():
+    image = _noise_image("RGB")
+    with patch(
+        "apps.image_processing.core.transformations.array.PImage.fromarray",
+        wraps=Image.fromarray,
+    ) as mock_fromarray:
+        apply_array_operations(image, [INVERT, GrayscaleOperation(), HALF, THRESHOLD])
+
+    mock_fromarray.assert_called_once()
+
+
+def test_apply_array_operations_unsupported_mode():
+    with pytest.raises(ValueError):
+        apply_array_operations(Image.new("P", (4, 4)), [HALF])
@@ -0,0 +1,125 @@
+from functools import partial
+
+import pytest
+from django.test import override_settings
+
+from apps.image_processing.constants import TRANSFORMATION_FILTER_BLUR_FILTER
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.cost_model import (
+    TransformerCostModel,
+    get_cost_model,
+)
+from apps.image_processing.models import TransformationBatch
+
+COST_MODEL = TransformerCostModel(
+    seconds_per_cost=1e-9,
+    threaded_overhead=1e-4,
+    threaded_speedup=3.0,
+    multiprocess_overhead=5e-3,
+    multiprocess_seconds_per_pixel=5e-9,
+    multiprocess_speedup=4.0,
+)
+
+
+def _blurs(count, filter=TRANSFORMATION_FILTER_BLUR_FILTER.BLUR):
+    return [
+        InternalImageTransformationDefinition(
+            identifier=str(index),
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(filter=filter),
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "count, size, expected",
+    [
+        (5, (16, 16), TransformationBatch.SEQUENTIAL),
+        (5, (64, 64), TransformationBatch.THREADED),
+        (1, (8000, 6000), TransformationBatch.SEQUENTIAL),
+        (4, (8000, 6000), TransformationBatch.MULTIPROCESS),
+        (2, (1024, 768), TransformationBatch.THREADED),
+    ],
+)
+def test_cost_model_choose(count, size, expected):
+    assert COST_MODEL.choose(_blurs(count), size) == expected
+
+
+def test_cost_model_choose_for_several_images():
+    # A single transformation only runs in parallel with the ones of other images
+    assert COST_MODEL.choose(_blurs(1), (8000, 6000)) == TransformationBatch.SEQUENTIAL
+    assert (
+        COST_MODEL.choose(_blurs(1), (8000, 6000), images=4)
+        == TransformationBatch.THREADED
+    )
+
+
+def test_cost_model_estimate_bounds_overlapping_images(settings):
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "BATCH_PREFETCH_IMAGES": 1,
+    }
+    estimate = partial(
+        COST_MODEL.estimate, TransformationBatch.THREADED, _blurs(1), (8000, 6000)
+    )
+
+    # Only the current and the prefetched images overlap, whatever the batch size
+    assert estimate(images=50) == estimate(images=2) < estimate(images=1)
+
+
+def test_cost_model_estimate_follows_filters():
+    size = (1000, 1000)
+    box_blurs = _blurs(1, TRANSFORMATION_FILTER_BLUR_FILTER.BOX_BLUR)
+
+    assert COST_MODEL.estimate(
+        TransformationBatch.SEQUENTIAL, box_blurs, size
+    ) < COST_MODEL.estimate(TransformationBatch.SEQUENTIAL, _blurs(1), size)
+
+
+def test_cost_model_estimate_uses_calibrated_transformations():
+    cost_model = TransformerCostModel(
+        seconds_per_cost=1e-9,
+        transformation_seconds_per_cost={TransformationBlur.name: 2e-9},
+    )
+    size = (100, 100)
+
+    assert cost_model.estimate_transformation(_blurs(1)[0], size) == (
+        2e-9 * TransformationBlur.estimate_cost(size, 3, _blurs(1)[0].filters)
+    )
+
+
+def test_cost_model_estimate_unknown_transformer():
+    with pytest.raises(ValueError):
+        COST_MODEL.estimate(TransformationBatch.CHAIN, _blurs(2), (10, 10))
+
+
+def test_get_cost_model_loads_dumped_model(tmp_path):
+    path = tmp_path / "cost_model.json"
+    COST_MODEL.dump(path)
+    get_cost_model.cache_clear()
+    try:
+        with override_settings(IMAGE_PROCESSING={"COST_MODEL_PATH": path}):
+            assert get_cost_model() == COST_MODEL
+            assert get_cost_model() is get_cost_model()
+    finally:
+        get_cost_model.cache_clear()
+
+
+@pytest.mark.parametrize("content", [None, "{", '{"unknown": 1}'])
+def test_get_cost_model_defaults(tmp_path, content):
+    path = tmp_path / "cost_model.json"
+    if content is not None:
+        path.write_text(content)
+    get_cost_model.cache_clear()
+    try:
+        with override_settings(IMAGE_PROCESSING={"COST_MODEL_PATH": path}):
+            assert get_cost_model() == TransformerCostModel()
+    finally:
+        get_cost_model.cache_clear()
@@ -0,0 +1,426 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import ExifTags
+from PIL import Image as PImage
+
+from apps.image_processing.constants import DETECTOR_FORMAT
+from apps.image_processing.core.detectors import common_object_detector
+from apps.image_processing.core.detectors import export as export_module
+from apps.image_processing.core.detectors import registry as registry_module
+from apps.image_processing.core.detectors import results as results_module
+from apps.image_processing.core.detectors.base import DetectorImage
+from apps.image_processing.core.detectors.common_object_detector import (
+    CommonObjectDetector,
+)
+from apps.image_processing.core.detectors.export import (
+    detect_tags,
+    export_detector_model,
+    exported_model_path,
+    get_detector_model_name,
+    tag_agreement,
+)
+from apps.image_processing.core.detectors.inputs import (
+    detector_input_size,
+    open_detector_image,
+)
+from apps.image_processing.core.detectors.registry import (
+    DetectorModelRegistry,
+    detector_model_path,
+    model_nbytes,
+)
+from apps.image_processing.core.detectors.results import detector_model_version
+from apps.image_processing.models import DetectionObject, DetectionResult
+
+
+class _Tensor:
+    def __init__(self, numel, element_size=4):
+        self._numel = numel
+        self._element_size = element_size
+
+    def numel(self):
+        return self._numel
+
+    def element_size(self):
+        return self._element_size
+
+
+class _Module:
+    def parameters(self):
+        return iter([_Tensor(100), _Tensor(50)])
+
+    def buffers(self):
+        return iter([_Tensor(10, element_size=8)])
+
+
+def _fake_model(name, task):
+    model = MagicMock(name=name)
+    model.model = _Module()
+    return model
+
+
+@pytest.fixture
+def mock_load_model():
+    with patch.object(
+        registry_module, "_load_model", side_effect=_fake_model
+    ) as mock_load_model:
+        yield mock_load_model
+
+
+@pytest.fixture
+def downloaded_weights(tmp_path):
+    """
+    Weights ultralytics finds in its weights directory, named by their file name.
+    """
+    weights_dir = tmp_path / "weights"
+    weights_dir.mkdir()
+
+    def download_weights(name):
+        return str(weights_dir / name)
+
+    with patch.object(registry_module, "_download_weights", download_weights):
+        yield weights_dir
+
+
+def test_detector_model_path(downloaded_weights, tmp_path, monkeypatch):
+    (downloaded_weights / "yolo11n.pt").write_bytes(b"weights")
+    monkeypatch.chdir(tmp_path)
+
+    assert detector_model_path("yolo11n.pt") == downloaded_weights / "yolo11n.pt"
+    (tmp_path / "yolo11n.pt").write_bytes(b"local weights")
+    assert detector_model_path("yolo11n.pt") == tmp_path / "yolo11n.pt"
+    with pytest.raises(FileNotFoundError):
+        detector_model_path("missing.pt")
+
+
+def test_model_nbytes():
+    assert model_nbytes(_fake_model("yolo11n.pt", "detect")) == 680
+
+
+def test_model_nbytes_of_exported_model(tmp_path):
+    weights = tmp_path / "yolo11n.onnx"
+    weights.write_bytes(b"0" * 123)
+    model = MagicMock(spec=["ckpt_path"], ckpt_path=str(weights))
+
+    assert model_nbytes(model) == 123
+
+
+def test_detector_registry_loads_each_model_once(mock_load_model):
+    registry = DetectorModelRegistry()
+
+    first = registry.get("yolo11n.pt")
+    second = registry.get("yolo11n.pt")
+    other = registry.get("yolo11s.pt")
+
+    assert first is second
+    assert other is not first
+    assert mock_load_model.call_count == 2
+    assert registry.loaded() == {"yolo11n.pt": 680, "yolo11s.pt": 680}
+    assert registry.bytes == 1360
+
+
+def test_detector_registry_warm_up_runs_inference(mock_load_model):
+    registry = DetectorModelRegistry()
+
+    registry.warm_up("yolo11n.pt")
+
+    model = registry.get("yolo11n.pt")
+    model.assert_called_once()
+    assert model.call_args.args[0].size == (640, 640)
+
+
+def test_detector_registry_unloads_idle_models(mock_load_model):
+    registry = DetectorModelRegistry()
+    with patch.object(registry_module.time, "monotonic", return_value=100.0):
+        registry.get("yolo11n.pt")
+    with patch.object(registry_module.time, "monotonic", return_value=150.0):
+        registry.get("yolo11s.pt")
+
+    with patch.object(registry_module.time, "monotonic", return_value=200.0):
+        unloaded = registry.unload_idle(max_idle_seconds=60)
+
+    assert unloaded == ["yolo11n.pt"]
+    assert list(registry.loaded()) == ["yolo11s.pt"]
+    assert registry.unload("yolo11s.pt")
+    assert len(registry) == 0
+
+
+def test_detector_registry_unloads_idle_models_on_get(mock_load_model):
+    registry = DetectorModelRegistry(max_idle_seconds=60)
+    with patch.object(registry_module.time, "monotonic", return_value=100.0):
+        registry.get("yolo11n.pt")
+
+    with patch.object(registry_module.time, "monotonic", return_value=200.0):
+        registry.get("yolo11s.pt")
+
+    assert list(registry.loaded()) == ["yolo11s.pt"]
+
+
+@pytest.mark.parametrize(
+    "format, int8, name",
+    [
+        (DETECTOR_FORMAT.ONNX, False, "yolo11n.onnx"),
+        (DETECTOR_FORMAT.OPENVINO, False, "yolo11n_openvino_model"),
+        (DETECTOR_FORMAT.OPENVINO, True, "yolo11n_int8_openvino_model"),
+    ],
+)
+def test_exported_model_path(tmp_path, format, int8, name):
+    assert exported_model_path("yolo11n.pt", format, int8, tmp_path) == tmp_path / name
+
+
+@pytest.mark.parametrize(
+    "format, int8",
+    [(DETECTOR_FORMAT.PYTORCH, False), (DETECTOR_FORMAT.ONNX, True)],
+)
+def test_exported_model_path_of_unsupported_export(tmp_path, format, int8):
+    with pytest.raises(ValueError):
+        exported_model_path("yolo11n.pt", format, int8, tmp_path)
+
+
+def test_get_detector_model_name(settings, tmp_path):
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "DETECTOR_MODEL": "yolo11s.pt",
+        "DETECTOR_FORMAT": "openvino",
+        "DETECTOR_INT8": True,
+        "DETECTOR_EXPORT_PATH": tmp_path,
+    }
+
+    # The PyTorch weights are used until the model is exported
+    assert get_detector_model_name() == "yolo11s.pt"
+
+    (tmp_path / "yolo11s_int8_openvino_model").mkdir()
+
+    assert get_detector_model_name() == str(tmp_path / "yolo11s_int8_openvino_model")
+
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "DETECTOR_FORMAT": "pytorch",
+    }
+
+    assert get_detector_model_name() == "yolo11s.pt"
+
+
+def test_export_detector_model(mock_load_model, tmp_path):
+    exported = tmp_path / "yolo11n.onnx"
+    exported.write_bytes(b"onnx")
+    export_path = tmp_path / "exported"
+    model = _fake_model("yolo11n.pt", "detect")
+    model.export.return_value = str(exported)
+    mock_load_model.side_effect = None
+    mock_load_model.return_value = model
+
+    path = export_detector_model(
+        "yolo11n.pt", DETECTOR_FORMAT.ONNX, export_path=export_path
+    )
+
+    assert path == export_path / "yolo11n.onnx"
+    assert path.read_bytes() == b"onnx"
+    assert not exported.exists()
+    model.export.assert_called_once_with(
+        format="onnx", int8=False, imgsz=640, dynamic=True
+    )
+
+
+def test_detect_tags(mock_load_model):
+    result = MagicMock(names={0: "Person", 1: "Dog"})
+    result.boxes.cls.tolist.return_value = [0.0, 1.0, 0.0]
+    empty = MagicMock(names={0: "Person"})
+    empty.boxes.cls.tolist.return_value = []
+    registry = DetectorModelRegistry()
+    registry.get("yolo11n.pt").return_value = [result, empty]
+
+    with patch.object(export_module, "get_detector_registry", return_value=registry):
+        tags = detect_tags("yolo11n.pt", ["a.jpg", "b.jpg"])
+
+    assert tags == [{"person", "dog"}, set()]
+    assert registry.get("yolo11n.pt").call_args.kwargs["batch"] == 2
+
+
+def test_tag_agreement():
+    assert tag_agreement([{"dog"}, set()], [{"dog"}, set()]) == 1.0
+    assert tag_agreement([{"dog", "cat"}, {"car"}], [{"dog"}, set()]) == 0.25
+    assert tag_agreement([], []) == 1.0
+    with pytest.raises(ValueError):
+        tag_agreement([{"dog"}], [])
+
+
+def _fake_detection(image):
+    result = MagicMock(names={0: "person", 16: "dog"})
+    result.boxes.cls.tolist.return_value = [16.0]
+    result.boxes.conf.tolist.return_value = [0.875]
+    result.boxes.xyxy.tolist.return_value = [[1.5, 2.0, 30.25, 40.0]]
+    return result
+
+
+@pytest.fixture
+def detector_model(mock_load_model, downloaded_weights, settings):
+    (downloaded_weights / "yolo11n.pt").write_bytes(b"weights")
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "DETECTOR_MODEL": "yolo11n.pt",
+        "DETECTOR_FORMAT": "pytorch",
+    }
+    registry = DetectorModelRegistry()
+    model = registry.get("yolo11n.pt")
+    model.side_effect = lambda images, **kwargs: iter(
+        [_fake_detection(image) for image in images]
+    )
+    with patch.object(
+        common_object_detector, "get_detector_registry", return_value=registry
+    ):
+        yield model
+
+
+@pytest.mark.django_db
+def test_common_object_detector_reuses_stored_results(detector_model, tmp_path):
+    photo = tmp_path / "photo.png"
+    PImage.new("RGB", (64, 48), color="red").save(photo)
+    copy = tmp_path / "copy.png"
+    copy.write_bytes(photo.read_bytes())
+    other = tmp_path / "other.png"
+    PImage.new("RGB", (64, 48), color="blue").save(other)
+
+    results = list(
+        CommonObjectDetector(
+            images=[
+                DetectorImage(identifier=1, image=str(photo)),
+                DetectorImage(identifier=2, image=str(copy)),
+                DetectorImage(identifier=3, image=str(other)),
+            ]
+        ).results
+    )
+
+    # The copy has the same content, it is detected once
+    assert [image.getpixel((0, 0)) for image in detector_model.call_args.args[0]] == [
+        (255, 0, 0),
+        (0, 0, 255),
+    ]
+    assert detector_model.call_args.kwargs["batch"] == 2
+    assert [result.identifier for result in results] == [1, 2, 3]
+    assert results[1].objects == results[0].objects
+    obj = results[0].objects[0]
+    assert (obj.type, obj.name, obj.confidence) == (16, "dog", 0.875)
+    assert obj.box == [1.5, 2.0, 30.25, 40.0]
+    assert (
+        DetectionResult.objects.filter(
+            model_version=detector_model_version("yolo11n.pt")
+        ).count()
+        == 2
+    )
+    assert DetectionObject.objects.filter(class_name="dog", x2__gt=30).count() == 2
+
+    detector_model.reset_mock()
+    results = list(
+        CommonObjectDetector(
+            images=[DetectorImage(identifier=4, image=str(copy))]
+        ).results
+    )
+
+    detector_model.assert_not_called()
+    assert results[0].identifier == 4
+    assert results[0].objects == [obj]
+
+
+def test_detector_model_version(downloaded_weights, tmp_path, monkeypatch):
+    weights = downloaded_weights / "yolo11n.pt"
+    weights.write_bytes(b"weights")
+    export = tmp_path / "yolo11n_openvino_model"
+    export.mkdir()
+    (export / "yolo11n.bin").write_bytes(b"weights")
+
+    version = detector_model_version(str(weights))
+
+    assert version.startswith("yolo11n.pt:")
+    assert version.endswith(":input640-v1")
+    assert detector_model_version(str(weights)) == version
+    # The weights ultralytics loads, wherever the process runs from
+    monkeypatch.chdir(tmp_path)
+    assert detector_model_version("yolo11n.pt") == version
+    monkeypatch.chdir(downloaded_weights)
+    assert detector_model_version("yolo11n.pt") == version
+    with pytest.raises(FileNotFoundError):
+        detector_model_version("missing.pt")
+    assert detector_model_version(str(export)).startswith("yolo11n_openvino_model:")
+
+    # Weights replaced in place
+    weights.write_bytes(b"retrained weights")
+    retrained = detector_model_version(str(weights))
+    assert retrained != version
+
+    # An export replaced in place
+    exported = detector_model_version(str(export))
+    (export / "yolo11n.bin").write_bytes(b"exported again")
+    assert detector_model_version(str(export)) != exported
+
+    # Images opened differently
+    monkeypatch.setattr(results_module, "DETECTOR_PREPROCESSING_VERSION", 2)
+    assert detector_model_version(str(weights)) != retrained
+
+
+@pytest.mark.django_db
+def test_common_object_detector_detects_images_without_hash(detector_model):
+    image = PImage.new("RGB", (32, 32))
+
+    for _ in range(2):
+        results = list(
+            CommonObjectDetector(
+                images=[DetectorImage(identifier=1, image=image)]
+            ).results
+        )
+
+    assert detector_model.call_count == 2
+    assert results[0].objects[0].name == "dog"
+    assert not DetectionResult.objects.exists()
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [((4000, 3000), (640, 480)), ((1000, 2000), (320, 640)), ((320, 200), (320, 200))],
+)
+def test_detector_input_size(size, expected):
+    assert detector_input_size(size) == expected
+
+
+def test_open_detector_image_decodes_at_reduced_resolution(tmp_path):
+    path = tmp_path / "photo.jpg"
+    PImage.new("RGB", (4000, 3000), color="green").save(path)
+
+    with patch.object(
+        PImage.Image, "reduce", autospec=True, wraps=PImage.Image.reduce
+    ) as mock_reduce:
+        image, source_size = open_detector_image(str(path))
+
+    # JPEG is decoded straight at 1/4 scale, then resized to the model input
+    mock_reduce.assert_not_called()
+    assert image.size == (640, 480)
+    assert image.mode == "RGB"
+    assert source_size == (4000, 3000)
+
+
+def test_open_detector_image_applies_exif_orientation(tmp_path):
+    path = tmp_path / "photo.jpg"
+    exif = PImage.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    PImage.new("RGB", (2000, 1000)).save(path, exif=exif)
+
+    image, source_size = open_detector_image(str(path))
+
+    assert source_size == (1000, 2000)
+    assert image.size == (320, 640)
+
+
+@pytest.mark.django_db
+def test_common_object_detector_scales_boxes_to_source(detector_model, tmp_path):
+    path = tmp_path / "photo.jpg"
+    PImage.new("RGB", (1280, 960)).save(path)
+
+    results = list(
+        CommonObjectDetector(
+            images=[DetectorImage(identifier=1, image=str(path))]
+        ).results
+    )
+
+    assert detector_model.call_args.args[0][0].size == (640, 480)
+    assert results[0].objects[0].box == [3.0, 4.0, 60.5, 80.0]
+    assert DetectionObject.objects.get().x2 == 60.5
@@ -0,0 +1,98 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image as PImage
+from PIL import ImageFilter
+
+from apps.image_processing.constants import (
+    TRANSFORMATION_OUTPUT_FORMAT,
+    TRANSFORMATION_OUTPUT_PROFILE,
+)
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.encoders import (
+    ImageEncoder,
+    get_encoder,
+)
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+from apps.image_processing.models import ProcessedImage
+from apps.image_processing.tests.factories import TransformationBatchFactory
+
+
+@pytest.mark.parametrize("format", list(TRANSFORMATION_OUTPUT_FORMAT))
+@pytest.mark.parametrize("profile", list(TRANSFORMATION_OUTPUT_PROFILE))
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "LA", "P", "1"])
+def test_encoder_encodes_every_mode(format, profile, mode):
+    image = PImage.linear_gradient("L").resize((64, 48)).convert(mode)
+    encoder = ImageEncoder(format=format, profile=profile)
+
+    decoded = PImage.open(BytesIO(encoder.encode(image)))
+
+    assert decoded.format == (
+        "JPEG" if format == "jpeg" else format.split("_")[0].upper()
+    )
+    assert decoded.size == image.size
+
+
+def test_encoder_lossless_formats_keep_pixels():
+    image = PImage.effect_noise((64, 48), 64).convert("RGB")
+    for format in ("png", "webp_lossless"):
+        encoded = get_encoder(format, "fast").encode(image)
+
+        assert PImage.open(BytesIO(encoded)).convert("RGB").tobytes() == image.tobytes()
+
+
+def test_encoder_small_profile_is_smaller():
+    noise = PImage.effect_noise((256, 192), 32).filter(ImageFilter.GaussianBlur(2))
+    image = PImage.merge(
+        "RGB", (noise, noise.transpose(PImage.Transpose.ROTATE_180), noise)
+    )
+    for format in TRANSFORMATION_OUTPUT_FORMAT:
+        fast = get_encoder(format, "fast").encode(image)
+        small = get_encoder(format, "small").encode(image)
+
+        assert len(small) <= len(fast)
+
+
+def test_get_encoder_defaults_to_settings(settings):
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "OUTPUT_FORMAT": "webp",
+        "OUTPUT_PROFILE": "small",
+    }
+
+    assert get_encoder() == ImageEncoder(format="webp", profile="small")
+    assert get_encoder("jpeg").name == "jpeg:small"
+    with pytest.raises(ValueError):
+        get_encoder("gif")
+
+
+@pytest.mark.django_db
+def test_transformer_records_encoder_and_size():
+    transformer = ImageSequentialTransformer(
+        transformations=[
+            InternalImageTransformationDefinition(
+                identifier="BLUR",
+                transformation=TransformationBlur,
+                filters=ExternalTransformationFiltersBlur(),
+            )
+        ],
+        encoder=get_encoder("jpeg", "balanced"),
+    )
+
+    transformer.transform(
+        PImage.new("RGBA", (64, 48), color="red"), TransformationBatchFactory()
+    )
+
+    processed = ProcessedImage.objects.get()
+    assert processed.encoder == "jpeg:balanced"
+    assert processed.file.name.endswith(".jpg")
+    assert processed.file_size == processed.file.size
+    assert PImage.open(processed.file).format == "JPEG"
@@ -1,17 +1,54 @@
+from io import BytesIO
 from unittest.mock import patch
 
 import pytest
+from django.core.files.base import ContentFile
 from PIL import Image as PImage
+from PIL import ImageChops, ImageFile
 
 from apps.image_processing.core.managers.base import (
     BaseImageManager,
+    ImageSourceMetadata,
+    image_reduce,
 )
 from apps.image_processing.core.managers.local import ImageLocalManager
-from apps.image_processing.core.transformers.base import BaseImageTransformer
+from apps.image_processing.core.managers.storage import ImageStorageManager
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    BaseImageTransformer,
+    InternalImageTransformationDefinition,
+)
 from apps.image_processing.core.transformers.sequential import (
     ImageSequentialTransformer,
 )
-from apps.image_processing.models import TransformationBatch
+from apps.image_processing.models import ProcessedImage, TransformationBatch
+from apps.image_processing.tests.factories import ProcessingImageFactory
+
+THUMBNAIL = InternalImageTransformationDefinition(
+    identifier="THUMBNAIL",
+    transformation=TransformationThumbnail,
+    filters=ExternalTransformationFiltersThumbnail(size=(128, 128)),
+)
+BLUR = InternalImageTransformationDefinition(
+    identifier="BLUR",
+    transformation=TransformationBlur,
+    filters=ExternalTransformationFiltersBlur(radius=2),
+)
+
+
+def _jpeg_processing_image(size):
+    buffer = BytesIO()
+    PImage.linear_gradient("L").resize(size).convert("RGB").save(buffer, "JPEG")
+    return ProcessingImageFactory(
+        file=ContentFile(buffer.getvalue(), name="image.jpeg")
+    )
 
 
 class ImageProcesingTestManager(BaseImageManager):
@@ -36,6 +73,43 @@ def test_base_image_manager_init(processing_image_base):
     mock_get_image.assert_called_once_with()
 
 
+@pytest.mark.django_db
+def test_base_image_manager_opens_image_lazily(processing_image_base):
+    with patch.object(ImageProcesingTestManager, "_get_image") as mock_get_image:
+        ImageProcesingTestManager(image=processing_image_base, transformer=None)
+
+    mock_get_image.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_local_image_manager_metadata_does_not_decode():
+    processing_image = _jpeg_processing_image((160, 120))
+    manager = ImageLocalManager(
+        image=processing_image,
+        transformer=ImageSequentialTransformer(transformations=[THUMBNAIL]),
+    )
+
+    with patch.object(ImageFile.ImageFile, "load") as mock_load:
+        metadata = manager.get_metadata()
+
+    mock_load.assert_not_called()
+    assert metadata == ImageSourceMetadata(size=(160, 120), mode="RGB", format="JPEG")
+    assert metadata.bands == 3
+
+
+@pytest.mark.django_db
+def test_local_image_manager_memory_maps_uncompressed_image():
+    buffer = BytesIO()
+    PImage.linear_gradient("L").save(buffer, "PPM")
+    processing_image = ProcessingImageFactory(
+        file=ContentFile(buffer.getvalue(), name="image.ppm")
+    )
+    image = ImageLocalManager(image=processing_image).get_image()
+    image.load()
+
+    assert image.readonly
+
+
 @pytest.mark.django_db
 def test_apply_transformations_without_transformer(processing_image_base):
     manager = ImageProcesingTestManager(image=processing_image_base, transformer=None)
@@ -69,3 +143,131 @@ def test_local_image_manager_get_image(mock_pimage, processing_image_base):
     manager = ImageLocalManager(image=processing_image_base)
     manager.get_image()
     mock_pimage.open.assert_called_once_with(processing_image_base.file.path)
+
+
+@pytest.mark.django_db
+def test_local_image_manager_decodes_reduced_jpeg():
+    processing_image = _jpeg_processing_image((1600, 1200))
+    transformer = ImageSequentialTransformer(transformations=[THUMBNAIL])
+    manager = ImageLocalManager(image=processing_image, transformer=transformer)
+    full_resolution = ImageSequentialTransformer(
+        transformations=[THUMBNAIL]
+    )._transform(PImage.open(processing_image.file.path))
+
+    transformations_applied = manager.apply_transformations()
+
+    # The thumbnail needs 256x256, JPEG scales are powers of two
+    assert manager.get_image().size == (400, 300)
+    assert transformations_applied[0].image.size == full_resolution[0].image.size
+    difference = ImageChops.difference(
+        transformations_applied[0].image, full_resolution[0].image
+    )
+    assert max(high for _, high in difference.getextrema()) <= 8
+
+
+@pytest.mark.django_db
+def test_local_image_manager_keeps_full_resolution():
+    processing_image = _jpeg_processing_image((1600, 1200))
+    transformer = ImageSequentialTransformer(transformations=[THUMBNAIL, BLUR])
+    manager = ImageLocalManager(image=processing_image, transformer=transformer)
+
+    assert manager.get_image().size == (1600, 1200)
+
+
+@pytest.mark.parametrize(
+    "size, required_size, expected",
+    [
+        ((1000, 800), (256, 256), (334, 267)),
+        ((1000, 800), (500, 500), (1000, 800)),
+        ((100, 80), (256, 256), (100, 80)),
+    ],
+)
+def test_image_reduce_without_draft(size, required_size, expected):
+    image = PImage.new("RGB", size, color="red")
+
+    assert image_reduce(image, required_size).size == expected
+
+
+@pytest.mark.django_db
+def test_apply_transformations_reuses_cached_results(result_cache):
+    processing_image = _jpeg_processing_image((64, 48))
+    for _ in range(2):
+        ImageLocalManager(
+            image=processing_image,
+            transformer=ImageSequentialTransformer(transformations=[BLUR]),
+        ).apply_transformations()
+
+    assert result_cache.stats.hits == 1
+    assert result_cache.stats.misses == 1
+
+
+@pytest.mark.django_db
+def test_apply_transformations_does_not_open_cached_image(result_cache):
+    processing_image = _jpeg_processing_image((64, 48))
+    ImageLocalManager(
+        image=processing_image,
+        transformer=ImageSequentialTransformer(transformations=[BLUR]),
+    ).apply_transformations()
+
+    with patch.object(ImageLocalManager, "_get_image") as mock_get_image:
+        ImageLocalManager(
+            image=processing_image,
+            transformer=ImageSequentialTransformer(transformations=[BLUR]),
+        ).apply_transformations()
+
+    mock_get_image.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_apply_transformations_closes_source_of_cached_results(result_cache):
+    processing_image = _jpeg_processing_image((64, 48))
+    ImageLocalManager(
+        image=processing_image,
+        transformer=ImageSequentialTransformer(transformations=[BLUR]),
+    ).apply_transformations()
+    manager = ImageLocalManager(
+        image=processing_image,
+        transformer=ImageSequentialTransformer(transformations=[BLUR]),
+    )
+    assert manager.get_metadata().size == (64, 48)
+    source = manager._source
+
+    with patch.object(source, "close", wraps=source.close) as mock_close:
+        manager.apply_transformations()
+
+    mock_close.assert_called_once()
+    assert manager._source is None
+    assert manager.get_metadata().size == (64, 48)
+
+
+@pytest.mark.django_db
+def test_storage_image_manager_reads_through_storage(slow_storage):
+    processing_image = _jpeg_processing_image((1600, 1200))
+    manager = ImageStorageManager(
+        image=processing_image,
+        transformer=ImageSequentialTransformer(transformations=[THUMBNAIL, BLUR]),
+    )
+
+    assert manager.get_metadata().size == (1600, 1200)
+    # Only the header was read
+    assert 0 < slow_storage.bytes_read < processing_image.file.size
+
+    transformations_applied = manager.apply_transformations()
+
+    assert [transform.identifier for transform in transformations_applied] == [
+        "THUMBNAIL",
+        "BLUR",
+    ]
+    for processed_image in ProcessedImage.objects.all():
+        assert slow_storage.exists(processed_image.file.name)
+
+
+@pytest.mark.django_db
+def test_storage_image_manager_decodes_reduced_jpeg(slow_storage):
+    processing_image = _jpeg_processing_image((1600, 1200))
+    manager = ImageStorageManager(
+        image=processing_image,
+        transformer=ImageSequentialTransformer(transformations=[THUMBNAIL]),
+    )
+
+    assert manager.get_image().size == (400, 300)
@@ -0,0 +1,212 @@
+import pytest
+from PIL import Image as PImage
+from PIL import ImageChops
+
+from apps.image_processing.constants import TRANSFORMATION_FILTER_BLUR_FILTER
+from apps.image_processing.core.transformations.black_and_white import (
+    ExternalTransformationFiltersBlackAndWhite,
+    TransformationBlackAndWhite,
+)
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.chain import ImageChainTransformer
+from apps.image_processing.core.transformers.optimizer import (
+    transformations_can_commute,
+    transformations_estimate_cost,
+    transformations_optimize_order,
+)
+from apps.image_processing.models import ImageTransformation
+from apps.image_processing.tests.factories import TransformationBatchFactory
+
+BLACK_AND_WHITE = InternalImageTransformationDefinition(
+    identifier="BLACK_AND_WHITE",
+    transformation=TransformationBlackAndWhite,
+    filters=ExternalTransformationFiltersBlackAndWhite(dither=None),
+)
+BLUR = InternalImageTransformationDefinition(
+    identifier="BLUR",
+    transformation=TransformationBlur,
+    filters=ExternalTransformationFiltersBlur(radius=2),
+)
+THUMBNAIL = InternalImageTransformationDefinition(
+    identifier="THUMBNAIL",
+    transformation=TransformationThumbnail,
+    filters=ExternalTransformationFiltersThumbnail(size=(64, 64)),
+)
+
+
+def _noisy_image(mode):
+    """
+    An image with detail in every band, where rounding differences show up, and
+    a gradient alpha band for RGBA.
+    """
+    noise = PImage.effect_noise((400, 300), 60)
+    image = PImage.merge(
+        "RGB",
+        [noise, PImage.linear_gradient("L").resize((400, 300)), noise.rotate(90)],
+    )
+    if mode == "RGBA":
+        image.putalpha(PImage.radial_gradient("L").resize((400, 300)))
+    elif mode == "P":
+        image = image.convert("P")
+    return image
+
+
+@pytest.mark.parametrize(
+    "first, second, max_tolerance, expected",
+    [
+        (TransformationBlackAndWhite, TransformationThumbnail, 2, True),
+        (TransformationThumbnail, TransformationBlackAndWhite, 2, True),
+        (TransformationBlackAndWhite, TransformationThumbnail, 1, False),
+        (TransformationBlackAndWhite, TransformationBlur, 2, True),
+        (TransformationBlackAndWhite, TransformationBlur, 1, False),
+        (TransformationBlur, TransformationThumbnail, 2, False),
+    ],
+)
+def test_transformations_can_commute(first, second, max_tolerance, expected):
+    assert transformations_can_commute(first, second, max_tolerance, "RGB") is expected
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "LA", "P", "1", "CMYK"])
+def test_transformations_can_commute_only_for_l_and_rgb(mode):
+    assert transformations_can_commute(
+        TransformationBlackAndWhite, TransformationThumbnail, 2, "L"
+    )
+    assert not transformations_can_commute(
+        TransformationBlackAndWhite, TransformationThumbnail, 2, mode
+    )
+
+
+def test_transformations_estimate_cost_follows_output():
+    size = (1000, 500)
+    assert transformations_estimate_cost(
+        [BLACK_AND_WHITE, BLUR], size, 3
+    ) < transformations_estimate_cost([BLUR, BLACK_AND_WHITE], size, 3)
+    assert transformations_estimate_cost(
+        [THUMBNAIL, BLUR], size, 3
+    ) < transformations_estimate_cost([BLUR, THUMBNAIL], size, 3)
+
+
+@pytest.mark.parametrize(
+    "transformations, max_tolerance, min_gain, expected",
+    [
+        ([BLUR, BLACK_AND_WHITE], 2, 0.1, [BLACK_AND_WHITE, BLUR]),
+        ([BLUR, BLACK_AND_WHITE], 0, 0.1, [BLUR, BLACK_AND_WHITE]),
+        ([BLACK_AND_WHITE, THUMBNAIL], 2, 0.1, [BLACK_AND_WHITE, THUMBNAIL]),
+        ([THUMBNAIL, BLACK_AND_WHITE], 2, 0.1, [THUMBNAIL, BLACK_AND_WHITE]),
+        ([THUMBNAIL, BLACK_AND_WHITE], 2, 0.0, [BLACK_AND_WHITE, THUMBNAIL]),
+        ([BLUR, THUMBNAIL], 2, 0.1, [BLUR, THUMBNAIL]),
+        (
+            [BLUR, BLACK_AND_WHITE, THUMBNAIL],
+            2,
+            0.1,
+            [BLACK_AND_WHITE, BLUR, THUMBNAIL],
+        ),
+    ],
+)
+def test_transformations_optimize_order(
+    transformations, max_tolerance, min_gain, expected
+):
+    optimized = transformations_optimize_order(
+        transformations,
+        size=(1000, 500),
+        bands=3,
+        mode="RGB",
+        max_tolerance=max_tolerance,
+        min_gain=min_gain,
+    )
+    assert optimized == expected
+
+
+@pytest.mark.parametrize(
+    "blur_filter",
+    [
+        TRANSFORMATION_FILTER_BLUR_FILTER.BLUR,
+        TRANSFORMATION_FILTER_BLUR_FILTER.BOX_BLUR,
+        TRANSFORMATION_FILTER_BLUR_FILTER.GAUSSIAN_BLUR,
+    ],
+)
+@pytest.mark.parametrize("radius", [2, 10])
+def test_chain_transformer_reordered_output_within_tolerance(blur_filter, radius):
+    image = _noisy_image("RGB")
+    transformations = [
+        InternalImageTransformationDefinition(
+            identifier="BLUR",
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(
+                radius=radius, filter=blur_filter
+            ),
+        ),
+        BLACK_AND_WHITE,
+    ]
+
+    optimized = ImageChainTransformer(transformations)._transform(image)
+    requested = ImageChainTransformer(transformations, optimize=False)._transform(image)
+
+    assert optimized[0].applied_order == ["BLACK_AND_WHITE", "BLUR"]
+    assert requested[0].applied_order == ["BLUR", "BLACK_AND_WHITE"]
+    assert optimized[0].image.size == requested[0].image.size
+    difference = ImageChops.difference(optimized[0].image, requested[0].image)
+    assert (
+        difference.getextrema()[1]
+        <= TransformationBlur.commutes_with[TransformationBlackAndWhite.name]
+    )
+
+
+@pytest.mark.parametrize(
+    "mode, transformations",
+    [
+        # Both would be reordered, the cheaper order depends on the bands
+        ("RGBA", [THUMBNAIL, BLACK_AND_WHITE]),
+        ("P", [BLACK_AND_WHITE, THUMBNAIL]),
+    ],
+)
+def test_chain_transformer_keeps_order_of_images_with_alpha_or_palette(
+    mode, transformations
+):
+    image = _noisy_image(mode)
+
+    optimized = ImageChainTransformer(transformations)._transform(image)
+    requested = ImageChainTransformer(transformations, optimize=False)._transform(image)
+
+    assert optimized[0].applied_order == [t.identifier for t in transformations]
+    difference = ImageChops.difference(optimized[0].image, requested[0].image)
+    assert difference.getextrema()[1] == 0
+
+
+@pytest.mark.django_db
+def test_chain_transformer_records_applied_order(temp_image_file):
+    transformation_batch = TransformationBatchFactory()
+    transformer = ImageChainTransformer([BLUR, BLACK_AND_WHITE])
+    transformations_applied = transformer.transform(
+        temp_image_file, transformation_batch
+    )
+    image_transformation = ImageTransformation.objects.get()
+
+    assert transformations_applied[0].identifier == "BLUR-BLACK_AND_WHITE"
+    assert image_transformation.identifier == "BLUR-BLACK_AND_WHITE"
+    assert image_transformation.filters["applied_order"] == [
+        "BLACK_AND_WHITE",
+        "BLUR",
+    ]
+
+
+@pytest.mark.django_db
+def test_chain_transformer_records_requested_final_transformation(temp_image_file):
+    transformer = ImageChainTransformer([BLUR, BLACK_AND_WHITE])
+    transformer.transform(temp_image_file, TransformationBatchFactory())
+    image_transformation = ImageTransformation.objects.get()
+
+    # Computed last after the reordering, blur is not the requested final step
+    assert image_transformation.filters["applied_order"][-1] == "BLUR"
+    assert image_transformation.transformation == ImageTransformation.BLACK_AND_WHITE
+    assert "radius" not in image_transformation.filters
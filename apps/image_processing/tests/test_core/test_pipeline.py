@@ -0,0 +1,141 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+    InternalImageTransformationResult,
+)
+from apps.image_processing.core.transformers.pipeline import ResultPipeline
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+from apps.image_processing.models import ImageTransformation, ProcessedImage
+from apps.image_processing.tests.factories import TransformationBatchFactory
+
+
+def _result(identifier, color="red"):
+    return InternalImageTransformationResult(
+        identifier=identifier,
+        transformation_name=TransformationBlur.name,
+        applied_filters=ExternalTransformationFiltersBlur(),
+        image=PImage.new("RGB", (32, 16), color=color),
+    )
+
+
+@pytest.mark.django_db
+def test_result_pipeline_writes_rows_in_batches():
+    transformer = ImageSequentialTransformer(transformations=[])
+    results = [_result(f"RESULT_{index}") for index in range(5)]
+
+    with patch.object(
+        ProcessedImage.objects, "bulk_create", wraps=ProcessedImage.objects.bulk_create
+    ) as mock_bulk_create:
+        with ResultPipeline(
+            transformer, TransformationBatchFactory(), batch_size=2
+        ) as pipeline:
+            for result in results:
+                pipeline.add(result)
+
+    assert [len(call.args[0]) for call in mock_bulk_create.call_args_list] == [2, 2, 1]
+    assert [processed.identifier for processed in pipeline.processed_images] == [
+        result.identifier for result in results
+    ]
+    assert ImageTransformation.objects.count() == 5
+    for result, processed in zip(results, pipeline.processed_images):
+        # The decoded image is released once stored
+        assert result.image.format == "PNG"
+        assert processed.file_size == processed.file.size
+
+
+@pytest.mark.django_db
+def test_result_pipeline_bounds_results_in_flight():
+    transformer = ImageSequentialTransformer(transformations=[])
+    encode_result = transformer._encode_result
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def slow_encode_result(result):
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return encode_result(result)
+
+    with patch.object(transformer, "_encode_result", side_effect=slow_encode_result):
+        with ResultPipeline(
+            transformer, TransformationBatchFactory(), max_in_flight=2
+        ) as pipeline:
+            for index in range(6):
+                pipeline.add(_result(f"RESULT_{index}"))
+
+    assert max_in_flight[0] <= 2
+    assert len(pipeline.processed_images) == 6
+
+
+@pytest.mark.django_db
+def test_result_pipeline_writes_no_rows_on_error():
+    transformer = ImageSequentialTransformer(transformations=[])
+
+    with pytest.raises(RuntimeError):
+        with ResultPipeline(transformer, TransformationBatchFactory()) as pipeline:
+            pipeline.add(_result("RESULT"))
+            raise RuntimeError
+
+    assert ProcessedImage.objects.count() == 0
+
+
+def test_sequential_transformer_streams_results(image_transformations):
+    transformer = ImageSequentialTransformer(transformations=image_transformations)
+
+    with patch.object(
+        TransformationThumbnail, "_image_transform", autospec=True
+    ) as mock_thumbnail:
+        results = transformer._stream(PImage.new("RGB", (60, 30), color="red"))
+        first = next(results)
+
+    assert first.identifier == image_transformations[0].identifier
+    mock_thumbnail.assert_not_called()
+
+
+def test_sequential_transformer_streams_repeated_transformations_lazily():
+    transformer = ImageSequentialTransformer(
+        transformations=[
+            InternalImageTransformationDefinition(
+                identifier=f"BLUR_{radius}",
+                transformation=TransformationBlur,
+                filters=ExternalTransformationFiltersBlur(radius=radius),
+            )
+            for radius in range(1, 6)
+        ]
+    )
+
+    with patch.object(
+        TransformationBlur,
+        "_image_transform",
+        autospec=True,
+        side_effect=TransformationBlur._image_transform,
+    ) as mock_blur:
+        results = transformer._stream(PImage.new("RGB", (60, 30), color="red"))
+        first = next(results)
+
+        # Blur does not share work between its outputs, the others wait their turn
+        assert first.identifier == "BLUR_1"
+        assert mock_blur.call_count == 1
+        assert [result.identifier for result in results] == [
+            f"BLUR_{radius}" for radius in range(2, 6)
+        ]
+        assert mock_blur.call_count == 5
@@ -0,0 +1,84 @@
+import os
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from apps.image_processing.core.transformers import pool as pool_module
+from apps.image_processing.core.transformers.pool import (
+    ImageProcessPool,
+    get_process_pool,
+    get_thread_pool,
+    shutdown_process_pool,
+    shutdown_thread_pool,
+)
+
+
+@patch("apps.image_processing.core.transformers.pool.cfutures.ProcessPoolExecutor")
+def test_image_process_pool_reuses_executor(mock_executor):
+    pool = ImageProcessPool(max_workers=2)
+    pool.submit(abs, -1)
+    pool.submit(abs, -2)
+
+    mock_executor.assert_called_once()
+    assert mock_executor.call_args.kwargs["max_workers"] == 2
+    assert mock_executor.return_value.submit.call_count == 2
+
+
+@patch("apps.image_processing.core.transformers.pool.cfutures.ProcessPoolExecutor")
+def test_image_process_pool_recycles_workers_after_max_jobs(mock_executor):
+    pool = ImageProcessPool(max_jobs=2)
+    pool.submit(abs, -1)
+    pool.submit(abs, -2)
+    pool.submit(abs, -3)
+
+    # Each worker is replaced on its own, the executor is kept
+    mock_executor.assert_called_once()
+    assert mock_executor.call_args.kwargs["max_tasks_per_child"] == 2
+    mock_executor.return_value.shutdown.assert_not_called()
+    assert mock_executor.return_value.submit.call_count == 3
+
+
+def test_image_process_pool_replaces_workers_after_max_jobs():
+    pool = ImageProcessPool(max_workers=1, max_jobs=1)
+    try:
+        pids = {pool.submit(os.getpid).result() for _ in range(2)}
+    finally:
+        pool.shutdown()
+
+    assert len(pids) == 2
+
+
+def test_image_process_pool_runs_jobs_and_shuts_down():
+    pool = ImageProcessPool(max_workers=1)
+    assert pool.submit(abs, -3).result() == 3
+
+    pool.shutdown()
+
+    assert pool._executor is None
+    assert pool.submit(abs, -4).result() == 4
+    pool.shutdown()
+
+
+@override_settings(IMAGE_PROCESSING={"POOL_MAX_WORKERS": 3, "POOL_MAX_JOBS": 10})
+def test_get_process_pool_is_shared():
+    shutdown_process_pool()
+    pool = get_process_pool()
+
+    assert get_process_pool() is pool
+    assert pool.max_workers == 3
+    assert pool.max_jobs == 10
+
+    shutdown_process_pool()
+    assert pool_module._process_pool is None
+
+
+@override_settings(IMAGE_PROCESSING={"THREAD_POOL_MAX_WORKERS": 3})
+def test_get_thread_pool_is_shared():
+    shutdown_thread_pool()
+    try:
+        pool = get_thread_pool()
+        assert get_thread_pool() is pool
+        assert pool._max_workers == 3
+    finally:
+        shutdown_thread_pool()
+    assert pool_module._thread_pool is None
@@ -0,0 +1,266 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformations.black_and_white import (
+    ExternalTransformationFiltersBlackAndWhite,
+    TransformationBlackAndWhite,
+)
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.chain import ImageChainTransformer
+from apps.image_processing.core.transformers.encoders import get_encoder
+from apps.image_processing.core.transformers.result_cache import (
+    FileSystemResultCache,
+    InMemoryResultCache,
+    ResultCacheEntry,
+    ResultCacheStats,
+    result_cache_key,
+)
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+from apps.image_processing.models import ProcessedImage
+from apps.image_processing.tests.factories import TransformationBatchFactory
+
+
+def _definition(identifier, transformation, filters):
+    return InternalImageTransformationDefinition(
+        identifier=identifier, transformation=transformation, filters=filters
+    )
+
+
+BLUR = _definition("BLUR", TransformationBlur, ExternalTransformationFiltersBlur())
+BLACK_AND_WHITE = _definition(
+    "BLACK_AND_WHITE",
+    TransformationBlackAndWhite,
+    ExternalTransformationFiltersBlackAndWhite(dither=None),
+)
+THUMBNAIL = _definition(
+    "THUMBNAIL",
+    TransformationThumbnail,
+    ExternalTransformationFiltersThumbnail(size=(32, 32)),
+)
+
+
+def test_result_cache_key_is_canonical():
+    key = result_cache_key("source", [BLUR])
+
+    assert key == result_cache_key(
+        "source",
+        [_definition("OTHER", TransformationBlur, ExternalTransformationFiltersBlur())],
+    )
+    assert key != result_cache_key("other", [BLUR])
+    assert key != result_cache_key(
+        "source",
+        [
+            _definition(
+                "BLUR", TransformationBlur, ExternalTransformationFiltersBlur(radius=2)
+            )
+        ],
+    )
+    assert result_cache_key("source", [BLUR, THUMBNAIL]) != result_cache_key(
+        "source", [THUMBNAIL, BLUR]
+    )
+    assert result_cache_key("source", [BLUR], optimize=True) != key
+
+
+@pytest.mark.parametrize(
+    "cache_factory",
+    [
+        lambda tmp_path: InMemoryResultCache(max_entries=2),
+        lambda tmp_path: FileSystemResultCache(tmp_path, max_entries=2, trim_ratio=1),
+    ],
+)
+def test_result_cache_evicts_least_recently_used(tmp_path, cache_factory):
+    cache = cache_factory(tmp_path)
+    cache.set("first", ResultCacheEntry(file_name="first.png"))
+    cache.set("second", ResultCacheEntry(file_name="second.png"))
+    if isinstance(cache, FileSystemResultCache):
+        os.utime(cache._path("first"), (1, 1))
+        os.utime(cache._path("second"), (2, 2))
+    assert cache.get("first") == ResultCacheEntry(file_name="first.png")
+    cache.set("third", ResultCacheEntry(file_name="third.png", applied_order=["A"]))
+
+    assert len(cache) == 2
+    assert cache.get("second") is None
+    assert cache.get("third") == ResultCacheEntry(
+        file_name="third.png", applied_order=["A"]
+    )
+    assert cache.stats == ResultCacheStats(hits=2, misses=1, evictions=1)
+
+
+def test_file_system_result_cache_trims_in_bulk(tmp_path):
+    cache = FileSystemResultCache(tmp_path, max_entries=10, trim_ratio=0.5)
+    for index in range(10):
+        cache.set(str(index), ResultCacheEntry(file_name=f"{index}.png"))
+        os.utime(cache._path(str(index)), (index, index))
+
+    with patch.object(cache, "_paths", wraps=cache._paths) as paths:
+        cache.set("10", ResultCacheEntry(file_name="10.png"))
+        for index in range(11, 15):
+            cache.set(str(index), ResultCacheEntry(file_name=f"{index}.png"))
+
+    # Only the store past the max entries listed them, down to half of them
+    assert paths.call_count == 1
+    assert cache.stats.evictions == 6
+    assert sorted(int(path.stem) for path in cache._paths()) == list(range(6, 15))
+
+
+def test_file_system_result_cache_counts_existing_entries_once(tmp_path):
+    FileSystemResultCache(tmp_path, max_entries=10).set(
+        "existing", ResultCacheEntry(file_name="existing.png")
+    )
+    cache = FileSystemResultCache(tmp_path, max_entries=10)
+
+    with patch.object(cache, "_paths", wraps=cache._paths) as paths:
+        for index in range(5):
+            cache.set(str(index), ResultCacheEntry(file_name=f"{index}.png"))
+        cache.set("0", ResultCacheEntry(file_name="0.png"))
+        cache.delete("1")
+
+    assert paths.call_count == 1
+    assert cache._count == len(cache) == 5
+
+
+def test_result_cache_discards_invalid_entries(tmp_path):
+    cache = FileSystemResultCache(tmp_path, max_entries=10)
+    cache.set("missing", ResultCacheEntry(file_name="missing.png"))
+    cache._path("broken").write_text("{")
+
+    assert cache.get("missing", validate=lambda entry: False) is None
+    assert cache.get("broken") is None
+    assert len(cache) == 0
+    assert FileSystemResultCache(tmp_path, max_entries=10).get("missing") is None
+
+
+@pytest.mark.django_db
+def test_transformer_reuses_cached_results(result_cache):
+    image = PImage.new("RGB", (64, 48), color="red")
+    transformer = ImageSequentialTransformer(transformations=[BLUR, THUMBNAIL])
+    first = transformer.transform(image, TransformationBatchFactory(), "source")
+
+    with patch.object(
+        ImageSequentialTransformer, "_transform", autospec=True
+    ) as mock_transform:
+        second = transformer.transform(image, TransformationBatchFactory(), "source")
+
+    mock_transform.assert_not_called()
+    assert [result.identifier for result in second] == ["BLUR", "THUMBNAIL"]
+    assert second[1].image.size == first[1].image.size
+    assert ProcessedImage.objects.count() == 4
+    assert ProcessedImage.objects.values("file").distinct().count() == 2
+    assert result_cache.stats == ResultCacheStats(hits=2, misses=2)
+
+
+@pytest.mark.django_db
+def test_transformer_computes_missing_results_only(result_cache):
+    image = PImage.new("RGB", (64, 48), color="red")
+    ImageSequentialTransformer(transformations=[BLUR]).transform(
+        image, TransformationBatchFactory(), "source"
+    )
+    transformer = ImageSequentialTransformer(transformations=[BLUR, THUMBNAIL])
+
+    with patch.object(
+        TransformationBlur, "_image_transform", autospec=True
+    ) as mock_blur:
+        transformations_applied = transformer.transform(
+            image, TransformationBatchFactory(), "source"
+        )
+
+    mock_blur.assert_not_called()
+    assert [result.identifier for result in transformations_applied] == [
+        "BLUR",
+        "THUMBNAIL",
+    ]
+    assert transformations_applied[1].image.size == (32, 24)
+    assert transformer.transformations_data == [BLUR, THUMBNAIL]
+
+
+@pytest.mark.django_db
+def test_transformer_caches_results_by_encoder(result_cache):
+    image = PImage.new("RGB", (64, 48), color="red")
+    ImageSequentialTransformer(transformations=[THUMBNAIL]).transform(
+        image, TransformationBatchFactory(), "source"
+    )
+
+    ImageSequentialTransformer(
+        transformations=[THUMBNAIL], encoder=get_encoder("webp", "fast")
+    ).transform(image, TransformationBatchFactory(), "source")
+    ImageSequentialTransformer(transformations=[THUMBNAIL]).transform(
+        image, TransformationBatchFactory(), "source"
+    )
+
+    assert result_cache.stats == ResultCacheStats(hits=1, misses=2)
+    processed_images = ProcessedImage.objects.order_by("created_at")
+    assert [processed.encoder for processed in processed_images] == [
+        "png:balanced",
+        "webp:fast",
+        "png:balanced",
+    ]
+    assert processed_images[2].file.name == processed_images[0].file.name
+    assert all(
+        processed.file_size == processed.file.size for processed in processed_images
+    )
+
+
+@pytest.mark.django_db
+def test_transformer_recomputes_deleted_results(result_cache):
+    image = PImage.new("RGB", (64, 48), color="red")
+    transformer = ImageSequentialTransformer(transformations=[THUMBNAIL])
+    transformer.transform(image, TransformationBatchFactory(), "source")
+    processed = ProcessedImage.objects.get()
+    processed.file.storage.delete(processed.file.name)
+
+    transformer.transform(image, TransformationBatchFactory(), "source")
+
+    assert ProcessedImage.objects.exclude(file=processed.file.name).count() == 1
+    assert result_cache.stats.misses == 2
+
+
+@pytest.mark.django_db
+def test_chain_transformer_caches_final_result(result_cache):
+    image = PImage.new("RGB", (64, 48), color="red")
+    transformer = ImageChainTransformer(transformations=[BLUR, THUMBNAIL])
+    first = transformer.transform(image, TransformationBatchFactory(), "source")
+    second = transformer.transform(image, TransformationBatchFactory(), "source")
+    ImageChainTransformer(
+        transformations=[BLUR, THUMBNAIL], include_intermediates=True
+    ).transform(image, TransformationBatchFactory(), "source")
+
+    assert second[0].identifier == first[0].identifier == "BLUR-THUMBNAIL"
+    assert second[0].transformation_name == first[0].transformation_name
+    assert second[0].applied_order == first[0].applied_order
+    assert result_cache.stats == ResultCacheStats(hits=1, misses=1)
+    assert len(result_cache) == 1
+
+
+@pytest.mark.django_db
+def test_chain_transformer_cached_result_keeps_requested_final_transformation(
+    result_cache,
+):
+    image = PImage.linear_gradient("L").resize((400, 300)).convert("RGB")
+    transformer = ImageChainTransformer(transformations=[BLUR, BLACK_AND_WHITE])
+    first = transformer.transform(image, TransformationBatchFactory(), "source")
+    second = transformer.transform(image, TransformationBatchFactory(), "source")
+
+    assert result_cache.stats.hits == 1
+    assert second[0].applied_order == first[0].applied_order
+    assert second[0].applied_order[-1] == "BLUR"
+    assert (
+        second[0].transformation_name
+        == first[0].transformation_name
+        == TransformationBlackAndWhite.name
+    )
+    assert second[0].applied_filters == BLACK_AND_WHITE.filters
@@ -0,0 +1,53 @@
+import pytest
+from PIL import Image as PImage
+
+from apps.image_processing.core.transformations.black_and_white import (
+    ExternalTransformationFiltersBlackAndWhite,
+    TransformationBlackAndWhite,
+)
+from apps.image_processing.core.transformers.shared_memory import (
+    SharedImage,
+    load_shared_image_result,
+    transform_shared_image,
+)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+def test_shared_image_round_trip(mode):
+    image = PImage.linear_gradient("L").resize((30, 20)).convert(mode)
+    shared, memory = SharedImage.from_image(image)
+    try:
+        view = shared.open(memory)
+        assert view.readonly
+        assert view.size == image.size
+        copied = shared.copy(memory)
+        del view
+    finally:
+        memory.close()
+        memory.unlink()
+
+    assert copied.mode == mode
+    assert copied.tobytes() == image.tobytes()
+
+
+def test_shared_image_supports():
+    assert SharedImage.supports(PImage.new("RGB", (1, 1)))
+    assert not SharedImage.supports(PImage.new("P", (1, 1)))
+
+
+def test_transform_shared_image():
+    image = PImage.linear_gradient("L").resize((30, 20)).convert("RGB")
+    filters = ExternalTransformationFiltersBlackAndWhite(dither=None)
+    shared, memory = SharedImage.from_image(image)
+    try:
+        result = transform_shared_image(TransformationBlackAndWhite, shared, filters)
+    finally:
+        memory.close()
+        memory.unlink()
+
+    assert isinstance(result, SharedImage)
+    transformed = load_shared_image_result(result)
+    expected = TransformationBlackAndWhite(image, filters).image_transformed
+    assert transformed.tobytes() == expected.tobytes()
+    with pytest.raises(FileNotFoundError):
+        result.attach()
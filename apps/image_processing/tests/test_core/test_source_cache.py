@@ -0,0 +1,158 @@
+import os
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from PIL import Image as PImage
+
+from apps.image_processing.core.managers.base import ImageSourceMetadata
+from apps.image_processing.core.managers.local import ImageLocalManager
+from apps.image_processing.core.managers.source_cache import (
+    SourceCacheEntry,
+    SourceImageCache,
+    image_nbytes,
+)
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
+from apps.image_processing.core.transformers.sequential import (
+    ImageSequentialTransformer,
+)
+from apps.image_processing.tests.factories import ProcessingImageFactory
+
+THUMBNAIL = InternalImageTransformationDefinition(
+    identifier="THUMBNAIL",
+    transformation=TransformationThumbnail,
+    filters=ExternalTransformationFiltersThumbnail(size=(32, 32)),
+)
+BLUR = InternalImageTransformationDefinition(
+    identifier="BLUR",
+    transformation=TransformationBlur,
+    filters=ExternalTransformationFiltersBlur(),
+)
+
+
+def _entry(size, mode="L"):
+    image = PImage.new(mode, size)
+    return SourceCacheEntry(
+        image=image,
+        metadata=ImageSourceMetadata(size=size, mode=mode, format="PNG"),
+    )
+
+
+def _jpeg_processing_image(size):
+    buffer = BytesIO()
+    PImage.linear_gradient("L").resize(size).convert("RGB").save(buffer, "JPEG")
+    return ProcessingImageFactory(
+        file=ContentFile(buffer.getvalue(), name="image.jpeg")
+    )
+
+
+def _manager(processing_image, transformations):
+    return ImageLocalManager(
+        image=processing_image,
+        transformer=ImageSequentialTransformer(transformations=transformations),
+    )
+
+
+@pytest.mark.parametrize(
+    "mode, expected",
+    [("L", 100), ("P", 100), ("RGB", 400), ("RGBA", 400), ("I", 400)],
+)
+def test_image_nbytes(mode, expected):
+    assert image_nbytes(PImage.new(mode, (10, 10))) == expected
+
+
+def test_source_cache_evicts_least_recently_used():
+    cache = SourceImageCache(max_bytes=250)
+    cache.set("first", _entry((10, 10)))
+    cache.set("second", _entry((10, 10)))
+    cache.get("first")
+    cache.set("third", _entry((10, 10)))
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+    assert cache.bytes == 200
+    assert cache.stats.evictions == 1
+    assert cache.stats.hit_rate == pytest.approx(3 / 4)
+
+
+def test_source_cache_skips_images_larger_than_the_cache():
+    cache = SourceImageCache(max_bytes=250)
+    cache.set("first", _entry((10, 10)))
+    cache.set("large", _entry((20, 20)))
+
+    assert len(cache) == 1
+    assert cache.bytes == 100
+
+
+def test_source_cache_replaces_entry():
+    cache = SourceImageCache(max_bytes=1000)
+    cache.set("key", _entry((10, 10)))
+    cache.set("key", _entry((20, 20)))
+
+    assert len(cache) == 1
+    assert cache.bytes == 400
+
+
+def test_source_cache_invalid_entry_is_a_miss():
+    cache = SourceImageCache(max_bytes=1000)
+    cache.set("key", _entry((10, 10)))
+
+    assert cache.get("key", validate=lambda entry: False) is None
+    assert cache.stats.misses == 1
+    assert len(cache) == 1
+
+
+@pytest.mark.django_db
+def test_manager_reuses_decoded_source(source_cache):
+    processing_image = _jpeg_processing_image((160, 120))
+    first = _manager(processing_image, [BLUR]).get_image()
+
+    with patch.object(ImageLocalManager, "_get_image") as mock_get_image:
+        manager = _manager(processing_image, [BLUR])
+        image = manager.get_image()
+
+    mock_get_image.assert_not_called()
+    assert image is first
+    assert manager.get_metadata().size == (160, 120)
+    assert source_cache.stats.hits == 1
+
+
+@pytest.mark.django_db
+def test_manager_decodes_again_at_higher_resolution(source_cache):
+    processing_image = _jpeg_processing_image((1600, 1200))
+    # The thumbnail needs 64x64, JPEG scales are powers of two
+    assert _manager(processing_image, [THUMBNAIL]).get_image().size == (200, 150)
+    assert _manager(processing_image, [THUMBNAIL]).get_image().size == (200, 150)
+
+    assert _manager(processing_image, [BLUR]).get_image().size == (1600, 1200)
+    # The full resolution is reused, reduced by an integer factor
+    assert _manager(processing_image, [THUMBNAIL]).get_image().size == (89, 67)
+    assert source_cache.stats.hits == 2
+    assert source_cache.stats.misses == 2
+
+
+@pytest.mark.django_db
+def test_manager_decodes_again_modified_file(source_cache):
+    processing_image = _jpeg_processing_image((160, 120))
+    first_key = _manager(processing_image, [BLUR]).get_source_key()
+    _manager(processing_image, [BLUR]).get_image()
+    modified_time = os.path.getmtime(processing_image.file.path) + 10
+    os.utime(processing_image.file.path, (modified_time, modified_time))
+
+    manager = _manager(processing_image, [BLUR])
+    manager.get_image()
+
+    assert manager.get_source_key() != first_key
+    assert source_cache.stats.misses == 2
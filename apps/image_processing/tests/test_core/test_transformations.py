@@ -1,15 +1,23 @@
+import math
+from dataclasses import replace
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from PIL import Image, ImageFilter
 
 from apps.image_processing.constants import (
+    TRANSFORMATION_BACKEND,
     TRANSFORMATION_FILTER_BLUR_FILTER,
     TRANSFORMATION_FILTER_DITHER,
     TRANSFORMATION_FILTER_THUMBNAIL_RESAMPLING,
+    TRANSFORMATIONS_PYRAMID_MIN_PSNR,
 )
+from apps.image_processing.core.transformations.array import apply_array_operations
 from apps.image_processing.core.transformations.base import (
+    ImageSourceNode,
     InternalImageTransformation,
+    evaluate_nodes,
 )
 from apps.image_processing.core.transformations.black_and_white import (
     ExternalTransformationFiltersBlackAndWhite,
@@ -19,9 +27,18 @@ from apps.image_processing.core.transformations.blur import (
     ExternalTransformationFiltersBlur,
     TransformationBlur,
 )
+from apps.image_processing.core.transformations.brightness import (
+    ExternalTransformationFiltersBrightness,
+    TransformationBrightness,
+)
+from apps.image_processing.core.transformations.threshold import (
+    ExternalTransformationFiltersThreshold,
+    TransformationThreshold,
+)
 from apps.image_processing.core.transformations.thumbnail import (
     ExternalTransformationFiltersThumbnail,
     TransformationThumbnail,
+    thumbnail_size,
 )
 
 
@@ -138,3 +155,210 @@ def test_image_generate_black_and_white(MockImage, filters, expected_filters):
     mock_img_instance = MockImage()
     TransformationBlackAndWhite(mock_img_instance, filters=filters)
     mock_img_instance.convert.assert_called_once_with(**expected_filters)
+
+
+def test_image_transformation_node_is_lazy():
+    image = Image.new("RGB", (400, 200), color="red")
+    source = ImageSourceNode(image)
+    with patch.object(TransformationBlur, "_image_transform") as mock_transform:
+        node = TransformationBlackAndWhite.node(
+            source, ExternalTransformationFiltersBlackAndWhite()
+        ).then(TransformationBlur, ExternalTransformationFiltersBlur())
+
+        assert node.estimate_output() == ((400, 200), 1)
+        assert node.estimate_cost() == (
+            TransformationBlackAndWhite.cost_per_pixel * 400 * 200 * 3
+            + TransformationBlur.cost_per_pixel * 400 * 200
+        )
+        mock_transform.assert_not_called()
+
+
+def test_image_transformation_node_evaluate_matches_eager():
+    image = Image.linear_gradient("L").resize((120, 80)).convert("RGB")
+    blur_filters = ExternalTransformationFiltersBlur(radius=2)
+    thumbnail_filters = ExternalTransformationFiltersThumbnail(size=(60, 60))
+    node = (
+        ImageSourceNode(image)
+        .then(TransformationBlur, blur_filters)
+        .then(TransformationThumbnail, thumbnail_filters)
+    )
+
+    blurred = TransformationBlur(image, blur_filters).image_transformed
+    expected = TransformationThumbnail(blurred, thumbnail_filters).image_transformed
+    streamed = list(node.stream())
+
+    assert node.evaluate().tobytes() == expected.tobytes()
+    assert [step for step, _ in streamed] == node.path()
+    assert streamed[0][1].tobytes() == blurred.tobytes()
+    assert streamed[1][1].tobytes() == expected.tobytes()
+
+
+def test_evaluate_nodes_computes_shared_nodes_once():
+    image = Image.new("RGB", (60, 30), color="red")
+    shared = ImageSourceNode(image).then(
+        TransformationBlackAndWhite, ExternalTransformationFiltersBlackAndWhite()
+    )
+    blurred = shared.then(TransformationBlur, ExternalTransformationFiltersBlur())
+    thumbnail = shared.then(
+        TransformationThumbnail, ExternalTransformationFiltersThumbnail(size=(10, 10))
+    )
+    with patch.object(
+        TransformationBlackAndWhite,
+        "_image_transform",
+        autospec=True,
+        side_effect=lambda self, image, filters: image.convert("L"),
+    ) as mock_transform:
+        images = evaluate_nodes([blurred, shared, thumbnail])
+
+    mock_transform.assert_called_once()
+    assert [image.size for image in images] == [(60, 30), (60, 30), (10, 5)]
+    assert images[1].mode == "L"
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA", "P"])
+@pytest.mark.parametrize(
+    "transformation, filters",
+    [
+        (TransformationBrightness, ExternalTransformationFiltersBrightness(factor=1.7)),
+        (TransformationBrightness, ExternalTransformationFiltersBrightness(factor=0.3)),
+        (TransformationThreshold, ExternalTransformationFiltersThreshold(threshold=90)),
+        (TransformationBlackAndWhite, ExternalTransformationFiltersBlackAndWhite()),
+    ],
+)
+def test_point_transformation_backends_match(mode, transformation, filters):
+    image = Image.linear_gradient("L").resize((50, 30)).convert(mode)
+    numpy_filters = replace(filters, backend=TRANSFORMATION_BACKEND.NUMPY)
+
+    expected = transformation(image, filters).image_transformed
+    transformed = transformation(image, numpy_filters).image_transformed
+
+    assert transformation.array_operation(filters) is None
+    assert transformation.array_operation(numpy_filters) is not None
+    assert transformed.mode == expected.mode
+    assert transformed.tobytes() == expected.tobytes()
+
+
+def test_brightness_keeps_alpha():
+    image = Image.new("RGBA", (4, 4), color=(100, 50, 200, 120))
+
+    transformed = TransformationBrightness(
+        image, ExternalTransformationFiltersBrightness(factor=2)
+    ).image_transformed
+
+    assert transformed.getpixel((0, 0)) == (200, 100, 255, 120)
+
+
+def test_image_transformation_node_stream_fuses_point_transformations():
+    image = Image.linear_gradient("L").resize((60, 40)).convert("RGB")
+    backend = TRANSFORMATION_BACKEND.NUMPY
+    node = (
+        ImageSourceNode(image)
+        .then(TransformationBrightness, ExternalTransformationFiltersBrightness(1.2))
+        .then(
+            TransformationBlackAndWhite,
+            ExternalTransformationFiltersBlackAndWhite(backend=backend),
+        )
+        .then(
+            TransformationThreshold,
+            ExternalTransformationFiltersThreshold(threshold=80, backend=backend),
+        )
+        .then(
+            TransformationBrightness,
+            ExternalTransformationFiltersBrightness(factor=0.5, backend=backend),
+        )
+        .then(TransformationBlur, ExternalTransformationFiltersBlur(radius=1))
+    )
+    expected = list(node.stream())
+
+    with patch(
+        "apps.image_processing.core.transformations.base.apply_array_operations",
+        wraps=apply_array_operations,
+    ) as mock_apply:
+        streamed = list(node.stream(fuse=True))
+
+    path = node.path()
+    mock_apply.assert_called_once()
+    assert [step for step, _ in streamed] == [path[0], path[3], path[4]]
+    assert streamed[1][1].tobytes() == expected[3][1].tobytes()
+    assert streamed[2][1].tobytes() == expected[4][1].tobytes()
+
+
+def _psnr(image, expected):
+    if image.mode == "RGBA":
+        # Colors under a transparent alpha are not visible
+        image, expected = image.convert("RGBa"), expected.convert("RGBa")
+    difference = np.asarray(image, dtype=float) - np.asarray(expected, dtype=float)
+    mse = np.mean(difference**2)
+    return math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA", "P"])
+def test_thumbnail_transform_many_matches_single(mode):
+    bands = [
+        Image.effect_noise((1601, 1199), 40),
+        Image.linear_gradient("L").resize((1601, 1199)),
+        Image.effect_mandelbrot((1601, 1199), (-2, -1.5, 1, 1.5), 50),
+        Image.linear_gradient("L").rotate(90).resize((1601, 1199)),
+    ]
+    image = Image.merge("RGBA", bands).convert(mode)
+    filters = [
+        ExternalTransformationFiltersThumbnail(size=(800, 800)),
+        ExternalTransformationFiltersThumbnail(size=(300, 300)),
+        ExternalTransformationFiltersThumbnail(size=(100, 100), reducing_gap=3),
+        ExternalTransformationFiltersThumbnail(size=(64, 64), reducing_gap=None),
+        ExternalTransformationFiltersThumbnail(
+            size=(50, 50), resample=TRANSFORMATION_FILTER_THUMBNAIL_RESAMPLING.NEAREST
+        ),
+        ExternalTransformationFiltersThumbnail(size=(2000, 2000)),
+    ]
+
+    thumbnails = TransformationThumbnail.transform_many(image, filters)
+
+    for thumbnail, output_filters in zip(thumbnails, filters):
+        expected = TransformationThumbnail(image, output_filters).image_transformed
+        assert thumbnail.size == expected.size
+        assert thumbnail.mode == expected.mode
+        assert _psnr(thumbnail, expected) >= TRANSFORMATIONS_PYRAMID_MIN_PSNR
+
+
+def test_thumbnail_transform_many_builds_pyramid_once():
+    image = Image.linear_gradient("L").resize((1024, 1024))
+    filters = [
+        ExternalTransformationFiltersThumbnail(size=(size, size))
+        for size in (256, 128, 64, 32)
+    ]
+    with patch.object(
+        Image.Image, "reduce", autospec=True, wraps=Image.Image.reduce
+    ) as mock_reduce:
+        thumbnails = TransformationThumbnail.transform_many(image, filters)
+
+    assert [thumbnail.size for thumbnail in thumbnails] == [
+        (256, 256),
+        (128, 128),
+        (64, 64),
+        (32, 32),
+    ]
+    # Levels of 512, 256, 128 and 64 pixels, each one reduced from the previous one
+    assert [call.args[0].size for call in mock_reduce.call_args_list] == [
+        (1024, 1024),
+        (512, 512),
+        (256, 256),
+        (128, 128),
+    ]
+
+
+@pytest.mark.parametrize(
+    "size, box, expected",
+    [
+        ((400, 300), (100, 100), (100, 75)),
+        ((300, 400), (100, 100), (75, 100)),
+        ((4001, 2999), (128, 128), (128, 96)),
+        ((100, 50), (100.7, 80), None),
+    ],
+)
+def test_thumbnail_size_matches_pillow(size, box, expected):
+    image = Image.new("L", size)
+    image.thumbnail(box)
+
+    assert thumbnail_size(size, box) == expected
+    assert image.size == (expected or size)
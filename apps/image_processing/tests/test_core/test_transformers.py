@@ -1,7 +1,16 @@
-from unittest.mock import MagicMock, call, patch
+import threading
+import time
+from concurrent import futures as cfutures
+from io import BytesIO
+from unittest.mock import ANY, call, patch
 
 import pytest
+from PIL import Image as PImage
 
+from apps.image_processing.constants import (
+    TRANSFORMATION_BACKEND,
+    TRANSFORMATION_FILTER_BLUR_FILTER,
+)
 from apps.image_processing.core.transformations.black_and_white import (
     ExternalTransformationFiltersBlackAndWhite,
     TransformationBlackAndWhite,
@@ -10,66 +19,208 @@ from apps.image_processing.core.transformations.blur import (
     ExternalTransformationFiltersBlur,
     TransformationBlur,
 )
+from apps.image_processing.core.transformations.brightness import (
+    ExternalTransformationFiltersBrightness,
+    TransformationBrightness,
+)
+from apps.image_processing.core.transformations.threshold import (
+    ExternalTransformationFiltersThreshold,
+    TransformationThreshold,
+)
 from apps.image_processing.core.transformations.thumbnail import (
     ExternalTransformationFiltersThumbnail,
     TransformationThumbnail,
 )
+from apps.image_processing.core.transformers.base import (
+    ImageTransformationError,
+    InternalImageTransformationDefinition,
+)
 from apps.image_processing.core.transformers.chain import (
     ImageChainTransformer,
 )
+from apps.image_processing.core.transformers.graph import ImageGraphTransformer
 from apps.image_processing.core.transformers.multiprocess import (
     ImageMultiProcessTransformer,
 )
+from apps.image_processing.core.transformers.pool import ImageProcessPool
 from apps.image_processing.core.transformers.sequential import (
     ImageSequentialTransformer,
 )
+from apps.image_processing.core.transformers.shared_memory import (
+    transform_shared_image,
+)
+from apps.image_processing.core.transformers.threaded import ImageThreadedTransformer
+from apps.image_processing.core.transformers.tiled import ImageTiledTransformer
 from apps.image_processing.models import ImageTransformation, ProcessedImage
 from apps.image_processing.tests.factories import TransformationBatchFactory
 
 
-@patch(
-    "apps.image_processing.core.transformers.multiprocess.cfutures.ProcessPoolExecutor"
-)
+def _completed_future(fn, *args):
+    future = cfutures.Future()
+    future.set_result(fn(*args))
+    return future
+
+
+@patch("apps.image_processing.core.transformers.multiprocess.get_process_pool")
 @pytest.mark.django_db
-def test_image_multiprocess_transformer(mock_executor, image_transformations):
+def test_image_multiprocess_transformer(
+    mock_get_process_pool, temp_image_file, image_transformations
+):
     transformation_batch = TransformationBatchFactory()
-    mock_image = MagicMock()
-    mock_image_copy = MagicMock()
-    mock_image.copy.return_value = mock_image_copy
-    mock_pool_executor_instance = mock_executor.return_value.__enter__.return_value
-    mock_future = mock_pool_executor_instance.submit.return_value
+    mock_pool = mock_get_process_pool.return_value
+    mock_pool.submit.side_effect = _completed_future
 
     transformer = ImageMultiProcessTransformer(transformations=image_transformations)
-    with patch.object(transformer, "_callback_process") as mock_callback_process:
-        transformer.transform(mock_image, transformation_batch=transformation_batch)
-        assert_calls = [
-            call(
-                TransformationBlur,
-                mock_image_copy,
-                ExternalTransformationFiltersBlur(radius=80),
-            ),
-            call(
-                TransformationThumbnail,
-                mock_image_copy,
-                ExternalTransformationFiltersThumbnail(size=(64, 64)),
-            ),
-            call(
-                TransformationBlackAndWhite,
-                mock_image_copy,
-                ExternalTransformationFiltersBlackAndWhite(dither=None),
-            ),
-        ]
-        mock_pool_executor_instance.submit.assert_has_calls(
-            assert_calls,
-            any_order=True,
-        )
-        assert len(assert_calls) == len(image_transformations)
+    transformations_applied = transformer.transform(
+        temp_image_file, transformation_batch=transformation_batch
+    )
 
-        for transformation in image_transformations:
-            mock_future.add_done_callback.assert_called_with(
-                mock_callback_process(transformation.identifier)
-            )
-            mock_callback_process.assert_called_with(transformation.identifier)
+    assert_calls = [
+        call(
+            transform_shared_image,
+            TransformationBlur,
+            ANY,
+            ExternalTransformationFiltersBlur(radius=80),
+        ),
+        call(
+            transform_shared_image,
+            TransformationThumbnail,
+            ANY,
+            ExternalTransformationFiltersThumbnail(size=(64, 64)),
+        ),
+        call(
+            transform_shared_image,
+            TransformationBlackAndWhite,
+            ANY,
+            ExternalTransformationFiltersBlackAndWhite(dither=None),
+        ),
+    ]
+    mock_pool.submit.assert_has_calls(assert_calls, any_order=True)
+    assert sorted(transform.identifier for transform in transformations_applied) == (
+        sorted(transform.identifier for transform in image_transformations)
+    )
+    assert ImageTransformation.objects.count() == len(image_transformations)
+
+
+def _failing_future(fn, *args):
+    future = cfutures.Future()
+    try:
+        result = fn(*args)
+    except Exception as error:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+@patch("apps.image_processing.core.transformers.multiprocess.get_process_pool")
+def test_image_multiprocess_transformer_streams_in_completion_order(
+    mock_get_process_pool, image_transformations
+):
+    submitted = []
+
+    def submit(fn, *args):
+        submitted.append((cfutures.Future(), fn, args))
+        return submitted[-1][0]
+
+    def complete_in_reverse():
+        for future, fn, args in reversed(submitted):
+            future.set_result(fn(*args))
+            time.sleep(0.01)
+
+    mock_get_process_pool.return_value.submit.side_effect = submit
+    transformer = ImageMultiProcessTransformer(transformations=image_transformations)
+    results = transformer._stream_completed(PImage.new("RGB", (60, 30), color="red"))
+
+    # The jobs are submitted with the stream, complete them once collected
+    completer = threading.Timer(0.05, complete_in_reverse)
+    completer.start()
+    streamed = list(results)
+    completer.join()
+
+    assert [index for index, _ in streamed] == [2, 1, 0]
+    assert [outcome.identifier for _, outcome in streamed] == [
+        transform_data.identifier for transform_data in image_transformations[::-1]
+    ]
+
+
+def _raise_value_error(self, image, filters):
+    raise ValueError
+
+
+@patch("apps.image_processing.core.transformers.multiprocess.get_process_pool")
+@patch.object(TransformationThumbnail, "_image_transform", _raise_value_error)
+@pytest.mark.django_db
+def test_image_multiprocess_transformer_saves_results_of_others_on_failure(
+    mock_get_process_pool, temp_image_file, image_transformations
+):
+    mock_get_process_pool.return_value.submit.side_effect = _failing_future
+    transformer = ImageMultiProcessTransformer(transformations=image_transformations)
+
+    with pytest.raises(ImageTransformationError) as error:
+        transformer.transform(temp_image_file, TransformationBatchFactory())
+
+    assert [failure.identifier for failure in error.value.failures] == [
+        "THUMBNAIL/size_64"
+    ]
+    assert isinstance(error.value.failures[0].error, ValueError)
+    assert [result.identifier for result in error.value.results] == [
+        "BLUR/radius_80",
+        "BLACK_AND_WHITE/dither_none",
+    ]
+    assert sorted(ProcessedImage.objects.values_list("identifier", flat=True)) == [
+        "BLACK_AND_WHITE/dither_none",
+        "BLUR/radius_80",
+    ]
+
+
+@pytest.mark.parametrize("use_shared_memory", [True, False])
+@patch("apps.image_processing.core.transformers.multiprocess.get_process_pool")
+def test_image_multiprocess_transformer_matches_sequential(
+    mock_get_process_pool, use_shared_memory, image_transformations
+):
+    mock_get_process_pool.return_value.submit.side_effect = _completed_future
+    image = PImage.linear_gradient("L").resize((120, 80)).convert("RGB")
+
+    transformer = ImageMultiProcessTransformer(
+        transformations=image_transformations, use_shared_memory=use_shared_memory
+    )
+    transformations_applied = {
+        transform.identifier: transform.image
+        for transform in transformer._transform(image)
+    }
+    expected = ImageSequentialTransformer(image_transformations)._transform(image)
+
+    submitted = mock_get_process_pool.return_value.submit.call_args_list
+    assert all(
+        (submit.args[0] is transform_shared_image) is use_shared_memory
+        for submit in submitted
+    )
+    for transform in expected:
+        image_transformed = transformations_applied[transform.identifier]
+        assert image_transformed.mode == transform.image.mode
+        assert image_transformed.tobytes() == transform.image.tobytes()
+
+
+@pytest.mark.django_db
+def test_image_multiprocess_transformer_reuses_pool(
+    temp_image_file, image_transformations
+):
+    transformer = ImageMultiProcessTransformer(transformations=image_transformations)
+    with patch(
+        "apps.image_processing.core.transformers.multiprocess.get_process_pool",
+        return_value=ImageProcessPool(max_workers=1),
+    ) as mock_get_process_pool:
+        pool = mock_get_process_pool.return_value
+        first = transformer._transform(temp_image_file)
+        executor = pool._executor
+        second = transformer._transform(temp_image_file)
+        pool.shutdown()
+
+    assert len(first) == len(second) == len(image_transformations)
+    assert executor is not None
+    assert pool._executor is None
+    assert mock_get_process_pool.call_count == 2
 
 
 @pytest.mark.django_db
@@ -87,6 +238,149 @@ def test_image_sequential_transformer(temp_image_file, image_transformations):
     assert ProcessedImage.objects.count() == len(image_transformations)
 
 
+def test_image_sequential_transformer_shares_thumbnail_pyramid():
+    image = PImage.linear_gradient("L").resize((400, 200)).convert("RGB")
+    transformations = [
+        _thumbnail((64, 64), 2),
+        _blur(),
+        _thumbnail((32, 32), 2),
+    ]
+    transformer = ImageSequentialTransformer(transformations=transformations)
+    with patch.object(
+        TransformationThumbnail,
+        "transform_many",
+        wraps=TransformationThumbnail.transform_many,
+    ) as mock_transform_many:
+        transformations_applied = transformer._transform(image)
+
+    mock_transform_many.assert_called_once_with(
+        image, [transformations[0].filters, transformations[2].filters]
+    )
+    assert [transform.identifier for transform in transformations_applied] == [
+        "THUMBNAIL",
+        "BLUR",
+        "THUMBNAIL",
+    ]
+    assert transformations_applied[0].image.size == (64, 32)
+    assert transformations_applied[1].image.size == (400, 200)
+    assert transformations_applied[2].image.size == (32, 16)
+
+
+@pytest.mark.usefixtures("thread_pool")
+@pytest.mark.django_db
+def test_image_threaded_transformer(temp_image_file, image_transformations):
+    transformation_batch = TransformationBatchFactory()
+    transformer = ImageThreadedTransformer(transformations=image_transformations)
+    transformations_applied = transformer.transform(
+        temp_image_file, transformation_batch
+    )
+
+    assert [transform.identifier for transform in transformations_applied] == [
+        transform.identifier for transform in image_transformations
+    ]
+    assert ImageTransformation.objects.count() == len(image_transformations)
+    assert ProcessedImage.objects.count() == len(image_transformations)
+
+
+@pytest.mark.usefixtures("thread_pool")
+def test_image_threaded_transformer_matches_sequential(image_transformations):
+    image = PImage.linear_gradient("L").resize((120, 80)).convert("RGB")
+
+    transformer = ImageThreadedTransformer(transformations=image_transformations)
+    transformations_applied = transformer._transform(image)
+    expected = ImageSequentialTransformer(image_transformations)._transform(image)
+
+    for transform, expected_transform in zip(transformations_applied, expected):
+        assert transform.image.tobytes() == expected_transform.image.tobytes()
+    assert [
+        transformer._encode_result(transform) for transform in transformations_applied
+    ] == [
+        ImageSequentialTransformer(image_transformations)._encode_result(transform)
+        for transform in expected
+    ]
+
+
+def _tile_local_transformations():
+    return [
+        InternalImageTransformationDefinition(
+            identifier=f"BLUR/{blur_filter}/{radius}",
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(
+                filter=blur_filter, radius=radius
+            ),
+        )
+        for blur_filter in TRANSFORMATION_FILTER_BLUR_FILTER
+        for radius in (1, 2.5, 7)
+    ] + [
+        InternalImageTransformationDefinition(
+            identifier="BLACK_AND_WHITE",
+            transformation=TransformationBlackAndWhite,
+            filters=ExternalTransformationFiltersBlackAndWhite(),
+        )
+    ]
+
+
+@pytest.mark.parametrize("memory_limit", [1, 120 * 9 * 60, 120 * 9 * 1000])
+def test_image_tiled_transformer_matches_sequential(memory_limit):
+    image = PImage.effect_noise((120, 80), 60).convert("RGB")
+    transformations = _tile_local_transformations()
+
+    transformer = ImageTiledTransformer(transformations, memory_limit=memory_limit)
+    transformations_applied = transformer._transform(image)
+    expected = ImageSequentialTransformer(transformations)._transform(image)
+
+    for transform, expected_transform in zip(transformations_applied, expected):
+        assert transform.image.mode == expected_transform.image.mode
+        assert transform.image.tobytes() == expected_transform.image.tobytes()
+
+
+def test_image_tiled_transformer_encodes_once():
+    image = PImage.effect_noise((120, 80), 60).convert("RGB")
+    transformer = ImageTiledTransformer(_tile_local_transformations(), memory_limit=1)
+    transformations_applied = transformer._transform(image)
+
+    with patch.object(transformer, "_encode") as mock_encode:
+        encoded_images = [
+            transformer._encode_result(transform)
+            for transform in transformations_applied
+        ]
+
+    mock_encode.assert_not_called()
+    for transform, encoded in zip(transformations_applied, encoded_images):
+        assert PImage.open(BytesIO(encoded)).tobytes() == transform.image.tobytes()
+
+
+@pytest.mark.django_db
+def test_image_tiled_transformer(temp_image_file):
+    transformation_batch = TransformationBatchFactory()
+    transformations = _tile_local_transformations()
+    transformer = ImageTiledTransformer(transformations, memory_limit=4096)
+    transformations_applied = transformer.transform(
+        temp_image_file, transformation_batch
+    )
+
+    assert [transform.identifier for transform in transformations_applied] == [
+        transform.identifier for transform in transformations
+    ]
+    assert ProcessedImage.objects.count() == len(transformations)
+
+
+def test_image_tiled_transformer_rejects_non_tile_local(image_transformations):
+    with pytest.raises(ValueError):
+        ImageTiledTransformer(image_transformations)
+
+
+@pytest.mark.parametrize(
+    "memory_limit, halo, bands, expected",
+    [(1, 0, 3, 1), (100 * 9 * 50, 0, 3, 50), (100 * 7 * 50, 5, 1, 40)],
+)
+def test_image_tiled_transformer_strip_height(memory_limit, halo, bands, expected):
+    image = PImage.new("RGB", (100, 100))
+    transformer = ImageTiledTransformer([], memory_limit=memory_limit)
+
+    assert transformer.strip_height(image, halo, bands) == expected
+
+
 @pytest.mark.django_db
 def test_image_chain_transformer(temp_image_file, image_transformations):
     transformation_batch = TransformationBatchFactory()
@@ -101,3 +395,217 @@ def test_image_chain_transformer(temp_image_file, image_transformations):
     assert len(transformations_applied) == 1
     assert ImageTransformation.objects.count() == 1
     assert ProcessedImage.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_image_chain_transformer_with_intermediates(
+    temp_image_file, image_transformations
+):
+    transformation_batch = TransformationBatchFactory()
+    transformer = ImageChainTransformer(
+        transformations=image_transformations, include_intermediates=True
+    )
+    transformations_applied = transformer.transform(
+        temp_image_file, transformation_batch
+    )
+    identifiers = [transform.identifier for transform in transformations_applied]
+
+    assert identifiers == [
+        "BLUR/radius_80",
+        "BLUR/radius_80-THUMBNAIL/size_64",
+        "BLUR/radius_80-THUMBNAIL/size_64-BLACK_AND_WHITE/dither_none",
+    ]
+    assert transformations_applied[-1].image.mode == "L"
+    assert ImageTransformation.objects.count() == len(image_transformations)
+    assert ProcessedImage.objects.count() == len(image_transformations)
+
+
+@pytest.mark.parametrize("length", [1, 2, 5, 10])
+def test_image_chain_transformer_runs_each_step_once(temp_image_file, length):
+    transformations = [
+        InternalImageTransformationDefinition(
+            identifier=str(index),
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(radius=1),
+        )
+        for index in range(length)
+    ]
+    transformer = ImageChainTransformer(transformations=transformations)
+    with patch.object(
+        TransformationBlur, "_image_transform", side_effect=lambda image, filters: image
+    ) as mock_image_transform:
+        transformations_applied = transformer._transform(temp_image_file)
+
+    assert mock_image_transform.call_count == length
+    assert len(transformations_applied) == 1
+
+
+def _graph_transformations():
+    return [
+        InternalImageTransformationDefinition(
+            identifier="BLACK_AND_WHITE",
+            transformation=TransformationBlackAndWhite,
+            filters=ExternalTransformationFiltersBlackAndWhite(dither=None),
+        ),
+        *(
+            InternalImageTransformationDefinition(
+                identifier=f"THUMBNAIL/size_{size}",
+                transformation=TransformationThumbnail,
+                filters=ExternalTransformationFiltersThumbnail(size=(size, size)),
+                parent="BLACK_AND_WHITE",
+            )
+            for size in (8, 16, 32)
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_image_graph_transformer_computes_shared_prefix_once(temp_image_file):
+    transformation_batch = TransformationBatchFactory()
+    transformer = ImageGraphTransformer(transformations=_graph_transformations())
+    convert = PImage.Image.convert
+
+    with patch.object(
+        TransformationBlackAndWhite,
+        "_image_transform",
+        autospec=True,
+        side_effect=lambda self, image, filters: convert(image, "L"),
+    ) as mock_black_and_white:
+        transformations_applied = transformer.transform(
+            temp_image_file, transformation_batch
+        )
+
+    mock_black_and_white.assert_called_once()
+    assert [transform.identifier for transform in transformations_applied] == [
+        "THUMBNAIL/size_8",
+        "THUMBNAIL/size_16",
+        "THUMBNAIL/size_32",
+    ]
+    assert transformations_applied[0].applied_order == [
+        "BLACK_AND_WHITE",
+        "THUMBNAIL/size_8",
+    ]
+    assert all(transform.image.mode == "L" for transform in transformations_applied)
+    assert ProcessedImage.objects.count() == 3
+
+
+def test_image_graph_transformer_with_intermediates(temp_image_file):
+    transformer = ImageGraphTransformer(
+        transformations=_graph_transformations(), include_intermediates=True
+    )
+    transformations_applied = transformer._transform(temp_image_file)
+
+    assert [transform.identifier for transform in transformations_applied] == [
+        transform_data.identifier for transform_data in _graph_transformations()
+    ]
+
+
+@pytest.mark.parametrize("parent", ["UNKNOWN", "THUMBNAIL"])
+def test_image_graph_transformer_rejects_unknown_parent(parent):
+    transformations = [
+        InternalImageTransformationDefinition(
+            identifier="BLUR",
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(),
+            parent=parent,
+        ),
+        _thumbnail((10, 10), None),
+    ]
+
+    with pytest.raises(ValueError):
+        ImageGraphTransformer(transformations=transformations)
+
+
+def _point_transformations(backend):
+    return [
+        InternalImageTransformationDefinition(
+            identifier="BRIGHTNESS",
+            transformation=TransformationBrightness,
+            filters=ExternalTransformationFiltersBrightness(
+                factor=1.3, backend=backend
+            ),
+        ),
+        InternalImageTransformationDefinition(
+            identifier="BLACK_AND_WHITE",
+            transformation=TransformationBlackAndWhite,
+            filters=ExternalTransformationFiltersBlackAndWhite(backend=backend),
+        ),
+        InternalImageTransformationDefinition(
+            identifier="THRESHOLD",
+            transformation=TransformationThreshold,
+            filters=ExternalTransformationFiltersThreshold(
+                threshold=120, backend=backend
+            ),
+        ),
+    ]
+
+
+@pytest.mark.parametrize("include_intermediates", [False, True])
+def test_image_chain_transformer_array_backend_matches_pillow(
+    temp_image_file, include_intermediates
+):
+    expected = ImageChainTransformer(
+        _point_transformations(TRANSFORMATION_BACKEND.PILLOW),
+        include_intermediates=include_intermediates,
+    )._transform(temp_image_file)
+    transformations_applied = ImageChainTransformer(
+        _point_transformations(TRANSFORMATION_BACKEND.NUMPY),
+        include_intermediates=include_intermediates,
+    )._transform(temp_image_file)
+
+    assert len(transformations_applied) == len(expected)
+    for transform, expected_transform in zip(transformations_applied, expected):
+        assert transform.identifier == expected_transform.identifier
+        assert transform.applied_order == expected_transform.applied_order
+        assert transform.image.tobytes() == expected_transform.image.tobytes()
+
+
+def _thumbnail(size, reducing_gap):
+    return InternalImageTransformationDefinition(
+        identifier="THUMBNAIL",
+        transformation=TransformationThumbnail,
+        filters=ExternalTransformationFiltersThumbnail(
+            size=size, reducing_gap=reducing_gap
+        ),
+    )
+
+
+def _blur():
+    return InternalImageTransformationDefinition(
+        identifier="BLUR",
+        transformation=TransformationBlur,
+        filters=ExternalTransformationFiltersBlur(),
+    )
+
+
+@pytest.mark.parametrize(
+    "transformer_class, transformations, expected",
+    [
+        (ImageSequentialTransformer, [], None),
+        (
+            ImageSequentialTransformer,
+            [_thumbnail((100, 50), None), _thumbnail((60, 80), 3)],
+            (200, 240),
+        ),
+        (ImageThreadedTransformer, [_thumbnail((100, 50), None), _blur()], None),
+        (ImageChainTransformer, [_thumbnail((100, 50), 2), _blur()], (200, 100)),
+        (ImageChainTransformer, [_blur(), _thumbnail((100, 50), 2)], None),
+        (
+            ImageGraphTransformer,
+            [
+                _thumbnail((100, 50), 2),
+                InternalImageTransformationDefinition(
+                    identifier="BLUR",
+                    transformation=TransformationBlur,
+                    filters=ExternalTransformationFiltersBlur(),
+                    parent="THUMBNAIL",
+                ),
+            ],
+            (200, 100),
+        ),
+    ],
+)
+def test_transformer_required_input_size(transformer_class, transformations, expected):
+    transformer = transformer_class(transformations=transformations)
+
+    assert transformer.required_input_size((4000, 3000)) == expected
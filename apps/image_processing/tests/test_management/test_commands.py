@@ -0,0 +1,105 @@
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.image_processing.core.transformers.cost_model import (
+    TransformerCostModel,
+    get_cost_model,
+)
+
+
+def test_image_processing_benchmark_command():
+    rows = [{"length": 1, "seconds": 0.1}, {"length": 2, "seconds": 0.2}]
+    stdout = StringIO()
+    with patch.dict(
+        "apps.image_processing.management.commands.image_processing_benchmark.BENCHMARKS",
+        {"chain": lambda: rows},
+        clear=True,
+    ):
+        call_command("image_processing_benchmark", "chain", stdout=stdout)
+
+    output = stdout.getvalue()
+    assert "Benchmark: chain" in output
+    assert "length  seconds" in output
+    assert "2       0.2" in output
+
+
+@pytest.mark.usefixtures("thread_pool")
+def test_image_processing_calibrate_command(tmp_path):
+    path = tmp_path / "cost_model.json"
+    stdout = StringIO()
+    call_command(
+        "image_processing_calibrate",
+        output=str(path),
+        size=[64, 48],
+        repeat=1,
+        stdout=stdout,
+    )
+    cost_model = TransformerCostModel.load(path)
+
+    assert set(cost_model.transformation_seconds_per_cost) == {
+        "thumbnail",
+        "blur",
+        "black_and_white",
+        "brightness",
+        "threshold",
+    }
+    assert cost_model.seconds_per_cost > 0
+    assert cost_model.threaded_speedup >= 1
+    assert cost_model.multiprocess_speedup >= 1
+    assert f"Cost model written to {path}" in stdout.getvalue()
+    get_cost_model.cache_clear()
+
+
+def _export_detector(tmp_path, tags, **options):
+    command = (
+        "apps.image_processing.management.commands.image_processing_export_detector"
+    )
+    stdout = StringIO()
+    with (
+        patch(
+            f"{command}.export_detector_model",
+            return_value=tmp_path / "yolo11n.onnx",
+        ) as mock_export,
+        patch(f"{command}.detect_tags", side_effect=tags) as mock_detect_tags,
+    ):
+        call_command(
+            "image_processing_export_detector",
+            model="yolo11n.pt",
+            format="onnx",
+            output=str(tmp_path),
+            images=["a.jpg", "b.jpg"],
+            stdout=stdout,
+            **options,
+        )
+    return stdout.getvalue(), mock_export, mock_detect_tags
+
+
+def test_image_processing_export_detector_command(tmp_path):
+    output, mock_export, mock_detect_tags = _export_detector(
+        tmp_path, [[{"dog"}, {"car"}], [{"dog"}, {"car"}]]
+    )
+
+    mock_export.assert_called_once_with(
+        "yolo11n.pt",
+        "onnx",
+        int8=False,
+        export_path=str(tmp_path),
+        image_size=640,
+        data=None,
+    )
+    assert [call.args[0] for call in mock_detect_tags.call_args_list] == [
+        "yolo11n.pt",
+        str(tmp_path / "yolo11n.onnx"),
+    ]
+    assert "Tag agreement on 2 images: 1.000" in output
+    assert f"Exported model {tmp_path / 'yolo11n.onnx'} is valid" in output
+
+
+def test_image_processing_export_detector_command_rejects_disagreement(tmp_path):
+    with pytest.raises(CommandError, match="agrees on 0.500 of the tags"):
+        _export_detector(
+            tmp_path, [[{"dog"}, {"car"}], [{"dog"}, set()]], min_agreement=0.9
+        )
@@ -1,8 +1,23 @@
+from io import BytesIO
 from unittest.mock import patch
 
 import pytest
+from django.core.files.base import ContentFile
+from PIL import Image as PImage
 
-from apps.image_processing.services import image_local_transform
+from apps.image_processing.core.managers.base import BaseImageManager
+from apps.image_processing.models import ProcessedImage, TransformationBatch
+from apps.image_processing.services import image_local_transform, images_local_transform
+from apps.image_processing.tests.factories import ProcessingImageFactory
+from apps.users.tests.factories import BaseUserFactory
+
+
+def _png_processing_image(user, color):
+    buffer = BytesIO()
+    PImage.new("RGB", (48, 32), color=color).save(buffer, "PNG")
+    return ProcessingImageFactory(
+        user=user, file=ContentFile(buffer.getvalue(), name="image.png")
+    )
 
 
 @pytest.mark.django_db
@@ -32,6 +47,7 @@ def test_image_local_transform(
         is_chain=is_chain,
     )
 
+    image_manager = mock_manager_strategy.return_value.return_value
     mock_processing_image_model.assert_called_once_with(id=image_id, user_id=user_id)
     mock_get_internal_transformations.assert_called_once_with(
         external_transformations=external_image_transformations
@@ -39,6 +55,73 @@ def test_image_local_transform(
     mock_get_transformer_strategy.assert_called_once_with(
         transformations=mock_get_internal_transformations.return_value,
         is_chain=is_chain,
+        is_graph=False,
+        image_size=image_manager.get_metadata.return_value.size,
     )
     mock_manager_strategy.assert_called_once()
-    mock_manager_strategy.return_value.return_value.apply_transformations.assert_called_once()
+    image_manager.apply_transformations.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_images_local_transform(external_image_transformations):
+    user = BaseUserFactory()
+    images = [_png_processing_image(user, color) for color in ("red", "blue", "green")]
+    start_transformations = BaseImageManager.start_transformations
+    apply_transformations = BaseImageManager.apply_transformations
+    events = []
+
+    def record_start(manager):
+        events.append(("start", manager.image.id))
+        return start_transformations(manager)
+
+    def record_apply(manager, run=None):
+        events.append(("apply", manager.image.id))
+        return apply_transformations(manager, run)
+
+    with (
+        patch.object(BaseImageManager, "start_transformations", record_start),
+        patch.object(BaseImageManager, "apply_transformations", record_apply),
+    ):
+        results = images_local_transform(
+            user_id=user.id,
+            image_ids=[image.id for image in images],
+            transformations=external_image_transformations,
+        )
+
+    # The images are transformed in the requested order
+    assert list(results) == [str(image.id) for image in images]
+    # Each image is saved in its own batch
+    for image in images:
+        batch = TransformationBatch.objects.get(input_image=image)
+        assert ProcessedImage.objects.filter(transformation__batch=batch).count() == (
+            len(external_image_transformations)
+        )
+    # The next image is started before the current one is saved
+    applied = [image_id for event, image_id in events if event == "apply"]
+    assert applied == [image.id for image in images]
+    assert events.index(("start", applied[1])) < events.index(("apply", applied[0]))
+
+
+@pytest.mark.django_db
+def test_images_local_transform_continues_after_a_failure(
+    external_image_transformations,
+):
+    user = BaseUserFactory()
+    images = [_png_processing_image(user, color) for color in ("red", "blue")]
+    failing = images[0]
+    apply_transformations = BaseImageManager.apply_transformations
+
+    def failing_apply(manager, run=None):
+        if manager.image.id == failing.id:
+            raise RuntimeError
+        return apply_transformations(manager, run)
+
+    with patch.object(BaseImageManager, "apply_transformations", failing_apply):
+        with pytest.raises(RuntimeError):
+            images_local_transform(
+                user_id=user.id,
+                image_ids=[image.id for image in images],
+                transformations=external_image_transformations,
+            )
+
+    assert TransformationBatch.objects.filter(input_image=images[1]).exists()
@@ -1,14 +1,35 @@
+from unittest.mock import patch
+
 import pytest
 
-from apps.image_processing.constants import TRANSFORMATIONS_MULTIPROCESS_TRESHOLD
+from apps.image_processing.constants import (
+    TRANSFORMATIONS_MULTIPROCESS_TRESHOLD,
+    TRANSFORMATIONS_THREADED_TRESHOLD,
+)
 from apps.image_processing.core.managers.local import ImageLocalManager
+from apps.image_processing.core.managers.storage import ImageStorageManager
+from apps.image_processing.core.transformations.blur import (
+    ExternalTransformationFiltersBlur,
+    TransformationBlur,
+)
+from apps.image_processing.core.transformations.thumbnail import (
+    ExternalTransformationFiltersThumbnail,
+    TransformationThumbnail,
+)
+from apps.image_processing.core.transformers.base import (
+    InternalImageTransformationDefinition,
+)
 from apps.image_processing.core.transformers.chain import ImageChainTransformer
+from apps.image_processing.core.transformers.graph import ImageGraphTransformer
 from apps.image_processing.core.transformers.multiprocess import (
     ImageMultiProcessTransformer,
 )
 from apps.image_processing.core.transformers.sequential import (
     ImageSequentialTransformer,
 )
+from apps.image_processing.core.transformers.threaded import ImageThreadedTransformer
+from apps.image_processing.core.transformers.tiled import ImageTiledTransformer
+from apps.image_processing.models import TransformationBatch
 from apps.image_processing.strategies import (
     get_manager_strategy,
     get_transformer_strategy,
@@ -20,10 +41,19 @@ def test_get_manager_strategy():
     assert manager == ImageLocalManager
 
 
+def test_get_manager_strategy_without_local_paths(slow_storage):
+    assert get_manager_strategy() == ImageStorageManager
+
+
 @pytest.mark.parametrize(
     "transformations, is_chain, expected_transformer",
     (
         ([1, 2], False, ImageSequentialTransformer),
+        (
+            [x for x in range(TRANSFORMATIONS_THREADED_TRESHOLD)],
+            False,
+            ImageThreadedTransformer,
+        ),
         (
             [x for x in range(TRANSFORMATIONS_MULTIPROCESS_TRESHOLD + 1)],
             False,
@@ -45,3 +75,66 @@ def test_get_transformer_strategy(
 
     assert transformer is not None
     assert transformer == expected_transformer
+
+
+@patch("apps.image_processing.strategies.get_cost_model")
+def test_get_transformer_strategy_with_image_size(mock_get_cost_model):
+    mock_get_cost_model.return_value.choose.return_value = TransformationBatch.THREADED
+    transformations = [1, 2]
+
+    transformer = get_transformer_strategy(transformations, image_size=(64, 32))
+
+    assert transformer == ImageThreadedTransformer
+    mock_get_cost_model.return_value.choose.assert_called_once_with(
+        transformations, (64, 32), images=1
+    )
+
+
+def test_get_transformer_strategy_graph_ignores_image_size():
+    transformer = get_transformer_strategy([1, 2], is_graph=True, image_size=(64, 32))
+
+    assert transformer == ImageGraphTransformer
+
+
+def test_get_transformer_strategy_chain_ignores_image_size():
+    transformer = get_transformer_strategy([1, 2], is_chain=True, image_size=(64, 32))
+
+    assert transformer == ImageChainTransformer
+
+
+@pytest.mark.parametrize(
+    "image_size, tile_local, expected_transformer",
+    [
+        ((1000, 1000), True, ImageTiledTransformer),
+        ((1000, 999), True, ImageThreadedTransformer),
+        ((1000, 1000), False, ImageThreadedTransformer),
+    ],
+)
+@patch("apps.image_processing.strategies.get_cost_model")
+def test_get_transformer_strategy_tiled(
+    mock_get_cost_model, settings, image_size, tile_local, expected_transformer
+):
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "TILED_MIN_PIXELS": 1_000_000,
+    }
+    mock_get_cost_model.return_value.choose.return_value = TransformationBatch.THREADED
+    transformations = [
+        InternalImageTransformationDefinition(
+            identifier="BLUR",
+            transformation=TransformationBlur,
+            filters=ExternalTransformationFiltersBlur(),
+        )
+    ]
+    if not tile_local:
+        transformations.append(
+            InternalImageTransformationDefinition(
+                identifier="THUMBNAIL",
+                transformation=TransformationThumbnail,
+                filters=ExternalTransformationFiltersThumbnail(size=(64, 64)),
+            )
+        )
+
+    transformer = get_transformer_strategy(transformations, image_size=image_size)
+
+    assert transformer == expected_transformer
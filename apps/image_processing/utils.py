@@ -13,6 +13,14 @@ from apps.image_processing.core.transformations.blur import (
     ExternalTransformationFiltersBlur,
     TransformationBlur,
 )
+from apps.image_processing.core.transformations.brightness import (
+    ExternalTransformationFiltersBrightness,
+    TransformationBrightness,
+)
+from apps.image_processing.core.transformations.threshold import (
+    ExternalTransformationFiltersThreshold,
+    TransformationThreshold,
+)
 from apps.image_processing.core.transformations.thumbnail import (
     ExternalTransformationFiltersThumbnail,
     TransformationThumbnail,
@@ -65,6 +73,14 @@ def transformations_mapper(
             "transformation": TransformationBlackAndWhite,
             "filters": ExternalTransformationFiltersBlackAndWhite,
         },
+        ImageTransformation.BRIGHTNESS: {
+            "transformation": TransformationBrightness,
+            "filters": ExternalTransformationFiltersBrightness,
+        },
+        ImageTransformation.THRESHOLD: {
+            "transformation": TransformationThreshold,
+            "filters": ExternalTransformationFiltersThreshold,
+        },
     }
 
     transformation_map = _mapper[transformation_name]
@@ -99,6 +115,7 @@ def get_internal_transformations(
                 identifier=transform.identifier,
                 transformation=mapper.transformation,
                 filters=mapper.filters,
+                parent=transform.parent,
             )
         )
     return dataclasses
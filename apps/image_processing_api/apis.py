@@ -83,6 +83,10 @@ class ImageProcessTransformApi(APIView):
             image_ids=serializer.validated_data["images"],
             transformations=serializer.validated_data["transformations"],
             is_chain=serializer.validated_data["apply_chain"],
+            include_intermediates=serializer.validated_data["chain_intermediates"],
+            output_format=serializer.validated_data.get("output_format"),
+            output_profile=serializer.validated_data.get("output_profile"),
+            batch=serializer.validated_data["batch"],
         )
 
         return Response(transformations, status=status.HTTP_201_CREATED)
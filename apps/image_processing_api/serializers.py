@@ -4,7 +4,10 @@ from rest_framework import serializers
 from rest_framework.exceptions import ParseError, ValidationError
 
 from apps.image_processing.constants import (
+    TRANSFORMATION_BACKEND,
     TRANSFORMATION_FILTER_BLUR_FILTER,
+    TRANSFORMATION_OUTPUT_FORMAT,
+    TRANSFORMATION_OUTPUT_PROFILE,
 )
 from apps.image_processing.models import ImageTransformation, ProcessingImage
 
@@ -35,18 +38,40 @@ class BlurFilterSerializer(ImageFilterSerializer):
     radius = serializers.FloatField(required=False)
 
 
+class PointFilterSerializer(ImageFilterSerializer):
+    backend = serializers.ChoiceField(
+        choices=[name.value for name in TRANSFORMATION_BACKEND], required=False
+    )
+
+
+class BrightnessFilterSerializer(PointFilterSerializer):
+    factor = serializers.FloatField(min_value=0)
+
+
+class ThresholdFilterSerializer(PointFilterSerializer):
+    threshold = serializers.IntegerField(min_value=0, max_value=256)
+
+
 class ImageTransformationSerializer(serializers.Serializer):
     identifier = serializers.CharField(max_length=100)
     transformation = serializers.ChoiceField(
         choices=list(ImageTransformation.IMAGE_TRANSFORMATION_CHOICES.keys())
     )
     filters = serializers.DictField(required=False)
+    # Identifier of a previous transformation whose output is transformed
+    parent = serializers.CharField(max_length=100, required=False, allow_null=True)
 
     def _get_filter_serializer(
         self, transformation: str
     ) -> Type[ImageFilterSerializer]:
         if transformation == ImageTransformation.BLUR:
             return BlurFilterSerializer
+        if transformation == ImageTransformation.BLACK_AND_WHITE:
+            return PointFilterSerializer
+        if transformation == ImageTransformation.BRIGHTNESS:
+            return BrightnessFilterSerializer
+        if transformation == ImageTransformation.THRESHOLD:
+            return ThresholdFilterSerializer
         raise ParseError(
             f"Filters not yet supported for transformation: {transformation}"
         )
@@ -69,4 +94,39 @@ class ImageTransformationSerializer(serializers.Serializer):
 class ImageProcessInputSerializer(serializers.Serializer):
     images = serializers.ListField(child=serializers.UUIDField(), write_only=True)
     apply_chain = serializers.BooleanField(required=False, default=False)
+    chain_intermediates = serializers.BooleanField(required=False, default=False)
+    batch = serializers.BooleanField(required=False, default=False)
+    output_format = serializers.ChoiceField(
+        choices=[name.value for name in TRANSFORMATION_OUTPUT_FORMAT], required=False
+    )
+    output_profile = serializers.ChoiceField(
+        choices=[name.value for name in TRANSFORMATION_OUTPUT_PROFILE], required=False
+    )
     transformations = ImageTransformationSerializer(many=True)
+
+    def validate_transformations(self, value: list[dict[str, Any]]) -> Any:
+        # Parents are referenced by identifier, so they must be unique in graphs
+        is_graph = any(transformation.get("parent") for transformation in value)
+        identifiers: set[str] = set()
+        for transformation in value:
+            parent = transformation.get("parent")
+            if parent is not None and parent not in identifiers:
+                raise ValidationError(
+                    f"Parent {parent} of {transformation['identifier']} must be a "
+                    "previous transformation"
+                )
+            if is_graph and transformation["identifier"] in identifiers:
+                raise ValidationError(
+                    f"Duplicated transformation identifier: {transformation['identifier']}"
+                )
+            identifiers.add(transformation["identifier"])
+        return value
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        if attrs["apply_chain"] and any(
+            transformation.get("parent") for transformation in attrs["transformations"]
+        ):
+            raise ValidationError(
+                {"apply_chain": "Chains cannot set the parent of transformations"}
+            )
+        return attrs
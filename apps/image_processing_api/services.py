@@ -3,7 +3,10 @@ from typing import Any
 from django.core.files.images import ImageFile
 
 from apps.image_processing.models import ProcessingImage
-from apps.image_processing_api.tasks import transform_uploaded_images
+from apps.image_processing_api.tasks import (
+    transform_uploaded_images,
+    transform_uploaded_images_batch,
+)
 from apps.users.models import BaseUser
 
 
@@ -20,11 +23,32 @@ def image_processing_transform(
     image_ids: list[int],
     transformations: list[dict[str, Any]],
     is_chain: bool = False,
+    include_intermediates: bool = False,
+    output_format: str | None = None,
+    output_profile: str | None = None,
+    batch: bool = False,
 ) -> list[dict[str, Any]]:
     images = ProcessingImage.objects.select_related("user").filter(
         user=user, id__in=image_ids
     )
 
+    if batch:
+        # A single task transforms every image, sharing the workers across them
+        image_ids = [image.id for image in images]
+        task = transform_uploaded_images_batch.enqueue(
+            user_id=user.id,
+            image_ids=[str(image_id) for image_id in image_ids],
+            transformations=transformations,
+            is_chain=is_chain,
+            include_intermediates=include_intermediates,
+            output_format=output_format,
+            output_profile=output_profile,
+        )
+        return [
+            {"id": image_id, "task_id": task.id, "task_status": task.status}
+            for image_id in image_ids
+        ]
+
     tasks_results = []
     for image in images:
         task = transform_uploaded_images.enqueue(
@@ -32,6 +56,9 @@ def image_processing_transform(
             image_id=str(image.id),
             transformations=transformations,
             is_chain=is_chain,
+            include_intermediates=include_intermediates,
+            output_format=output_format,
+            output_profile=output_profile,
         )
         tasks_results.append(
             {"id": image.id, "task_id": task.id, "task_status": task.status}
@@ -1,26 +1,22 @@
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from django_tasks import task
 
+if TYPE_CHECKING:
+    from apps.image_processing.core.transformers.base import (
+        ExternalImageTransformationDefinition,
+    )
+
 logger = logging.getLogger(__name__)
 
 
-@task(queue_name="image_processing")
-def transform_uploaded_images(
-    user_id: int,
-    image_id: str,
+def _get_transformation_definitions(
     transformations: list[dict[str, Any]],
-    is_chain: bool = False,
-) -> None:
-    logger.debug(
-        f"Transforming image {image_id} with transformations {transformations} for user {user_id}"
-    )
-
+) -> list["ExternalImageTransformationDefinition"]:
     from apps.image_processing.core.transformers.base import (
         ExternalImageTransformationDefinition,
     )
-    from apps.image_processing.services import image_local_transform
     from apps.image_processing_api.utils import (
         get_filters_dataclasses_by_transformation,
     )
@@ -37,12 +33,65 @@ def transform_uploaded_images(
             identifier=transformation["identifier"],
             transformation=transformation["transformation"],
             filters=transformation_filter,
+            parent=transformation.get("parent"),
         )
         transformations_to_apply.append(transformation_definition)
+    return transformations_to_apply
+
+
+@task(queue_name="image_processing")
+def transform_uploaded_images(
+    user_id: int,
+    image_id: str,
+    transformations: list[dict[str, Any]],
+    is_chain: bool = False,
+    include_intermediates: bool = False,
+    output_format: str | None = None,
+    output_profile: str | None = None,
+) -> None:
+    logger.debug(
+        f"Transforming image {image_id} with transformations {transformations} for user {user_id}"
+    )
+
+    from apps.image_processing.services import image_local_transform
+
+    transformations_to_apply = _get_transformation_definitions(transformations)
 
     applied_transformations = image_local_transform(
         user_id=user_id,
         image_id=image_id,
         transformations=transformations_to_apply,
         is_chain=is_chain,
+        include_intermediates=include_intermediates,
+        output_format=output_format,
+        output_profile=output_profile,
+    )
+
+
+@task(queue_name="image_processing")
+def transform_uploaded_images_batch(
+    user_id: int,
+    image_ids: list[str],
+    transformations: list[dict[str, Any]],
+    is_chain: bool = False,
+    include_intermediates: bool = False,
+    output_format: str | None = None,
+    output_profile: str | None = None,
+) -> None:
+    logger.debug(
+        f"Transforming images {image_ids} with transformations {transformations} for user {user_id}"
+    )
+
+    from apps.image_processing.services import images_local_transform
+
+    transformations_to_apply = _get_transformation_definitions(transformations)
+
+    applied_transformations = images_local_transform(
+        user_id=user_id,
+        image_ids=image_ids,
+        transformations=transformations_to_apply,
+        is_chain=is_chain,
+        include_intermediates=include_intermediates,
+        output_format=output_format,
+        output_profile=output_profile,
     )
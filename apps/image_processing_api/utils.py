@@ -9,6 +9,12 @@ from apps.image_processing.core.transformations.black_and_white import (
 from apps.image_processing.core.transformations.blur import (
     ExternalTransformationFiltersBlur,
 )
+from apps.image_processing.core.transformations.brightness import (
+    ExternalTransformationFiltersBrightness,
+)
+from apps.image_processing.core.transformations.threshold import (
+    ExternalTransformationFiltersThreshold,
+)
 from apps.image_processing.core.transformations.thumbnail import (
     ExternalTransformationFiltersThumbnail,
 )
@@ -22,5 +28,7 @@ def get_filters_dataclasses_by_transformation(
         ImageTransformation.THUMBNAIL: ExternalTransformationFiltersThumbnail,
         ImageTransformation.BLUR: ExternalTransformationFiltersBlur,
         ImageTransformation.BLACK_AND_WHITE: ExternalTransformationFiltersBlackAndWhite,
+        ImageTransformation.BRIGHTNESS: ExternalTransformationFiltersBrightness,
+        ImageTransformation.THRESHOLD: ExternalTransformationFiltersThreshold,
     }
     return filters[transformation]  # type: ignore[return-value]
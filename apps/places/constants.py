@@ -1 +1,7 @@
 PLACE_IMAGES_LIMIT = 10
+# Seconds between checks for other pending images while a detection batch fills
+DETECTION_BATCH_POLL_INTERVAL = 0.05
+# Seconds after which the claim of a batch that never finished is taken again
+DETECTION_CLAIM_TIMEOUT = 600
+# Attempts to detect an image before giving up on it
+DETECTION_MAX_ATTEMPTS = 3
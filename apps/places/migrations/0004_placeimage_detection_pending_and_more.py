@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-17 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("places", "0003_place_suggested_tags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="placeimage",
+            name="detection_pending",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="placeimage",
+            name="detection_batch",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
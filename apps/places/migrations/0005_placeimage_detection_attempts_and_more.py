@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("places", "0004_placeimage_detection_pending_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="placeimage",
+            name="detection_claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="placeimage",
+            name="detection_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
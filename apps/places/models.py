@@ -45,6 +45,13 @@ class Place(BaseModel):
 class PlaceImage(BaseModel):
     place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="place_images/")
+    # Set while the image waits for object detection
+    detection_pending = models.BooleanField(default=False)
+    # The batch that claimed a pending image, so a single task detects it
+    detection_batch = models.UUIDField(null=True, blank=True)
+    # When the batch claimed the image, stale claims are taken again
+    detection_claimed_at = models.DateTimeField(null=True, blank=True)
+    detection_attempts = models.PositiveSmallIntegerField(default=0)
 
     def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
         if self.place.images.count() >= PLACE_IMAGES_LIMIT:
@@ -1,10 +1,20 @@
 import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
 
 from django.core.exceptions import ValidationError
 from django.core.files.images import ImageFile
-from django.db.models import QuerySet
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
 
-from apps.places.constants import PLACE_IMAGES_LIMIT
+from apps.places.constants import (
+    DETECTION_BATCH_POLL_INTERVAL,
+    DETECTION_CLAIM_TIMEOUT,
+    DETECTION_MAX_ATTEMPTS,
+    PLACE_IMAGES_LIMIT,
+)
 from apps.places.models import Place, PlaceImage, PlaceTag
 from apps.places.tasks import (
     suggest_tags_from_uploaded_images,
@@ -104,7 +114,9 @@ def place_images_create(
         created_place_images = []
         images_for_detection: dict[int, str] = {}
         for image in images:
-            place_image = PlaceImage(place_id=place_id, image=image)
+            place_image = PlaceImage(
+                place_id=place_id, image=image, detection_pending=True
+            )
             place_image.full_clean()
             place_image.save()
             images_for_detection[place_image.id] = place_image.image.path
@@ -135,3 +147,239 @@ def place_images_retrive_by_place_id_and_user(
     return PlaceImage.objects.select_related(
         "place",
     ).filter(place_id=place_id, place__user=user)
+
+
+@dataclass
+class DetectionBatchMetrics:
+    """
+    Measures of a detection batch, to tune its max size and wait.
+
+    Attributes:
+        images (int): The number of images detected.
+        failed (int): The number of images that could not be detected.
+        places (int): The number of places the detected images belong to.
+        inference_seconds (float): The time spent detecting the images.
+        max_latency_seconds (float): The longest time an image waited between its
+            upload and the end of its detection.
+    """
+
+    images: int
+    failed: int
+    places: int
+    inference_seconds: float
+    max_latency_seconds: float
+
+    @property
+    def images_per_second(self) -> float:
+        if self.inference_seconds <= 0:
+            return 0.0
+        return self.images / self.inference_seconds
+
+
+def place_images_claimable_detection() -> QuerySet[PlaceImage]:
+    """
+    Returns the images waiting for object detection that no batch is detecting,
+    including the images of batches claimed too long ago, e.g. by a worker that
+    died.
+    """
+    stale_claimed_at = timezone.now() - timedelta(seconds=DETECTION_CLAIM_TIMEOUT)
+    return PlaceImage.objects.filter(
+        Q(detection_batch__isnull=True) | Q(detection_claimed_at__lt=stale_claimed_at),
+        detection_pending=True,
+    )
+
+
+def place_images_claim_pending_detection(
+    image_ids: list[int], max_batch_size: int, max_wait: float
+) -> list[PlaceImage]:
+    """
+    Claims a batch of images waiting for object detection.
+
+    The batch starts with the given images and is filled with the oldest images
+    pending from other uploads, waiting up to `max_wait` seconds for enough of
+    them. Claimed images are not claimed again until their claim is stale, so
+    the task that enqueued them does nothing if they were detected in the batch
+    of another task. Every claim counts as a detection attempt.
+
+    Args:
+        image_ids (list[int]): The ids of the images of the current task.
+        max_batch_size (int): The max number of images claimed.
+        max_wait (float): The max seconds to wait for other pending images.
+
+    Returns:
+        list[PlaceImage]: The claimed images, empty if none of the given images
+            is pending anymore.
+    """
+    own_ids = list(
+        place_images_claimable_detection()
+        .filter(id__in=image_ids)
+        .order_by("created_at")
+        .values_list("id", flat=True)[:max_batch_size]
+    )
+    if not own_ids:
+        return []
+
+    deadline = time.monotonic() + max_wait
+    while (
+        place_images_claimable_detection().count() < max_batch_size
+        and time.monotonic() < deadline
+    ):
+        time.sleep(DETECTION_BATCH_POLL_INTERVAL)
+
+    other_ids = list(
+        place_images_claimable_detection()
+        .exclude(id__in=own_ids)
+        .order_by("created_at")
+        .values_list("id", flat=True)[: max_batch_size - len(own_ids)]
+    )
+    # Concurrent tasks may pick the same candidates, only one update claims each
+    batch = uuid.uuid4()
+    place_images_claimable_detection().filter(id__in=own_ids + other_ids).update(
+        detection_batch=batch,
+        detection_claimed_at=timezone.now(),
+        detection_attempts=F("detection_attempts") + 1,
+    )
+    return list(
+        PlaceImage.objects.select_related("place").filter(detection_batch=batch)
+    )
+
+
+def place_images_release_detection(place_images: list[PlaceImage]) -> None:
+    """
+    Releases images whose detection failed, so another batch can claim them.
+    Images that failed `DETECTION_MAX_ATTEMPTS` times are not detected anymore.
+    """
+    exhausted_ids = [
+        place_image.id
+        for place_image in place_images
+        if place_image.detection_attempts >= DETECTION_MAX_ATTEMPTS
+    ]
+    if exhausted_ids:
+        logger.error(
+            f"Giving up the detection of place images {exhausted_ids} after "
+            f"{DETECTION_MAX_ATTEMPTS} attempts"
+        )
+        PlaceImage.objects.filter(id__in=exhausted_ids).update(detection_pending=False)
+    PlaceImage.objects.filter(
+        id__in=[place_image.id for place_image in place_images]
+    ).exclude(id__in=exhausted_ids).update(
+        detection_batch=None, detection_claimed_at=None
+    )
+
+
+def place_add_suggested_tags(place: Place, names: set[str]) -> None:
+    """
+    Suggests the tags of the detected object names the place is not tagged with,
+    creating the missing tags of its user.
+    """
+    place_tag_names = {tag.name for tag in place.tags.all()}
+    names = names - place_tag_names
+    if not names:
+        return
+
+    suggested_tags = list(
+        PlaceTag.objects.filter(user_id=place.user_id, name__in=names)
+    )
+    names = names - {tag.name for tag in suggested_tags}
+    if names:
+        suggested_tags += PlaceTag.objects.bulk_create(
+            [PlaceTag(user_id=place.user_id, name=name) for name in names],
+        )
+    place.suggested_tags.add(*suggested_tags)
+
+
+def _place_images_detect(place_images: list[PlaceImage]) -> dict[int, set[str]]:
+    """
+    Detects the objects of images in a single batch, by image id.
+    """
+    from apps.image_processing.core.detectors.base import DetectorImage
+    from apps.image_processing.core.detectors.common_object_detector import (
+        CommonObjectDetector,
+    )
+
+    detector = CommonObjectDetector(
+        images=[
+            DetectorImage(identifier=place_image.id, image=place_image.image.path)
+            for place_image in place_images
+        ]
+    )
+    return {
+        result.identifier: {obj.name.lower() for obj in result.objects}
+        for result in detector.results
+    }
+
+
+def place_images_suggest_tags(
+    place_images: list[PlaceImage],
+) -> DetectionBatchMetrics:
+    """
+    Detects the objects of claimed images in a single batch and suggests them as
+    tags of the place of each image.
+
+    When the batch fails its images are detected one at a time, so an image
+    that cannot be detected, e.g. a missing or truncated file, does not fail the
+    others. It is released for another attempt instead.
+
+    Args:
+        place_images (list[PlaceImage]): The images claimed for detection.
+
+    Returns:
+        DetectionBatchMetrics: The measures of the batch.
+    """
+    started_at = time.perf_counter()
+    failed: list[PlaceImage] = []
+    try:
+        detected = _place_images_detect(place_images)
+    except Exception:
+        logger.exception(
+            f"Detection of a batch of {len(place_images)} place images failed"
+        )
+        detected = {}
+        if len(place_images) > 1:
+            for place_image in place_images:
+                try:
+                    detected.update(_place_images_detect([place_image]))
+                except Exception:
+                    logger.exception(
+                        f"Detection of place image {place_image.id} failed"
+                    )
+                    failed.append(place_image)
+        else:
+            failed = place_images
+    inference_seconds = time.perf_counter() - started_at
+
+    detected_images = [
+        place_image for place_image in place_images if place_image.id in detected
+    ]
+    detected_names: dict[int, set[str]] = {}
+    for place_image in detected_images:
+        detected_names.setdefault(place_image.place_id, set()).update(
+            detected[place_image.id]
+        )
+    for place in Place.objects.prefetch_related("tags").filter(id__in=detected_names):
+        place_add_suggested_tags(place, detected_names[place.id])
+    PlaceImage.objects.filter(
+        id__in=[place_image.id for place_image in detected_images]
+    ).update(detection_pending=False)
+    place_images_release_detection(failed)
+
+    detected_at = timezone.now()
+    metrics = DetectionBatchMetrics(
+        images=len(detected_images),
+        failed=len(failed),
+        places=len(detected_names),
+        inference_seconds=inference_seconds,
+        max_latency_seconds=max(
+            (
+                (detected_at - place_image.created_at).total_seconds()
+                for place_image in detected_images
+            ),
+            default=0.0,
+        ),
+    )
+    logger.info(
+        f"Detected {metrics.images} images of {metrics.places} places in "
+        f"{metrics.inference_seconds:.2f}s, {metrics.images_per_second:.2f} images/s, "
+        f"max latency {metrics.max_latency_seconds:.2f}s, {metrics.failed} failed"
+    )
+    return metrics
@@ -1,5 +1,6 @@
 import logging
 
+from django.conf import settings
 from django_tasks import task
 
 logger = logging.getLogger(__name__)
@@ -9,44 +10,21 @@ logger = logging.getLogger(__name__)
 def suggest_tags_from_uploaded_images(
     user_id: int, place_id: int, images: dict[int, str]
 ) -> None:
-    from apps.image_processing.core.detectors.base import DetectorImage
-    from apps.image_processing.core.detectors.common_object_detector import (
-        CommonObjectDetector,
+    """
+    Suggests tags for a place from the objects detected in its uploaded images.
+
+    The images are detected in batches along with the images pending from other
+    uploads, so a task may find its images already detected by another one.
+    """
+    from apps.places.services import (
+        place_images_claim_pending_detection,
+        place_images_suggest_tags,
     )
-    from apps.places.models import Place, PlaceTag
 
-    user_place = (
-        Place.objects.select_related("user")
-        .prefetch_related("tags", "suggested_tags")
-        .get(id=place_id)
-    )
-    place_tag_names = {tag.name for tag in user_place.tags.all()}
-
-    detect_images = [
-        DetectorImage(
-            identifier=image_id,
-            image=image_path,
-        )
-        for image_id, image_path in images.items()
-    ]
-    detector = CommonObjectDetector(images=detect_images)
-    detected_objects = set()
-    for result in detector.results:
-        for obj in result.objects:
-            if obj.name.lower() in place_tag_names:
-                continue
-            detected_objects.add(obj.name.lower())
-
-    user_suggested_tags = list(
-        PlaceTag.objects.filter(user_id=user_id, name__in=detected_objects)
-    )
-
-    for tag in user_suggested_tags:
-        detected_objects.remove(tag.name)
-
-    if detected_objects:
-        new_suggested_tags = PlaceTag.objects.bulk_create(
-            [PlaceTag(user_id=user_id, name=obj) for obj in detected_objects],
-        )
-        user_suggested_tags = list(user_suggested_tags) + new_suggested_tags
-    user_place.suggested_tags.add(*user_suggested_tags)
+    image_ids = [int(image_id) for image_id in images]
+    while place_images := place_images_claim_pending_detection(
+        image_ids=image_ids,
+        max_batch_size=settings.IMAGE_PROCESSING["DETECTOR_BATCH_SIZE"],
+        max_wait=settings.IMAGE_PROCESSING["DETECTOR_BATCH_MAX_WAIT"],
+    ):
+        place_images_suggest_tags(place_images)
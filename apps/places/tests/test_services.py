@@ -1,20 +1,33 @@
+import uuid
+from datetime import timedelta
 from unittest.mock import patch
 
 import pytest
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 
-from apps.places.constants import PLACE_IMAGES_LIMIT
-from apps.places.models import Place
+from apps.image_processing.core.detectors.base import (
+    DetectorObjectResult,
+    DetectorResult,
+)
+from apps.places.constants import (
+    DETECTION_CLAIM_TIMEOUT,
+    DETECTION_MAX_ATTEMPTS,
+    PLACE_IMAGES_LIMIT,
+)
+from apps.places.models import Place, PlaceImage
 from apps.places.services import (
     place_create,
     place_delete_by_id_and_user,
+    place_images_claim_pending_detection,
     place_images_create,
     place_images_retrive_by_place_id_and_user,
     place_retrieve_all_by_user,
     place_retrieve_by_id_and_user,
 )
+from apps.places.tasks import suggest_tags_from_uploaded_images
 from apps.places.tests.factories import PlaceFactory, PlaceImageFactory, PlaceTagFactory
 
 
@@ -304,3 +317,195 @@ def test_place_images_retrive_by_place_id_and_user_invalid_place(user):
     invalid_place_id = 999999
     retrieved_images = place_images_retrive_by_place_id_and_user(invalid_place_id, user)
     assert len(retrieved_images) == 0
+
+
+class _FakeDetector:
+    """
+    Detects the objects given by image id, recording the size of each batch, and
+    fails the batches holding a failing image.
+    """
+
+    batches: list[list[int]] = []
+    objects: dict[int, list[str]] = {}
+    failing: set[int] = set()
+
+    def __init__(self, images):
+        self.images = images
+        _FakeDetector.batches.append([image.identifier for image in images])
+        if self.failing & {image.identifier for image in images}:
+            raise RuntimeError("Truncated image")
+
+    @property
+    def results(self):
+        for image in self.images:
+            yield DetectorResult(
+                identifier=image.identifier,
+                objects=[
+                    DetectorObjectResult(type=0, name=name, box=[0, 0, 1, 1])
+                    for name in self.objects.get(image.identifier, [])
+                ],
+            )
+
+
+@pytest.fixture
+def fake_detector():
+    _FakeDetector.batches = []
+    _FakeDetector.objects = {}
+    _FakeDetector.failing = set()
+    with patch(
+        "apps.image_processing.core.detectors.common_object_detector.CommonObjectDetector",
+        _FakeDetector,
+    ):
+        yield _FakeDetector
+
+
+def _suggest_tags(place_images):
+    suggest_tags_from_uploaded_images.call(
+        user_id=place_images[0].place.user_id,
+        place_id=place_images[0].place_id,
+        images={place_image.id: place_image.image.path for place_image in place_images},
+    )
+
+
+@pytest.mark.django_db
+def test_suggest_tags_detects_pending_images_of_other_places(
+    fake_detector, user, other_user
+):
+    place = PlaceFactory(user=user, tags=[PlaceTagFactory(user=user, name="tree")])
+    other_place = PlaceFactory(user=other_user)
+    image = PlaceImageFactory(place=place, detection_pending=True)
+    other_image = PlaceImageFactory(place=other_place, detection_pending=True)
+    fake_detector.objects = {image.id: ["Tree", "Dog"], other_image.id: ["Car"]}
+
+    _suggest_tags([image])
+
+    assert len(fake_detector.batches) == 1
+    assert sorted(fake_detector.batches[0]) == sorted([image.id, other_image.id])
+    assert [tag.name for tag in place.suggested_tags.all()] == ["dog"]
+    assert [tag.name for tag in other_place.suggested_tags.all()] == ["car"]
+    assert other_place.suggested_tags.get().user == other_user
+    assert not PlaceImage.objects.filter(detection_pending=True).exists()
+
+    # The task of the other image finds it already detected
+    _suggest_tags([other_image])
+
+    assert len(fake_detector.batches) == 1
+
+
+@pytest.mark.django_db
+def test_suggest_tags_reuses_existing_user_tags(fake_detector, user):
+    tag = PlaceTagFactory(user=user, name="dog")
+    place = PlaceFactory(user=user)
+    image = PlaceImageFactory(place=place, detection_pending=True)
+    fake_detector.objects = {image.id: ["dog"]}
+
+    _suggest_tags([image])
+
+    assert list(place.suggested_tags.all()) == [tag]
+
+
+@pytest.mark.django_db
+def test_suggest_tags_splits_images_in_batches(fake_detector, user, settings):
+    settings.IMAGE_PROCESSING = {
+        **settings.IMAGE_PROCESSING,
+        "DETECTOR_BATCH_SIZE": 2,
+    }
+    place = PlaceFactory(user=user)
+    images = [PlaceImageFactory(place=place, detection_pending=True) for _ in range(3)]
+
+    _suggest_tags(images)
+
+    assert [len(batch) for batch in fake_detector.batches] == [2, 1]
+    assert not PlaceImage.objects.filter(detection_pending=True).exists()
+
+
+@pytest.mark.django_db
+def test_suggest_tags_gives_up_images_that_keep_failing(fake_detector, user):
+    image = PlaceImageFactory(place=PlaceFactory(user=user), detection_pending=True)
+    fake_detector.failing = {image.id}
+
+    _suggest_tags([image])
+
+    image.refresh_from_db()
+    assert len(fake_detector.batches) == DETECTION_MAX_ATTEMPTS
+    assert image.detection_attempts == DETECTION_MAX_ATTEMPTS
+    assert image.detection_pending is False
+
+
+@pytest.mark.django_db
+def test_suggest_tags_detects_other_images_of_a_failing_batch(
+    fake_detector, user, other_user
+):
+    place = PlaceFactory(user=user)
+    other_place = PlaceFactory(user=other_user)
+    bad_image = PlaceImageFactory(place=place, detection_pending=True)
+    image = PlaceImageFactory(place=place, detection_pending=True)
+    other_image = PlaceImageFactory(place=other_place, detection_pending=True)
+    fake_detector.objects = {image.id: ["dog"], other_image.id: ["car"]}
+    fake_detector.failing = {bad_image.id}
+
+    _suggest_tags([bad_image, image])
+
+    assert [tag.name for tag in place.suggested_tags.all()] == ["dog"]
+    assert [tag.name for tag in other_place.suggested_tags.all()] == ["car"]
+    assert list(PlaceImage.objects.filter(detection_pending=True)) == []
+    bad_image.refresh_from_db()
+    assert bad_image.detection_attempts == DETECTION_MAX_ATTEMPTS
+
+    # A later upload is still detected
+    new_image = PlaceImageFactory(place=place, detection_pending=True)
+    fake_detector.objects[new_image.id] = ["cat"]
+
+    _suggest_tags([new_image])
+
+    assert fake_detector.batches[-1] == [new_image.id]
+    assert sorted(tag.name for tag in place.suggested_tags.all()) == ["cat", "dog"]
+
+
+@pytest.mark.django_db
+def test_place_images_claim_pending_detection_reclaims_stale_claims(user):
+    place = PlaceFactory(user=user)
+    stale_image = PlaceImageFactory(
+        place=place,
+        detection_pending=True,
+        detection_batch=uuid.uuid4(),
+        detection_claimed_at=timezone.now()
+        - timedelta(seconds=DETECTION_CLAIM_TIMEOUT + 1),
+        detection_attempts=1,
+    )
+    claimed_image = PlaceImageFactory(
+        place=place,
+        detection_pending=True,
+        detection_batch=uuid.uuid4(),
+        detection_claimed_at=timezone.now(),
+        detection_attempts=1,
+    )
+
+    claimed = place_images_claim_pending_detection(
+        image_ids=[stale_image.id, claimed_image.id], max_batch_size=4, max_wait=0
+    )
+
+    assert claimed == [stale_image]
+    assert claimed[0].detection_attempts == 2
+
+
+@pytest.mark.django_db
+def test_place_images_claim_pending_detection_skips_claimed_images(user):
+    place = PlaceFactory(user=user)
+    image = PlaceImageFactory(place=place, detection_pending=True)
+    other_image = PlaceImageFactory(place=place, detection_pending=True)
+
+    claimed = place_images_claim_pending_detection(
+        image_ids=[image.id], max_batch_size=1, max_wait=0
+    )
+
+    assert claimed == [image]
+    assert (
+        place_images_claim_pending_detection(
+            image_ids=[image.id], max_batch_size=4, max_wait=0
+        )
+        == []
+    )
+    assert place_images_claim_pending_detection(
+        image_ids=[other_image.id], max_batch_size=4, max_wait=0
+    ) == [other_image]
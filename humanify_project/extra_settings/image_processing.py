@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+
+IMAGE_PROCESSING = {
+    # Worker processes of the shared transformations process pool, defaults to the CPU count
+    "POOL_MAX_WORKERS": int(os.getenv("IMAGE_PROCESSING_POOL_MAX_WORKERS", 0)) or None,
+    # Jobs a process pool worker runs before it is replaced, bounds its memory
+    "POOL_MAX_JOBS": int(os.getenv("IMAGE_PROCESSING_POOL_MAX_JOBS", 200)),
+    # Hand images to the process pool workers through shared memory instead of pickling them
+    "POOL_SHARED_MEMORY": os.getenv(
+        "IMAGE_PROCESSING_POOL_SHARED_MEMORY", "true"
+    ).lower()
+    == "true",
+    # Threads of the shared transformations thread pool, defaults to the executor default
+    "THREAD_POOL_MAX_WORKERS": int(
+        os.getenv("IMAGE_PROCESSING_THREAD_POOL_MAX_WORKERS", 0)
+    )
+    or None,
+    # Cost model written by the image_processing_calibrate command, used to pick the transformer
+    "COST_MODEL_PATH": os.getenv(
+        "IMAGE_PROCESSING_COST_MODEL_PATH",
+        Path(__file__).resolve().parent.parent.parent
+        / "image_processing_cost_model.json",
+    ),
+    # Reuse the stored results of identical source content, transformations and filters
+    "RESULT_CACHE": os.getenv("IMAGE_PROCESSING_RESULT_CACHE", "true").lower()
+    == "true",
+    "RESULT_CACHE_PATH": os.getenv(
+        "IMAGE_PROCESSING_RESULT_CACHE_PATH",
+        Path(__file__).resolve().parent.parent.parent / "image_processing_result_cache",
+    ),
+    # Entries kept before the least recently used ones are evicted
+    "RESULT_CACHE_MAX_ENTRIES": int(
+        os.getenv("IMAGE_PROCESSING_RESULT_CACHE_MAX_ENTRIES", 10000)
+    ),
+    # Max bytes of decoded source images kept by each worker process, 0 disables it
+    "SOURCE_CACHE_MAX_BYTES": int(
+        os.getenv("IMAGE_PROCESSING_SOURCE_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+    ),
+    # Images with at least this many pixels are transformed by strips when possible
+    "TILED_MIN_PIXELS": int(os.getenv("IMAGE_PROCESSING_TILED_MIN_PIXELS", 50_000_000)),
+    # Max bytes used by a worker to transform one strip of a tiled image
+    "TILED_MEMORY_LIMIT": int(
+        os.getenv("IMAGE_PROCESSING_TILED_MEMORY_LIMIT", 64 * 1024 * 1024)
+    ),
+    # Output format of the transformed images: png, jpeg, webp or webp_lossless
+    "OUTPUT_FORMAT": os.getenv("IMAGE_PROCESSING_OUTPUT_FORMAT", "png"),
+    # Speed/size trade-off of the output encoder: fast, balanced or small
+    "OUTPUT_PROFILE": os.getenv("IMAGE_PROCESSING_OUTPUT_PROFILE", "balanced"),
+    # Results encoded and stored in the background while the next ones are computed
+    "PIPELINE_MAX_IN_FLIGHT": int(
+        os.getenv("IMAGE_PROCESSING_PIPELINE_MAX_IN_FLIGHT", 4)
+    ),
+    # Result rows written to the database per query
+    "PIPELINE_BATCH_SIZE": int(os.getenv("IMAGE_PROCESSING_PIPELINE_BATCH_SIZE", 100)),
+    # Images whose transformations are started while the current one is saved
+    "BATCH_PREFETCH_IMAGES": int(
+        os.getenv("IMAGE_PROCESSING_BATCH_PREFETCH_IMAGES", 1)
+    ),
+    # Weights of the object detector model
+    "DETECTOR_MODEL": os.getenv("IMAGE_PROCESSING_DETECTOR_MODEL", "yolo11l.pt"),
+    # Runtime of the detector model: pytorch, or a model exported by the
+    # image_processing_export_detector command, onnx or openvino
+    "DETECTOR_FORMAT": os.getenv("IMAGE_PROCESSING_DETECTOR_FORMAT", "pytorch"),
+    # Use the int8 quantized export of the detector model, openvino only
+    "DETECTOR_INT8": os.getenv("IMAGE_PROCESSING_DETECTOR_INT8", "false").lower()
+    == "true",
+    # Directory of the exported detector models
+    "DETECTOR_EXPORT_PATH": os.getenv(
+        "IMAGE_PROCESSING_DETECTOR_EXPORT_PATH",
+        Path(__file__).resolve().parent.parent.parent / "detector_models",
+    ),
+    # Load the detector model and run a dummy inference when a task worker starts
+    "DETECTOR_WARMUP": os.getenv("IMAGE_PROCESSING_DETECTOR_WARMUP", "false").lower()
+    == "true",
+    # Seconds a detector model stays loaded without being used, 0 keeps it loaded
+    "DETECTOR_MAX_IDLE_SECONDS": float(
+        os.getenv("IMAGE_PROCESSING_DETECTOR_MAX_IDLE_SECONDS", 0)
+    ),
+    # Max number of pending images, from any task, detected in a single batch
+    "DETECTOR_BATCH_SIZE": int(os.getenv("IMAGE_PROCESSING_DETECTOR_BATCH_SIZE", 16)),
+    # Max seconds a detection task waits for other tasks to fill its batch
+    "DETECTOR_BATCH_MAX_WAIT": float(
+        os.getenv("IMAGE_PROCESSING_DETECTOR_BATCH_MAX_WAIT", 0.5)
+    ),
+}
@@ -198,4 +198,5 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 from humanify_project.extra_settings.django_tasks import *  # noqa
 from humanify_project.extra_settings.drf_spectacular import *  # noqa
 from humanify_project.extra_settings.drf_simplejwt import *  # noqa
+from humanify_project.extra_settings.image_processing import *  # noqa
 from humanify_project.extra_settings.rest_framework import *  # noqa
@@ -30,6 +30,15 @@ STORAGES = {  # noqa F405
     },
 }
 
+# Tests enable the result and source caches when they need them, and tasks run
+# immediately so detection batches never wait for other tasks
+IMAGE_PROCESSING = {  # noqa F405
+    **IMAGE_PROCESSING,  # noqa F405
+    "RESULT_CACHE": False,
+    "SOURCE_CACHE_MAX_BYTES": 0,
+    "DETECTOR_BATCH_MAX_WAIT": 0,
+}
+
 # Django Tasks
 TASKS = {
     "default": {